@@ -0,0 +1,184 @@
+"""In-process resolver for "A > B > C" category paths over an MPTT model.
+
+Importers used to walk ``Category.objects.get_or_create(parent=..., name=...)``
+segment by segment for every row, which costs one or two queries per segment
+plus an MPTT tree update per inserted node. :class:`CategoryPathResolver`
+loads the whole tree once into a trie keyed by ``(parent, name)``, plans
+missing nodes in memory and writes them with one ``bulk_create`` per tree
+level, followed by a single rebuild of the touched trees.
+
+Works for any MPTT model with ``parent`` + ``name`` fields (``product.Category``
+and the legacy ``supplier_manager.Category``). A unique ``slug`` field, when
+the model has one, is filled the same way ``product.Category.save`` does.
+
+A resolver is meant to live for one job: it does not see categories created
+by other processes after :meth:`load`.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from django.utils.text import slugify
+
+
+def split_path(path, separator: str | None, max_depth: int | None = None) -> list[str]:
+    """Split a path string into stripped, non-empty segments.
+
+    Without a separator the whole (stripped) string is a single segment.
+    """
+    if path is None:
+        return []
+    if separator:
+        segments = [s.strip() for s in str(path).split(separator) if s.strip()]
+    else:
+        segment = str(path).strip()
+        segments = [segment] if segment else []
+    return segments[:max_depth] if max_depth else segments
+
+
+class CategoryPathResolver:
+    """Trie of ``(parent, name) -> node`` over one MPTT category model.
+
+    Nodes are keyed by the identity of their parent instance rather than its
+    pk, so planned (not yet inserted) nodes can parent further planned nodes.
+    """
+
+    def __init__(self, model: type[models.Model]):
+        self.model = model
+        self._children: dict[tuple[int | None, str], models.Model] | None = None
+        self._by_pk: dict[int, models.Model] = {}
+        self._by_name: dict[str, models.Model] = {}
+        self._name_counts: Counter[str] = Counter()
+        self._pending: list[models.Model] = []
+
+    # --- loading -----------------------------------------------------------
+
+    def load(self) -> None:
+        """(Re)read the whole tree — one query. Drops unflushed plans."""
+        self._children = {}
+        self._by_name = {}
+        self._name_counts = Counter()
+        self._pending = []
+        self._by_pk = {node.pk: node for node in self.model.objects.all()}
+        for node in self._by_pk.values():
+            self._index(node, self._by_pk.get(node.parent_id))
+
+    def _ensure_loaded(self) -> None:
+        if self._children is None:
+            self.load()
+
+    def _index(self, node: models.Model, parent: models.Model | None) -> None:
+        self._children[(id(parent) if parent is not None else None, node.name)] = node
+        self._by_name[node.name] = node
+        self._name_counts[node.name] += 1
+
+    # --- lookups -----------------------------------------------------------
+
+    def unique_by_name(self, name: str) -> models.Model | None:
+        """The only node called ``name`` anywhere in the tree, else None."""
+        self._ensure_loaded()
+        if self._name_counts[name] != 1:
+            return None
+        return self._by_name[name]
+
+    def plan(self, segments: Iterable[str]) -> models.Model | None:
+        """Return the leaf node for ``segments``, planning missing ones.
+
+        Newly planned nodes are unsaved instances; they get their primary key
+        on :meth:`flush`, so callers may hold on to the returned object.
+        """
+        self._ensure_loaded()
+        parent = None
+        node = None
+        for name in segments:
+            node = self._children.get((id(parent) if parent is not None else None, name))
+            if node is None:
+                node = self.model(parent=parent, name=name)
+                self._index(node, parent)
+                self._pending.append(node)
+            parent = node
+        return node
+
+    def get_or_create(self, segments: Iterable[str]) -> models.Model | None:
+        """:meth:`plan` + :meth:`flush` for call sites that need the pk now."""
+        node = self.plan(segments)
+        self.flush()
+        return node
+
+    # --- writing -----------------------------------------------------------
+
+    def flush(self) -> None:
+        """Insert every planned node and repair the MPTT fields once."""
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = []
+        opts = self.model._mptt_meta
+
+        # Parents must have a pk before children reference them, so insert
+        # level by level: one INSERT per depth, not one per node.
+        by_depth: dict[int, list[models.Model]] = {}
+        for node in pending:
+            depth = 0
+            cur = node.parent
+            while cur is not None and cur.pk is None:
+                depth += 1
+                cur = cur.parent
+            by_depth.setdefault(depth, []).append(node)
+
+        new_roots = False
+        touched_trees: set[int] = set()
+        with transaction.atomic():
+            self._assign_slugs(pending)
+            for depth in sorted(by_depth):
+                nodes = by_depth[depth]
+                for node in nodes:
+                    parent = node.parent
+                    if parent is None:
+                        new_roots = True
+                        tree_id, level = 0, 0
+                    else:
+                        tree_id = getattr(parent, opts.tree_id_attr)
+                        level = getattr(parent, opts.level_attr) + 1
+                        touched_trees.add(tree_id)
+                    # lft/rght are placeholders; the rebuild below fills them.
+                    setattr(node, opts.tree_id_attr, tree_id)
+                    setattr(node, opts.level_attr, level)
+                    setattr(node, opts.left_attr, 0)
+                    setattr(node, opts.right_attr, 0)
+                self.model.objects.bulk_create(nodes)
+                self._by_pk.update((node.pk, node) for node in nodes)
+
+            if new_roots:
+                # Roots are ordered by name across tree_ids, so a new root
+                # renumbers the forest — one full rebuild, then refresh ids.
+                self.model.objects.rebuild()
+                for pk, tree_id in self.model.objects.values_list('pk', opts.tree_id_attr):
+                    node = self._by_pk.get(pk)
+                    if node is not None:
+                        setattr(node, opts.tree_id_attr, tree_id)
+            else:
+                for tree_id in touched_trees:
+                    self.model.objects.partial_rebuild(tree_id)
+
+    def _assign_slugs(self, nodes: list[models.Model]) -> None:
+        try:
+            field = self.model._meta.get_field('slug')
+        except FieldDoesNotExist:
+            return
+        if not field.unique:
+            return
+        taken = set(self.model.objects.values_list('slug', flat=True))
+        fallback = self.model._meta.model_name
+        for node in nodes:
+            base = slugify(node.name, allow_unicode=True) or fallback
+            slug = base
+            i = 2
+            while slug in taken:
+                slug = f'{base}-{i}'
+                i += 1
+            node.slug = slug
+            taken.add(slug)
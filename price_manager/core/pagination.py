@@ -0,0 +1,280 @@
+"""Keyset (cursor) pagination shared by the JSON APIs.
+
+``PageNumberPagination`` answers page N with ``OFFSET`` plus a ``COUNT(*)``
+on every request, which degrades linearly for sync/export clients walking a
+large table. :class:`KeysetPagination` instead filters on the last row's
+ordering key — ``WHERE ROW(updated_at, id) > ROW(…)`` — so every page costs
+one range scan of a composite index on the key and there is no count.
+
+The cursor is opaque to clients: base64 JSON of the key values. Only the
+``next`` link is provided; pages are walked forward from ``?cursor=`` (empty
+means the first page).
+
+Existing page-number paginators opt in with :class:`CursorOptInMixin`: a
+request carrying ``cursor`` switches to keyset mode, anything else keeps the
+page-number response.
+
+:class:`EstimatedCountPagination` keeps the page-number contract but skips the
+exact ``COUNT(*)`` once the planner says the result is large: unfiltered lists
+read ``pg_class.reltuples``, filtered ones the ``EXPLAIN`` row estimate. Small
+results (below ``PAGINATION_ESTIMATE_THRESHOLD``) and ``?exact_count=1`` are
+still counted exactly; the response says which one it got in
+``count_estimated``.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+import logging
+import os
+from collections import OrderedDict
+from functools import cached_property, partial
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import F, Func, Value
+from django.db.models.lookups import GreaterThan
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+logger = logging.getLogger(__name__)
+
+PAGINATION_ESTIMATE_THRESHOLD = int(os.environ.get('PAGINATION_ESTIMATE_THRESHOLD', '10000'))
+
+
+class _Row(Func):
+    function = 'ROW'
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only keyset pagination over ascending ``ordering`` fields.
+
+    ``ordering`` must end with a unique field (normally ``id``) so the key is
+    a total order. With ``cursor_required`` the list stays unpaginated unless
+    ``?cursor=`` is present.
+    """
+
+    ordering: tuple[str, ...] = ('id',)
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    cursor_required = False
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def get_page_size(self, request) -> int:
+        raw = request.query_params.get(self.page_size_query_param) if self.page_size_query_param else None
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            return self.page_size
+        if size < 1:
+            return self.page_size
+        return min(size, self.max_page_size) if self.max_page_size else size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_required and self.cursor_query_param not in request.query_params:
+            return None
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        raw = request.query_params.get(self.cursor_query_param)
+        if raw:
+            queryset = queryset.filter(self._after(self._decode(raw, queryset.model), queryset.model))
+        rows = list(queryset[:page_size + 1])
+        self.next_key = self._key(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([('next', self.get_next_link()), ('results', data)]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.next_key is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self._encode(self.next_key),
+        )
+
+    # ----- cursor encoding --------------------------------------------------
+
+    def _key(self, obj) -> list:
+        return [getattr(obj, field) for field in self.ordering]
+
+    def _encode(self, key: list) -> str:
+        blob = json.dumps([_jsonable(v) for v in key], separators=(',', ':'))
+        return base64.urlsafe_b64encode(blob.encode()).decode().rstrip('=')
+
+    def _decode(self, raw: str, model) -> list:
+        try:
+            padded = raw + '=' * (-len(raw) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(raw)
+            return [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, ValidationError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def _after(self, values: list, model) -> GreaterThan:
+        """Rows strictly after ``values``: ``ROW(a, b) > ROW(%s, %s)``.
+
+        A row-value comparison (rather than the equivalent OR chain) is what
+        lets Postgres turn the cursor into an index range scan on a composite
+        index over ``ordering``.
+        """
+        fields = [model._meta.get_field(name) for name in self.ordering]
+        return GreaterThan(
+            _Row(*[F(name) for name in self.ordering], output_field=fields[-1]),
+            _Row(*[Value(v, output_field=f) for v, f in zip(values, fields)], output_field=fields[-1]),
+        )
+
+
+class CursorOptInMixin:
+    """Mix into a page-number paginator: ``?cursor=`` switches to keyset mode
+    ordered by ``cursor_ordering``, with the same page size limits."""
+
+    cursor_query_param = 'cursor'
+    cursor_ordering: tuple[str, ...] = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            self.keyset.ordering = self.cursor_ordering
+            self.keyset.page_size = self.page_size
+            self.keyset.page_size_query_param = self.page_size_query_param
+            self.keyset.max_page_size = self.max_page_size
+            self.keyset.cursor_query_param = self.cursor_query_param
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+def estimate_count(queryset) -> int | None:
+    """Planner's row estimate for ``queryset``, or None when unavailable.
+
+    An unfiltered queryset reads ``reltuples`` of its table (``-1`` until the
+    table is first analysed); anything else asks ``EXPLAIN`` for the top
+    plan node's ``Plan Rows``.
+    """
+    query = queryset.query
+    try:
+        if not query.where and not query.distinct and not query.combinator:
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    except (DatabaseError, ValueError, KeyError, IndexError, TypeError):
+        logger.warning('row estimate failed for %s', queryset.model.__name__, exc_info=True)
+        return None
+
+
+class _EstimatedPage(Page):
+    def __init__(self, object_list, number, paginator, more):
+        super().__init__(object_list, number, paginator)
+        self.more = more
+
+    def has_next(self):
+        return self.more
+
+
+class EstimatedCountPaginator(Paginator):
+    """``Paginator`` whose ``count`` may come from the planner.
+
+    Once the count is an estimate it cannot bound the page range, so pages are
+    fetched with one look-ahead row to decide ``has_next`` and only an empty
+    page past the first is rejected.
+    """
+
+    def __init__(self, object_list, per_page, *, exact=False, threshold=PAGINATION_ESTIMATE_THRESHOLD, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.exact = exact
+        self.threshold = threshold
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        if not self.exact and hasattr(self.object_list, 'query'):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= self.threshold:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def validate_number(self, number):
+        if not self.estimated:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        if not self.count or not self.estimated:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return _EstimatedPage(rows[:self.per_page], number, self, more=len(rows) > self.per_page)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Page-number pagination reporting a planner estimate for large counts."""
+
+    exact_count_query_param = 'exact_count'
+    estimate_threshold = PAGINATION_ESTIMATE_THRESHOLD
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.exact_count = request.query_params.get(self.exact_count_query_param) in ('1', 'true')
+        return super().paginate_queryset(queryset, request, view)
+
+    @property
+    def django_paginator_class(self):
+        return partial(EstimatedCountPaginator, exact=self.exact_count, threshold=self.estimate_threshold)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_estimated'] = self.page.paginator.estimated
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        payload = super().get_paginated_response_schema(schema)
+        payload['properties']['count_estimated'] = {'type': 'boolean'}
+        return payload
@@ -1,3 +1,110 @@
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from core.category_paths import CategoryPathResolver, split_path
+from core.pagination import EstimatedCountPaginator, estimate_count
+from product.models import Category as ProductCategory
+from product.models import Product
+from supplier_manager.models import Category as LegacyCategory
+
+
+class SplitPathTests(TestCase):
+    def test_strips_and_drops_empty_segments(self):
+        self.assertEqual(split_path(' A //B / ', '/'), ['A', 'B'])
+
+    def test_without_separator_is_single_segment(self):
+        self.assertEqual(split_path(' A/B ', None), ['A/B'])
+        self.assertEqual(split_path('   ', None), [])
+
+    def test_max_depth(self):
+        self.assertEqual(split_path('a>b>c', '>', max_depth=2), ['a', 'b'])
+
+
+class CategoryPathResolverTests(TestCase):
+    def _assert_tree_consistent(self, model):
+        """Stored MPTT fields match what a full rebuild would compute."""
+        before = list(model.objects.order_by('pk').values_list('pk', 'lft', 'rght', 'tree_id', 'level'))
+        model.objects.rebuild()
+        after = list(model.objects.order_by('pk').values_list('pk', 'lft', 'rght', 'tree_id', 'level'))
+        self.assertEqual(before, after)
+
+    def test_bulk_creates_paths_with_valid_tree(self):
+        ProductCategory.objects.create(name='Инструменты')
+        resolver = CategoryPathResolver(ProductCategory)
+        drills = resolver.plan(['Инструменты', 'Электро', 'Дрели'])
+        saws = resolver.plan(['Инструменты', 'Электро', 'Пилы'])
+        other = resolver.plan(['Аксессуары', 'Дрели'])
+        with self.assertNumQueries(0):
+            self.assertIs(resolver.plan(['Инструменты', 'Электро', 'Дрели']), drills)
+        resolver.flush()
+
+        self.assertEqual(drills.parent, saws.parent)
+        self.assertEqual(drills.parent.parent.name, 'Инструменты')
+        self.assertEqual(other.parent.name, 'Аксессуары')
+        self.assertEqual(ProductCategory.objects.count(), 6)
+        self.assertEqual(
+            sorted(ProductCategory.objects.filter(name='Дрели').values_list('slug', flat=True)),
+            ['дрели', 'дрели-2'],
+        )
+        self._assert_tree_consistent(ProductCategory)
+
+    def test_children_of_existing_tree_only_rebuild_that_tree(self):
+        root = ProductCategory.objects.create(name='Root')
+        ProductCategory.objects.create(name='Other')
+        resolver = CategoryPathResolver(ProductCategory)
+        leaf = resolver.get_or_create(['Root', 'Child', 'Leaf'])
+        self.assertEqual(leaf.parent.parent, root)
+        root.refresh_from_db()
+        self.assertEqual(list(root.get_descendants().values_list('name', flat=True)), ['Child', 'Leaf'])
+        self._assert_tree_consistent(ProductCategory)
+
+    def test_existing_paths_resolve_without_writes(self):
+        resolver = CategoryPathResolver(LegacyCategory)
+        leaf = resolver.get_or_create(['A', 'B'])
+        fresh = CategoryPathResolver(LegacyCategory)
+        with self.assertNumQueries(1):
+            self.assertEqual(fresh.get_or_create(['A', 'B']).pk, leaf.pk)
+        self._assert_tree_consistent(LegacyCategory)
+
+    def test_unique_by_name_sees_planned_nodes(self):
+        resolver = CategoryPathResolver(LegacyCategory)
+        node = resolver.plan(['A', 'X'])
+        self.assertIs(resolver.unique_by_name('X'), node)
+        resolver.plan(['B', 'X'])
+        self.assertIsNone(resolver.unique_by_name('X'))
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create(
+            [Product(sku=f'EST-{i:02}', name=f'Estimate {i}') for i in range(30)]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Product._meta.db_table}')
+
+    def test_unfiltered_uses_reltuples(self):
+        self.assertEqual(estimate_count(Product.objects.all()), 30)
+
+    def test_filtered_uses_explain(self):
+        self.assertIsNotNone(estimate_count(Product.objects.filter(sku__startswith='EST-1')))
+
+    def test_small_results_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(Product.objects.order_by('pk'), 10, threshold=1000)
+        self.assertEqual(paginator.count, 30)
+        self.assertFalse(paginator.estimated)
+
+    def test_exact_flag_skips_estimate(self):
+        paginator = EstimatedCountPaginator(Product.objects.order_by('pk'), 10, exact=True, threshold=1)
+        self.assertEqual(paginator.count, 30)
+        self.assertFalse(paginator.estimated)
+
+    def test_estimated_pages_use_look_ahead(self):
+        qs = Product.objects.filter(sku__startswith='EST-').order_by('sku')
+        paginator = EstimatedCountPaginator(qs, 25, threshold=1)
+        first = paginator.page(1)
+        self.assertTrue(paginator.estimated)
+        self.assertTrue(first.has_next())
+        last = paginator.page(2)
+        self.assertEqual([p.sku for p in last], ['EST-25', 'EST-26', 'EST-27', 'EST-28', 'EST-29'])
+        self.assertFalse(last.has_next())
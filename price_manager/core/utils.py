@@ -3,6 +3,7 @@ from io import StringIO
 from .models import *
 from django.db import transaction
 from supplier_manager.models import Manufacturer, Category, ManufacturerDict
+from .category_paths import CategoryPathResolver, split_path
 from .models import ShoppingTab, CartItem
 # Работа с моделями
 
@@ -71,22 +72,22 @@ def resolve_manufacturer(name: str) -> Manufacturer | None:
     m, _ = Manufacturer.objects.get_or_create(name=clean)
     return m
 
-def get_or_create_category_by_path(path: str, delimiter: str = ">") -> Category | None:
+def get_or_create_category_by_path(
+    path: str,
+    delimiter: str = ">",
+    categories: CategoryPathResolver | None = None,
+) -> Category | None:
     """
     Создаёт/находит категорию по строке 'A > B > C' (до 10 уровней).
+    Для пакетной обработки передайте общий ``categories``, чтобы дерево
+    загружалось один раз.
     """
     if not path:
         return None
-    parts = [p.strip() for p in str(path).split(delimiter) if p and str(p).strip()]
-    parent = None
-    node = None
-    for level, name in enumerate(parts[:10]):
-        node, _ = Category.objects.get_or_create(parent=parent, name=name)
-        parent = node
-        return node
-        last, _ = Category.objects.get_or_create(parent=parent, name=name)
-        parent = last
-        return last
+    parts = split_path(path, delimiter, max_depth=10)
+    if not parts:
+        return None
+    return (categories or CategoryPathResolver(Category)).get_or_create(parts)
 
 def update_cart_items(shopping_tab_id: int) -> int:
     shopping_tab = ShoppingTab.objects.get(id=shopping_tab_id)
@@ -3,20 +3,32 @@ from import_export.widgets import ForeignKeyWidget, ManyToManyWidget
 from difflib import get_close_matches
 from .models import *
 from supplier_manager.models import ManufacturerDict, Discount
+from core.category_paths import CategoryPathResolver, split_path
 
 class CategoryWidget(ForeignKeyWidget):
     """Категория строкой: 'Инструмент > Ручной инструмент > Отвертки'."""
 
+    # Resource fields are deep-copied per resource instance, so the resolver
+    # (and its in-memory category tree) lives for exactly one import.
+    _categories = None
+
+    @property
+    def categories(self):
+        if self._categories is None:
+            self._categories = CategoryPathResolver(Category)
+        return self._categories
+
+    def prefetch(self, values):
+        """Create every missing category of an import column in one go."""
+        for value in set(values):
+            if value:
+                self.categories.plan(split_path(value, ">", max_depth=10))
+        self.categories.flush()
+
     def clean(self, value, row=None, *args, **kwargs):
         if not value:
             return None
-        parts = [p.strip() for p in str(value).split(">") if p and str(p).strip()]
-        parent = None
-        node = None
-        for name in parts[:10]:
-            node, _ = Category.objects.get_or_create(name=name, parent=parent)
-            parent = node
-        return node
+        return self.categories.get_or_create(split_path(value, ">", max_depth=10))
 
     def render(self, value, obj=None, **kwargs):
         if not value:
@@ -189,6 +201,12 @@ class MainProductResource(resources.ModelResource):
         
         return " | ".join(price_list)
 
+    def before_import(self, dataset, **kwargs):
+        category = self.fields["category"]
+        if category.column_name in (dataset.headers or []):
+            category.widget.prefetch(dataset[category.column_name])
+        super().before_import(dataset, **kwargs)
+
     def get_import_fields(self, selected_fields=None):
         """Ограничить набор импортируемых полей"""
         return [self.fields[f] for f in self.Meta.import_fields]
@@ -1,7 +1,9 @@
-from rest_framework.pagination import PageNumberPagination
+from core.pagination import CursorOptInMixin, EstimatedCountPagination
 
 
-class StandardPagination(PageNumberPagination):
+class StandardPagination(CursorOptInMixin, EstimatedCountPagination):
+    """``?cursor=`` switches to keyset pagination by ``id`` (no counts)."""
+
     page_size = 100
     page_size_query_param = 'page_size'
     max_page_size = 1000
@@ -16,6 +16,10 @@ class PricingRuleSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class PreviewParamsSerializer(serializers.Serializer):
+    top = serializers.IntegerField(min_value=0, max_value=100, default=10)
+
+
 class ProductPriceSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductPrice
@@ -1,9 +1,14 @@
+from django.db import transaction
 from django.db.models import Q
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from pricing.models import PriceType, PricingRule, ProductPrice, Stock
+from pricing.services.rules import active_rules, preview_rules
+from pricing.tasks import recompute_rule_prices
 from .pagination import StandardPagination
-from .serializers import PriceTypeSerializer, PricingRuleSerializer, ProductPriceSerializer, StockSerializer
+from .serializers import PreviewParamsSerializer, PriceTypeSerializer, PricingRuleSerializer, ProductPriceSerializer, StockSerializer
 
 
 class PriceTypeViewSet(viewsets.ModelViewSet):
@@ -32,6 +37,61 @@ class PricingRuleViewSet(viewsets.ModelViewSet):
                 return qs.none()
         return qs
 
+    # Feed pricing is incremental (only moved source prices are re-ruled), so
+    # a rule edit has to re-apply the supplier's rules to every product.
+    def _recompute(self, supplier_id):
+        transaction.on_commit(lambda: recompute_rule_prices.delay(supplier_id))
+
+    def perform_create(self, serializer):
+        rule = serializer.save()
+        self._recompute(rule.supplier_id)
+
+    def perform_update(self, serializer):
+        previous_supplier_id = serializer.instance.supplier_id
+        rule = serializer.save()
+        self._recompute(rule.supplier_id)
+        if previous_supplier_id != rule.supplier_id:
+            self._recompute(previous_supplier_id)
+
+    def perform_destroy(self, instance):
+        supplier_id = instance.supplier_id
+        instance.delete()
+        self._recompute(supplier_id)
+
+    # ----- dry-run: evaluate without writing ---------------------------------
+
+    def _preview_response(self, request, rules, supplier_id):
+        params = PreviewParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(preview_rules(rules, supplier_id, top=params.validated_data['top']))
+
+    @action(detail=True, methods=['post'], url_path='preview')
+    def preview(self, request, pk=None):
+        """Diff of this rule, with the posted (unsaved) field changes applied."""
+        rule = self.get_object()
+        serializer = self.get_serializer(rule, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        for field, value in serializer.validated_data.items():
+            setattr(rule, field, value)
+        return self._preview_response(request, [rule], rule.supplier_id)
+
+    @action(detail=False, methods=['post'], url_path='preview')
+    def preview_list(self, request):
+        """Diff of a posted (unsaved) rule, or of all active rules of ``?supplier=``."""
+        if request.data:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            rule = PricingRule(**serializer.validated_data)
+            return self._preview_response(request, [rule], rule.supplier_id)
+        try:
+            supplier_id = int(request.query_params.get('supplier', ''))
+        except ValueError:
+            return Response(
+                {'supplier': 'Укажите поставщика или передайте правило.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return self._preview_response(request, list(active_rules(supplier_id)), supplier_id)
+
 
 class ProductPriceViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ProductPriceSerializer
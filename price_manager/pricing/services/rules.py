@@ -0,0 +1,248 @@
+"""Set-based evaluation of :class:`~pricing.models.PricingRule`.
+
+Each rule compiles to one ``SELECT`` over the supplier's source prices
+(``ProductPrice`` of ``rule.source_price_type``) that yields
+``(product_id, source_value, dest_value)``:
+
+* ``formula`` — ``source * (1 + markup / 100) + increase``;
+* ``fixed``   — the constant ``value``;
+* ``price_from`` / ``price_to`` bound the source value (inclusive);
+* ``category`` limits products to the category and its MPTT descendants.
+
+Arithmetic runs on PostgreSQL ``numeric`` with ``Decimal`` parameters, so no
+value round-trips through ``float``. :func:`apply_rule` wraps the select in
+``INSERT ... ON CONFLICT DO UPDATE`` — one statement per rule, however many
+source prices it covers; :func:`preview_rules` diffs the same selects against
+stored prices without writing.
+"""
+from __future__ import annotations
+
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, models
+from django.utils import timezone
+
+from product.models import Category, Product
+
+from ..models import PricingRule, ProductPrice
+
+logger = logging.getLogger(__name__)
+
+
+def active_rules(supplier, now=None) -> models.QuerySet:
+    """Rules of ``supplier`` whose date window contains ``now``, by priority."""
+    now = now or timezone.now()
+    return (
+        PricingRule.objects.filter(supplier=supplier)
+        .filter(models.Q(date_from__isnull=True) | models.Q(date_from__lte=now))
+        .filter(models.Q(date_to__isnull=True) | models.Q(date_to__gte=now))
+        .select_related('source_price_type', 'dest_price_type', 'category')
+        .order_by('priority')
+    )
+
+
+def _decimal_param(rule: PricingRule, key: str) -> Decimal:
+    try:
+        value = Decimal(str(rule.params.get(key, 0)))
+    except (InvalidOperation, TypeError, ValueError) as exc:
+        raise ValueError(f'rule {rule.pk}: param {key!r} is not a number') from exc
+    if not value.is_finite():
+        raise ValueError(f'rule {rule.pk}: param {key!r} is not a number')
+    return value
+
+
+def rule_select(rule: PricingRule, product_ids=None) -> tuple[str, list] | None:
+    """SQL + params selecting ``(product_id, source_value, dest_value)`` for ``rule``.
+
+    ``product_ids`` (optional) restricts the source prices to those products.
+    Returns None for rules that cannot produce prices (unknown mode, bad params).
+    """
+    try:
+        if rule.mode == PricingRule.MODE_FORMULA:
+            dest_sql = 'sp.value * (1 + %s::numeric / 100) + %s::numeric'
+            dest_params = [_decimal_param(rule, 'markup'), _decimal_param(rule, 'increase')]
+        elif rule.mode == PricingRule.MODE_FIXED:
+            dest_sql = '%s::numeric'
+            dest_params = [_decimal_param(rule, 'value')]
+        else:
+            return None
+    except ValueError:
+        logger.warning('pricing rule %s skipped: invalid params %r', rule.pk, rule.params)
+        return None
+
+    qn = connection.ops.quote_name
+    joins = ''
+    join_params: list = []
+    where = ['sp.supplier_id = %s', 'sp.price_type_id = %s']
+    where_params: list = [rule.supplier_id, rule.source_price_type_id]
+
+    if rule.category_id:
+        category = rule.category
+        mptt = Category._mptt_meta
+        tree_id, lft, rght = (
+            qn(Category._meta.get_field(attr).column)
+            for attr in (mptt.tree_id_attr, mptt.left_attr, mptt.right_attr)
+        )
+        # Same node set as category.get_descendants(include_self=True).
+        joins = (
+            f' JOIN {qn(Product._meta.db_table)} p ON p.id = sp.product_id'
+            f' JOIN {qn(Category._meta.db_table)} c ON c.id = p.category_id'
+            f' AND c.{tree_id} = %s AND c.{lft} >= %s AND c.{rght} <= %s'
+        )
+        join_params = [
+            getattr(category, mptt.tree_id_attr),
+            getattr(category, mptt.left_attr),
+            getattr(category, mptt.right_attr),
+        ]
+    if rule.price_from is not None:
+        where.append('sp.value >= %s::numeric')
+        where_params.append(rule.price_from)
+    if rule.price_to is not None:
+        where.append('sp.value <= %s::numeric')
+        where_params.append(rule.price_to)
+    if product_ids is not None:
+        where.append('sp.product_id = ANY(%s)')
+        where_params.append(list(product_ids))
+
+    sql = (
+        f'SELECT sp.product_id, sp.value AS source_value, {dest_sql} AS dest_value'
+        f' FROM {qn(ProductPrice._meta.db_table)} sp{joins}'
+        f' WHERE {" AND ".join(where)}'
+    )
+    return sql, dest_params + join_params + where_params
+
+
+def apply_rule(rule: PricingRule, product_ids=None, now=None) -> int:
+    """Write ``rule``'s prices with a single ``INSERT ... SELECT ... ON CONFLICT``.
+
+    Returns the number of rows inserted or updated.
+    """
+    compiled = rule_select(rule, product_ids=product_ids)
+    if compiled is None:
+        return 0
+    select_sql, params = compiled
+    table = connection.ops.quote_name(ProductPrice._meta.db_table)
+    sql = (
+        f'INSERT INTO {table} (product_id, supplier_id, price_type_id, value, rule_id, updated_at)'
+        f' SELECT r.product_id, %s, %s, r.dest_value, %s, %s FROM ({select_sql}) r'
+        ' ON CONFLICT (product_id, supplier_id, price_type_id) DO UPDATE'
+        ' SET value = EXCLUDED.value, rule_id = EXCLUDED.rule_id, updated_at = EXCLUDED.updated_at'
+    )
+    head = [rule.supplier_id, rule.dest_price_type_id, rule.pk, now or timezone.now()]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, head + params)
+        return cursor.rowcount
+
+
+def apply_rules(rules, product_ids=None) -> int:
+    """Apply ``rules`` in order (later rules win), one statement each.
+
+    Statements run sequentially, so a rule whose source is an earlier rule's
+    destination reads the value that rule has just written.
+    """
+    now = timezone.now()
+    return sum(apply_rule(rule, product_ids=product_ids, now=now) for rule in rules)
+
+
+def preview_rules(rules, supplier_id: int, top: int = 10) -> dict:
+    """Dry-run ``rules`` (in order) and diff them against stored prices.
+
+    Read-only: every rule's select is combined into one statement where, per
+    ``(product, dest price type)``, the last rule wins — as in
+    :func:`apply_rules`. Chained rules read the *stored* value of an earlier
+    rule's destination, not the previewed one. Rules may be unsaved instances.
+
+    Returns counts (``rows``, ``created``, ``changed``, ``unchanged``), the
+    ``min``/``max``/``avg`` delta over existing prices, and the ``top`` rows
+    by absolute delta.
+    """
+    parts, params, rule_ids = [], [], []
+    for ordinal, rule in enumerate(rules):
+        compiled = rule_select(rule)
+        if compiled is None:
+            continue
+        select_sql, select_params = compiled
+        parts.append(
+            f'SELECT {ordinal} AS ord, %s::bigint AS rule_id, %s::bigint AS price_type_id,'
+            f' r.product_id, r.dest_value FROM ({select_sql}) r'
+        )
+        params += [rule.pk, rule.dest_price_type_id] + select_params
+        rule_ids.append(rule.pk)
+
+    result = {
+        'rules': rule_ids,
+        'rows': 0, 'created': 0, 'changed': 0, 'unchanged': 0,
+        'delta': {'min': None, 'max': None, 'avg': None},
+        'top': [],
+    }
+    if not parts:
+        return result
+
+    qn = connection.ops.quote_name
+    prices = qn(ProductPrice._meta.db_table)
+    value_scale = ProductPrice._meta.get_field('value').decimal_places
+    diff_cte = (
+        'WITH proposed AS ('
+        ' SELECT DISTINCT ON (product_id, price_type_id) product_id, price_type_id, rule_id,'
+        f' round(dest_value, {value_scale}) AS value'
+        f' FROM ({" UNION ALL ".join(parts)}) u'
+        ' ORDER BY product_id, price_type_id, ord DESC'
+        '), diff AS ('
+        ' SELECT p.product_id, p.price_type_id, p.rule_id, cur.value AS current_value,'
+        ' p.value AS new_value, p.value - cur.value AS delta'
+        f' FROM proposed p LEFT JOIN {prices} cur ON cur.product_id = p.product_id'
+        ' AND cur.supplier_id = %s AND cur.price_type_id = p.price_type_id'
+        ')'
+    )
+    params.append(supplier_id)
+
+    # One pass: the totals ride along every row as window aggregates, so the
+    # first row carries them even when fewer than ``top`` rows differ.
+    order = 'differs DESC, abs(delta) DESC NULLS LAST, product_id, price_type_id'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{diff_cte} SELECT w.product_id, pr.sku, w.price_type_id, w.rule_id,'
+            ' w.current_value, w.new_value, w.delta, w.differs,'
+            ' w.rows, w.created, w.changed, w.delta_min, w.delta_max, w.delta_avg FROM ('
+            ' SELECT d.*, d.current_value IS DISTINCT FROM d.new_value AS differs,'
+            ' count(*) OVER () AS rows,'
+            ' count(*) FILTER (WHERE d.current_value IS NULL) OVER () AS created,'
+            ' count(*) FILTER (WHERE d.current_value <> d.new_value) OVER () AS changed,'
+            ' min(d.delta) OVER () AS delta_min, max(d.delta) OVER () AS delta_max,'
+            ' avg(d.delta) OVER () AS delta_avg'
+            f' FROM diff d ORDER BY {order} LIMIT greatest(%s, 1)'
+            f') w JOIN {qn(Product._meta.db_table)} pr ON pr.id = w.product_id ORDER BY {order}',
+            params + [top],
+        )
+        fetched = cursor.fetchall()
+    if not fetched:
+        return result
+    rows, created, changed, delta_min, delta_max, delta_avg = fetched[0][8:]
+    top_rows = [row[:7] for row in fetched[:top] if row[7]]
+
+    quant = Decimal(1).scaleb(-value_scale)
+    result.update(
+        rows=rows,
+        created=created,
+        changed=changed,
+        unchanged=rows - created - changed,
+        delta={
+            'min': delta_min,
+            'max': delta_max,
+            'avg': delta_avg.quantize(quant) if delta_avg is not None else None,
+        },
+        top=[
+            {
+                'product': product_id,
+                'sku': sku,
+                'price_type': price_type_id,
+                'rule': rule_id,
+                'current': current,
+                'new': new,
+                'delta': delta,
+            }
+            for product_id, sku, price_type_id, rule_id, current, new, delta in top_rows
+        ],
+    )
+    return result
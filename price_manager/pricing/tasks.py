@@ -1,20 +1,133 @@
 import logging
+import math
+import os
+import time
+from decimal import Decimal
 
 from celery import shared_task
-from django.db import models as db_models, transaction
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT ... ON CONFLICT statement.
+PRICING_BULK_BATCH_SIZE = int(os.environ.get('PRICING_BULK_BATCH_SIZE', '1000'))
+
+_PRICE_QUANT = Decimal('0.0001')  # ProductPrice.value decimal_places
+
+
+def _to_price(raw) -> Decimal | None:
+    """Parse a feed cell the way ``float()`` does, as a stored-precision Decimal."""
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(value):
+        return None
+    return Decimal(repr(value)).quantize(_PRICE_QUANT)
+
+
+def _changed_prices(rows: dict, supplier) -> dict:
+    """Subset of ``rows`` that differs from what is stored (value or rule)."""
+    from .models import ProductPrice
+
+    if not rows:
+        return {}
+    existing = {
+        (product_id, price_type_id): (value, rule_id)
+        for product_id, price_type_id, value, rule_id in (
+            ProductPrice.objects
+            .filter(supplier=supplier, price_type_id__in={pt for _pid, pt in rows})
+            .values_list('product_id', 'price_type_id', 'value', 'rule_id')
+            .iterator(chunk_size=5000)
+        )
+    }
+    return {key: row for key, row in rows.items() if existing.get(key) != row}
+
+
+def _upsert_prices(rows: dict, supplier) -> int:
+    """Upsert ``{(product_id, price_type_id): (value, rule_id)}`` for one supplier."""
+    from .models import ProductPrice
+
+    objs = [
+        ProductPrice(
+            product_id=product_id,
+            supplier=supplier,
+            price_type_id=price_type_id,
+            value=value,
+            rule_id=rule_id,
+        )
+        for (product_id, price_type_id), (value, rule_id) in rows.items()
+    ]
+    if objs:
+        ProductPrice.objects.bulk_create(
+            objs,
+            batch_size=PRICING_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['product', 'supplier', 'price_type'],
+            update_fields=['value', 'rule', 'updated_at'],
+        )
+    return len(objs)
+
+
+def _upsert_stocks(quantities: dict, supplier) -> int:
+    """Upsert ``{product_id: quantity}`` for one supplier."""
+    from .models import Stock
+
+    objs = [
+        Stock(product_id=product_id, supplier=supplier, quantity=qty)
+        for product_id, qty in quantities.items()
+    ]
+    if objs:
+        Stock.objects.bulk_create(
+            objs,
+            batch_size=PRICING_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['product', 'supplier'],
+            update_fields=['quantity', 'updated_at'],
+        )
+    return len(objs)
+
+
+def _rule_window_moved(supplier, since, now) -> bool:
+    """Whether a rule of ``supplier`` became active or expired in ``(since, now]``.
+
+    Mirrors :func:`pricing.services.rules.active_rules`: a rule is active while
+    ``date_from <= now <= date_to``. With no previous run (``since`` is None)
+    any window edge already passed counts.
+    """
+    from .models import PricingRule
+
+    opened = Q(date_from__lte=now)
+    closed = Q(date_to__lt=now)
+    if since is not None:
+        opened &= Q(date_from__gt=since)
+        closed &= Q(date_to__gte=since)
+    return PricingRule.objects.filter(supplier=supplier).filter(opened | closed).exists()
+
 
 @shared_task
-def apply_feed_pricing(feed_id: int) -> None:
+def apply_feed_pricing(feed_id: int, full_recompute: bool = False) -> dict | None:
     """
     Called when SupplierFeed transitions to 'done'.
     1. For each matched SupplierFeedEntry: extract price-role columns → upsert ProductPrice(rule=None)
     2. Extract stock-role column → collect quantities
     3. Upsert Stock for products present in feed; zero out Stock for products of this supplier NOT in feed
     4. Apply PricingRules for this supplier (filter: category, price range, date) → upsert ProductPrice(rule=R)
+
+    Rows are collected in memory (the last entry wins for a repeated product)
+    and written with batched ``INSERT ... ON CONFLICT DO UPDATE``. Each rule is
+    then evaluated in SQL as one ``INSERT ... SELECT`` (see
+    ``pricing.services.rules``). Returns counts and per-step timings in seconds.
+
+    Incremental by default: only source prices whose value differs from the
+    stored one are written, and rules are re-applied only to those products
+    (or to every product in the feed when a rule reads a price type the feed
+    does not carry). When a rule's date window opened or closed since the
+    supplier's previous run, rules are re-applied to all of its products.
+    ``full_recompute=True`` writes every price and re-applies rules to all of
+    the supplier's products.
     """
     from supplier_feed.models import SupplierFeed, SupplierFeedEntry
     try:
@@ -22,12 +135,13 @@ def apply_feed_pricing(feed_id: int) -> None:
     except ImportError:
         FeedColumnMapping = None
 
-    from .models import PriceType, PricingRule, ProductPrice, Stock
+    from .models import Stock
+    from .services.rules import active_rules, apply_rules
 
     try:
         feed = SupplierFeed.objects.select_related('supplier', 'feed_mapping').get(pk=feed_id)
     except SupplierFeed.DoesNotExist:
-        return
+        return None
 
     supplier = feed.supplier
 
@@ -46,113 +160,123 @@ def apply_feed_pricing(feed_id: int) -> None:
     stock_columns = [cm.column_name for cm in column_mappings if cm.role == 'stock']
     stock_column = stock_columns[0] if stock_columns else None
 
-    entries = list(
+    timings: dict[str, float] = {}
+    started = time.monotonic()
+
+    entries = (
         SupplierFeedEntry.objects
         .filter(feed=feed, product__isnull=False)
-        .select_related('product')
-        .only('id', 'product_id', 'data')
+        .order_by('pk')
+        .values_list('product_id', 'data')
     )
 
-    if not entries:
-        return
-
-    present_product_ids = {e.product_id for e in entries}
+    present_product_ids = set()
+    prices_to_upsert: dict = {}
+    stocks_to_upsert: dict = {}
 
-    prices_to_upsert = []
-    stocks_to_upsert = []
-
-    for entry in entries:
+    for product_id, data in entries.iterator(chunk_size=2000):
+        present_product_ids.add(product_id)
         for col_name, price_type in price_columns.items():
-            raw = entry.data.get(col_name)
+            raw = data.get(col_name)
             if raw is None:
                 continue
-            try:
-                value = float(raw)
-            except (TypeError, ValueError):
+            value = _to_price(raw)
+            if value is None:
                 continue
-            prices_to_upsert.append({
-                'product_id': entry.product_id,
-                'supplier': supplier,
-                'price_type': price_type,
-                'value': value,
-                'rule': None,
-            })
+            prices_to_upsert[(product_id, price_type.pk)] = (value, None)
 
         if stock_column:
-            raw_qty = entry.data.get(stock_column)
+            raw_qty = data.get(stock_column)
             try:
                 qty = int(float(raw_qty)) if raw_qty is not None else 0
             except (TypeError, ValueError):
                 qty = 0
-            stocks_to_upsert.append({'product_id': entry.product_id, 'supplier': supplier, 'quantity': qty})
+            stocks_to_upsert[product_id] = qty
 
-    with transaction.atomic():
-        for p in prices_to_upsert:
-            ProductPrice.objects.update_or_create(
-                product_id=p['product_id'],
-                supplier=p['supplier'],
-                price_type=p['price_type'],
-                defaults={'value': p['value'], 'rule': None},
-            )
+    if not present_product_ids:
+        return None
+    timings['read'] = time.monotonic() - started
 
-        for s in stocks_to_upsert:
-            Stock.objects.update_or_create(
-                product_id=s['product_id'],
-                supplier=s['supplier'],
-                defaults={'quantity': s['quantity']},
-            )
+    started = time.monotonic()
+    changed = prices_to_upsert if full_recompute else _changed_prices(prices_to_upsert, supplier)
+    timings['diff'] = time.monotonic() - started
+
+    started = time.monotonic()
+    with transaction.atomic():
+        prices_written = _upsert_prices(changed, supplier)
+        stocks_written = _upsert_stocks(stocks_to_upsert, supplier)
 
         # Zero out stock for products of this supplier not present in this feed.
-        # Always do this when we have data for this supplier's products.
-        if present_product_ids:
-            Stock.objects.filter(supplier=supplier).exclude(
-                product_id__in=present_product_ids
-            ).update(quantity=0)
+        # Always do this when we have data for this supplier's products. The
+        # feed's entries are joined in SQL (NOT EXISTS), not shipped as ids.
+        in_feed = SupplierFeedEntry.objects.filter(feed=feed, product_id=OuterRef('product_id'))
+        stocks_zeroed = (
+            Stock.objects.filter(supplier=supplier)
+            .exclude(quantity=0)
+            .filter(~Exists(in_feed))
+            .update(quantity=0)
+        )
+    timings['write'] = time.monotonic() - started
 
     now = timezone.now()
-    rules = list(
-        PricingRule.objects.filter(supplier=supplier)
-        .filter(
-            db_models.Q(date_from__isnull=True) | db_models.Q(date_from__lte=now)
-        )
-        .filter(
-            db_models.Q(date_to__isnull=True) | db_models.Q(date_to__gte=now)
-        )
-        .select_related('source_price_type', 'dest_price_type', 'category')
-        .order_by('priority')
+    rules = list(active_rules(supplier, now=now))
+    # A rule whose date window opened or closed since the supplier's last run
+    # changes prices whose source did not move: recompute every product.
+    last_run = (
+        SupplierFeed.objects.filter(supplier=supplier)
+        .aggregate(last=Max('pricing_applied_at'))['last']
     )
+    window_moved = not full_recompute and _rule_window_moved(supplier, last_run, now)
+    # Rule inputs this run can diff: the feed's own price types and what the
+    # rules themselves produce. A rule reading anything else (e.g. prices
+    # loaded outside feeds) falls back to every product present in the feed.
+    diffable = {pt.pk for pt in price_columns.values()} | {r.dest_price_type_id for r in rules}
+    if full_recompute or window_moved:
+        changed_product_ids = None
+    elif all(r.source_price_type_id in diffable for r in rules):
+        changed_product_ids = sorted({pid for pid, _pt in changed})
+    else:
+        changed_product_ids = sorted(present_product_ids)
 
-    for rule in rules:
-        source_prices = ProductPrice.objects.filter(
-            supplier=supplier,
-            price_type=rule.source_price_type,
-        ).select_related('product__category')
+    started = time.monotonic()
+    rule_prices_written = 0
+    if rules and changed_product_ids != []:
+        with transaction.atomic():
+            rule_prices_written = apply_rules(rules, product_ids=changed_product_ids)
+    SupplierFeed.objects.filter(pk=feed.pk).update(pricing_applied_at=now)
+    timings['rules'] = time.monotonic() - started
 
-        if rule.category_id:
-            source_prices = source_prices.filter(
-                product__category__in=rule.category.get_descendants(include_self=True)
-            )
+    result = {
+        'entries': len(present_product_ids),
+        'prices': prices_written,
+        'prices_unchanged': len(prices_to_upsert) - prices_written,
+        'full_recompute': full_recompute,
+        'rule_window_moved': window_moved,
+        'stocks': stocks_written,
+        'stocks_zeroed': stocks_zeroed,
+        'rules': len(rules),
+        'rule_prices': rule_prices_written,
+        'timings': {k: round(v, 3) for k, v in timings.items()},
+    }
+    logger.info('apply_feed_pricing feed=%s %s', feed_id, result)
+    return result
 
-        for sp in source_prices:
-            source_val = float(sp.value)
 
-            if rule.price_from is not None and source_val < float(rule.price_from):
-                continue
-            if rule.price_to is not None and source_val > float(rule.price_to):
-                continue
+@shared_task
+def recompute_rule_prices(supplier_id: int) -> int:
+    """Re-apply every active rule of a supplier to all of its source prices.
 
-            if rule.mode == 'formula':
-                markup = float(rule.params.get('markup', 0))
-                increase = float(rule.params.get('increase', 0))
-                dest_val = source_val * (1 + markup / 100) + increase
-            elif rule.mode == 'fixed':
-                dest_val = float(rule.params.get('value', 0))
-            else:
-                continue
+    Used after rule edits, when the incremental path of
+    :func:`apply_feed_pricing` would miss prices whose source did not move.
+    """
+    from supplier.models import Supplier
 
-            ProductPrice.objects.update_or_create(
-                product=sp.product,
-                supplier=supplier,
-                price_type=rule.dest_price_type,
-                defaults={'value': dest_val, 'rule': rule},
-            )
+    from .services.rules import active_rules, apply_rules
+
+    supplier = Supplier.objects.filter(pk=supplier_id).first()
+    if supplier is None:
+        return 0
+    with transaction.atomic():
+        written = apply_rules(active_rules(supplier))
+    logger.info('recompute_rule_prices supplier=%s rule_prices=%d', supplier_id, written)
+    return written
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase, override_settings
 from django.urls import reverse
@@ -135,6 +137,72 @@ class PricingRuleCrudTests(PricingApiTestBase):
         self.assertEqual(resp.status_code, 204)
         self.assertEqual(PricingRule.objects.count(), 0)
 
+    def test_rule_edit_schedules_full_recompute(self):
+        rule = PricingRule.objects.create(
+            supplier=self.supplier,
+            source_price_type=self.src_pt,
+            dest_price_type=self.dest_pt,
+            mode='fixed',
+            params={'value': 50},
+        )
+        with patch('pricing.api.views.recompute_rule_prices.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(
+                reverse('pricing_api:pricing-rule-detail', args=[rule.pk]),
+                {'params': {'value': 60}},
+                content_type='application/json',
+            )
+        self.assertEqual(resp.status_code, 200, resp.content[:300])
+        delay.assert_called_once_with(self.supplier.pk)
+
+
+class PricingRulePreviewTests(PricingApiTestBase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = make_supplier()
+        self.src_pt = make_price_type(name='закупочная', label='Закупочная')
+        self.dest_pt = make_price_type(name='розничная', label='Розничная')
+        self.product = make_product()
+        ProductPrice.objects.create(
+            product=self.product, supplier=self.supplier, price_type=self.src_pt, value=100,
+        )
+        self.rule = PricingRule.objects.create(
+            supplier=self.supplier,
+            source_price_type=self.src_pt,
+            dest_price_type=self.dest_pt,
+            mode='fixed',
+            params={'value': 50},
+        )
+
+    def test_preview_pending_changes_does_not_save(self):
+        resp = self.client.post(
+            reverse('pricing_api:pricing-rule-preview', args=[self.rule.pk]),
+            {'params': {'value': 70}},
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 200, resp.content[:300])
+        self.assertEqual(resp.json()['created'], 1)
+        self.assertEqual(float(resp.json()['top'][0]['new']), 70)
+        self.rule.refresh_from_db()
+        self.assertEqual(self.rule.params, {'value': 50})
+        self.assertFalse(ProductPrice.objects.filter(price_type=self.dest_pt).exists())
+
+    def test_preview_active_rules_of_supplier(self):
+        resp = self.client.post(
+            reverse('pricing_api:pricing-rule-preview-list') + f'?supplier={self.supplier.pk}&top=0',
+        )
+        self.assertEqual(resp.status_code, 200, resp.content[:300])
+        self.assertEqual(resp.json()['rules'], [self.rule.pk])
+        self.assertEqual(resp.json()['rows'], 1)
+        self.assertEqual(resp.json()['top'], [])
+
+    def test_preview_new_rule_validates_payload(self):
+        url = reverse('pricing_api:pricing-rule-preview-list')
+        resp = self.client.post(url, {'mode': 'fixed'}, content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post(url)
+        self.assertEqual(resp.status_code, 400)
+
 
 class ProductPriceReadOnlyTests(PricingApiTestBase):
     def setUp(self):
@@ -220,3 +288,19 @@ class StockReadOnlyTests(PricingApiTestBase):
             content_type='application/json',
         )
         self.assertEqual(resp.status_code, 405)
+
+
+class StockCursorPaginationTests(PricingApiTestBase):
+    def test_cursor_walk_by_id(self):
+        supplier = make_supplier()
+        ids = [
+            Stock.objects.create(product=make_product(sku=f'STK-{i}'), supplier=supplier, quantity=i).pk
+            for i in range(3)
+        ]
+        url = reverse('pricing_api:stock-list') + '?cursor=&page_size=2'
+        first = self.client.get(url).json()
+        self.assertEqual([row['id'] for row in first['results']], ids[:2])
+        self.assertNotIn('count', first)
+        second = self.client.get(first['next']).json()
+        self.assertEqual([row['id'] for row in second['results']], ids[2:])
+        self.assertIsNone(second['next'])
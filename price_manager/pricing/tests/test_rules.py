@@ -0,0 +1,148 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from pricing.models import PricingRule, ProductPrice
+from pricing.services.rules import active_rules, apply_rule, apply_rules, preview_rules
+from product.models import Category
+from .fixtures import make_price_type, make_product, make_supplier
+
+
+class RuleTestBase(TestCase):
+    def setUp(self):
+        self.supplier = make_supplier()
+        self.src_pt = make_price_type(name='закупочная', label='Закупочная')
+        self.dest_pt = make_price_type(name='розничная', label='Розничная')
+        self.products = [make_product(sku=f'R-{i}') for i in range(3)]
+        for product, value in zip(self.products, ['10.0001', '100', '1000']):
+            ProductPrice.objects.create(
+                product=product, supplier=self.supplier, price_type=self.src_pt, value=Decimal(value),
+            )
+
+    def _rule(self, **kwargs):
+        defaults = dict(
+            supplier=self.supplier,
+            source_price_type=self.src_pt,
+            dest_price_type=self.dest_pt,
+            mode='formula',
+            params={'markup': '12.5', 'increase': '0.1'},
+        )
+        defaults.update(kwargs)
+        return PricingRule.objects.create(**defaults)
+
+    def _dest(self, product):
+        return ProductPrice.objects.get(product=product, price_type=self.dest_pt)
+
+
+class ApplyRuleSqlTests(RuleTestBase):
+    def test_formula_is_decimal_exact_in_one_statement(self):
+        rule = self._rule()
+        with CaptureQueriesContext(connection) as ctx:
+            written = apply_rule(rule)
+
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(written, 3)
+        # 10.0001 * 1.125 + 0.1 = 11.3501125 → numeric(14, 4)
+        self.assertEqual(self._dest(self.products[0]).value, Decimal('11.3501'))
+        self.assertEqual(self._dest(self.products[2]).value, Decimal('1125.1'))
+        self.assertEqual(self._dest(self.products[1]).rule, rule)
+
+    def test_price_range_is_inclusive(self):
+        apply_rule(self._rule(price_from=Decimal('100'), price_to=Decimal('1000'), mode='fixed', params={'value': 5}))
+
+        self.assertFalse(ProductPrice.objects.filter(product=self.products[0], price_type=self.dest_pt).exists())
+        self.assertEqual(self._dest(self.products[1]).value, 5)
+        self.assertEqual(self._dest(self.products[2]).value, 5)
+
+    def test_category_includes_descendants(self):
+        root = Category.objects.create(name='Инструмент')
+        child = Category.objects.create(name='Дрели', parent=root)
+        other = Category.objects.create(name='Сад')
+        for product, category in zip(self.products, [root, child, other]):
+            product.category = category
+            product.save(update_fields=['category'])
+        root.refresh_from_db()
+
+        apply_rule(self._rule(category=root, mode='fixed', params={'value': 1}))
+
+        self.assertEqual(
+            set(ProductPrice.objects.filter(price_type=self.dest_pt).values_list('product_id', flat=True)),
+            {self.products[0].pk, self.products[1].pk},
+        )
+
+    def test_later_rules_override_and_chain(self):
+        wholesale = make_price_type(name='опт', label='Опт')
+        self._rule(priority=0, mode='fixed', params={'value': 1})
+        self._rule(priority=1, params={'markup': 0, 'increase': 1})
+        self._rule(priority=2, source_price_type=self.dest_pt, dest_price_type=wholesale,
+                   params={'markup': 100, 'increase': 0})
+
+        apply_rules(active_rules(self.supplier))
+
+        self.assertEqual(self._dest(self.products[1]).value, Decimal('101'))
+        self.assertEqual(
+            ProductPrice.objects.get(product=self.products[1], price_type=wholesale).value, Decimal('202'),
+        )
+
+    def test_invalid_params_skip_rule(self):
+        self.assertEqual(apply_rule(self._rule(params={'markup': 'abc', 'increase': 0})), 0)
+        self.assertFalse(ProductPrice.objects.filter(price_type=self.dest_pt).exists())
+
+
+
+class PreviewRulesTests(RuleTestBase):
+    def test_preview_diffs_without_writing(self):
+        ProductPrice.objects.create(
+            product=self.products[1], supplier=self.supplier, price_type=self.dest_pt, value=Decimal('110'),
+        )
+        ProductPrice.objects.create(
+            product=self.products[2], supplier=self.supplier, price_type=self.dest_pt, value=Decimal('1125.1'),
+        )
+        rule = self._rule()
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = preview_rules([rule], self.supplier.pk, top=5)
+
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(ProductPrice.objects.filter(price_type=self.dest_pt).count(), 2)
+        self.assertEqual(
+            (result['rows'], result['created'], result['changed'], result['unchanged']), (3, 1, 1, 1),
+        )
+        self.assertEqual(result['delta']['min'], 0)
+        self.assertEqual(result['delta']['max'], Decimal('2.6'))
+        self.assertEqual([row['product'] for row in result['top']], [self.products[1].pk, self.products[0].pk])
+        self.assertEqual(result['top'][0]['new'], Decimal('112.6'))
+        self.assertIsNone(result['top'][1]['current'])
+
+    def test_last_rule_wins_and_unsaved_rules_preview(self):
+        first = self._rule(mode='fixed', params={'value': 1})
+        draft = PricingRule(
+            supplier=self.supplier, source_price_type=self.src_pt, dest_price_type=self.dest_pt,
+            mode='fixed', params={'value': 2}, price_from=Decimal('1000'),
+        )
+
+        result = preview_rules([first, draft], self.supplier.pk)
+
+        self.assertEqual(result['rules'], [first.pk, None])
+        by_product = {row['product']: row for row in result['top']}
+        self.assertEqual(by_product[self.products[0].pk]['new'], 1)
+        self.assertEqual(by_product[self.products[2].pk]['new'], 2)
+        self.assertIsNone(by_product[self.products[2].pk]['rule'])
+
+    def test_totals_without_top_rows(self):
+        rule = self._rule(mode='fixed', params={'value': 7})
+        for product in self.products:
+            ProductPrice.objects.create(
+                product=product, supplier=self.supplier, price_type=self.dest_pt, value=7, rule=rule,
+            )
+
+        result = preview_rules([rule], self.supplier.pk)
+        self.assertEqual((result['rows'], result['unchanged'], result['top']), (3, 3, []))
+        self.assertEqual(preview_rules([rule], self.supplier.pk, top=0)['rows'], 3)
+
+    def test_no_valid_rules(self):
+        result = preview_rules([self._rule(params={'markup': 'x'})], self.supplier.pk)
+        self.assertEqual(result['rows'], 0)
+        self.assertEqual(result['rules'], [])
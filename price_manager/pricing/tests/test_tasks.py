@@ -191,3 +191,169 @@ class ApplyFeedPricingRulesTest(TestCase):
             apply_feed_pricing(self.feed.pk)
 
         self.assertFalse(ProductPrice.objects.filter(price_type=self.dest_pt).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CELERY_TASK_ALWAYS_EAGER=True)
+class ApplyFeedPricingBulkTest(TestCase):
+    def setUp(self):
+        from supplier_feed.models import FeedColumnMapping
+
+        self.supplier = make_supplier()
+        self.src_pt = make_price_type(name='закупочная', label='Закупочная')
+        self.dest_pt = make_price_type(name='розничная', label='Розничная')
+        self.feed, self.feed_mapping = _make_feed(self.supplier)
+        FeedColumnMapping.objects.create(
+            feed_mapping=self.feed_mapping, column_name='price', role='price', price_type=self.src_pt,
+        )
+        FeedColumnMapping.objects.create(feed_mapping=self.feed_mapping, column_name='qty', role='stock')
+        PricingRule.objects.create(
+            supplier=self.supplier,
+            source_price_type=self.src_pt,
+            dest_price_type=self.dest_pt,
+            mode='formula',
+            params={'markup': 10, 'increase': 0},
+        )
+
+    def _feed_with(self, n):
+        from supplier_feed.models import SupplierFeed
+
+        feed = SupplierFeed.objects.create(supplier=self.supplier, feed_mapping=self.feed_mapping, status='done')
+        for i in range(n):
+            product = make_product(sku=f'BULK-{n}-{i}')
+            _make_entry(feed, product, {'price': str(100 + i), 'qty': str(i)})
+        return feed
+
+    def test_query_count_does_not_grow_with_entries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        small, large = self._feed_with(1), self._feed_with(6)
+        with CaptureQueriesContext(connection) as one:
+            apply_feed_pricing(small.pk)
+        with CaptureQueriesContext(connection) as six:
+            apply_feed_pricing(large.pk)
+        self.assertEqual(len(one), len(six))
+
+    def test_stock_zero_out_does_not_inline_product_ids(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        absent = make_product(sku='GONE')
+        Stock.objects.create(product=absent, supplier=self.supplier, quantity=7)
+        feed = self._feed_with(50)
+        with CaptureQueriesContext(connection) as ctx:
+            result = apply_feed_pricing(feed.pk)
+
+        zero_out = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "pricing_stock"')]
+        self.assertEqual(len(zero_out), 1)
+        self.assertIn('NOT EXISTS', zero_out[0])
+        self.assertLess(len(zero_out[0]), 1000)
+        self.assertEqual(result['stocks_zeroed'], 1)
+        self.assertEqual(Stock.objects.get(product=absent).quantity, 0)
+        self.assertEqual(Stock.objects.filter(supplier=self.supplier, quantity__gt=0).count(), 49)
+
+    def test_returns_counts_and_writes_rule_prices(self):
+        feed = self._feed_with(3)
+        result = apply_feed_pricing(feed.pk)
+
+        self.assertEqual(result['entries'], 3)
+        self.assertEqual(result['prices'], 3)
+        self.assertEqual(result['stocks'], 3)
+        self.assertEqual(result['rule_prices'], 3)
+        self.assertEqual(set(result['timings']), {'read', 'diff', 'write', 'rules'})
+        retail = ProductPrice.objects.get(product__sku='BULK-3-2', price_type=self.dest_pt)
+        self.assertAlmostEqual(float(retail.value), 112.2)
+
+    def test_repeated_product_last_entry_wins(self):
+        product = make_product(sku='DUP')
+        _make_entry(self.feed, product, {'price': '10', 'qty': '1'})
+        _make_entry(self.feed, product, {'price': '20', 'qty': '2'})
+
+        apply_feed_pricing(self.feed.pk)
+
+        self.assertEqual(ProductPrice.objects.get(product=product, price_type=self.src_pt).value, 20)
+        self.assertEqual(Stock.objects.get(product=product).quantity, 2)
+
+    def test_unchanged_reupload_writes_nothing(self):
+        feed = self._feed_with(3)
+        apply_feed_pricing(feed.pk)
+
+        result = apply_feed_pricing(feed.pk)
+
+        self.assertEqual(result['prices'], 0)
+        self.assertEqual(result['prices_unchanged'], 3)
+        self.assertEqual(result['rule_prices'], 0)
+
+    def test_changed_price_recomputes_only_that_product(self):
+        from supplier_feed.models import SupplierFeedEntry
+
+        feed = self._feed_with(3)
+        apply_feed_pricing(feed.pk)
+        entry = SupplierFeedEntry.objects.get(feed=feed, product__sku='BULK-3-1')
+        entry.data = {'price': '200', 'qty': '1'}
+        entry.save(update_fields=['data'])
+
+        result = apply_feed_pricing(feed.pk)
+
+        self.assertEqual(result['prices'], 1)
+        self.assertEqual(result['rule_prices'], 1)
+        retail = ProductPrice.objects.get(product__sku='BULK-3-1', price_type=self.dest_pt)
+        self.assertEqual(retail.value, 220)
+
+    def test_full_recompute_reapplies_rules_to_all_products(self):
+        feed = self._feed_with(3)
+        apply_feed_pricing(feed.pk)
+        PricingRule.objects.update(params={'markup': 0, 'increase': 1})
+
+        self.assertEqual(apply_feed_pricing(feed.pk)['rule_prices'], 0)
+        result = apply_feed_pricing(feed.pk, full_recompute=True)
+
+        self.assertEqual(result['prices'], 3)
+        self.assertEqual(result['rule_prices'], 3)
+        retail = ProductPrice.objects.get(product__sku='BULK-3-0', price_type=self.dest_pt)
+        self.assertEqual(retail.value, 101)
+
+    def test_rule_activated_between_runs_reaches_unchanged_products(self):
+        from django.utils import timezone
+
+        feed = self._feed_with(3)
+        apply_feed_pricing(feed.pk)
+        sale_pt = make_price_type(name='sale', label='Sale')
+        PricingRule.objects.create(
+            supplier=self.supplier,
+            source_price_type=self.src_pt,
+            dest_price_type=sale_pt,
+            mode='formula',
+            params={'markup': 0, 'increase': 5},
+            date_from=timezone.now(),
+        )
+
+        result = apply_feed_pricing(feed.pk)
+
+        self.assertEqual(result['prices'], 0)
+        self.assertTrue(result['rule_window_moved'])
+        self.assertEqual(ProductPrice.objects.filter(price_type=sale_pt).count(), 3)
+        self.assertFalse(apply_feed_pricing(feed.pk)['rule_window_moved'])
+
+    def test_chained_rule_reads_previous_rule_output(self):
+        from supplier_feed.models import SupplierFeedEntry
+
+        wholesale_pt = make_price_type(name='wholesale', label='Wholesale')
+        PricingRule.objects.create(
+            supplier=self.supplier,
+            source_price_type=self.dest_pt,
+            dest_price_type=wholesale_pt,
+            mode='formula',
+            params={'markup': 100, 'increase': 0},
+            priority=1,
+        )
+        feed = self._feed_with(1)
+        apply_feed_pricing(feed.pk)
+        product = feed.entries.get().product
+        self.assertEqual(ProductPrice.objects.get(product=product, price_type=wholesale_pt).value, 220)
+
+        SupplierFeedEntry.objects.filter(feed=feed).update(data={'price': '200', 'qty': '1'})
+        apply_feed_pricing(feed.pk)
+
+        self.assertEqual(ProductPrice.objects.get(product=product, price_type=self.dest_pt).value, 220)
+        self.assertEqual(ProductPrice.objects.get(product=product, price_type=wholesale_pt).value, 440)
@@ -1,13 +1,17 @@
-from rest_framework.pagination import PageNumberPagination
+from core.pagination import CursorOptInMixin, EstimatedCountPagination
 
 
-class ProductPagination(PageNumberPagination):
+class ProductPagination(CursorOptInMixin, EstimatedCountPagination):
+    """``?cursor=`` walks the catalog by ``(updated_at, id)`` without counts —
+    for sync / export clients; rows edited mid-walk show up again later."""
+
+    cursor_ordering = ('updated_at', 'id')
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 500
 
 
-class CharacteristicTypePagination(PageNumberPagination):
+class CharacteristicTypePagination(EstimatedCountPagination):
     """Bound /characteristic-types/ — after EAV-style import the table can hold
     thousands of types; sending the whole list freezes the SPA. Default page
     bumped to 200 so existing UI that listed everything still gets a usable
@@ -18,7 +22,7 @@ class CharacteristicTypePagination(PageNumberPagination):
     max_page_size = 2000
 
 
-class ReferenceTablePagination(PageNumberPagination):
+class ReferenceTablePagination(EstimatedCountPagination):
     """For Category/Brand reference tables. After EAV imports these can also
     grow into the thousands because the importer auto-creates Category/Brand
     by name. Default 500 covers typical catalogs; opt out with ?page_size."""
@@ -10,6 +10,7 @@ from ..models import (
     ImportJob,
     Product,
 )
+from ..services.bulk import PRODUCT_BULK_MAX_ITEMS
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -98,6 +99,27 @@ class ProductSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ProductBulkItemSerializer(serializers.Serializer):
+    """One item of ``POST /products/bulk/``. Shape only — references and
+    characteristics are checked by ``services.bulk`` against maps fetched once
+    for the whole request."""
+
+    sku = serializers.CharField(max_length=128)
+    name = serializers.CharField(max_length=512, required=False)
+    category = serializers.IntegerField(required=False, allow_null=True)
+    brand = serializers.IntegerField(required=False, allow_null=True)
+    description = serializers.CharField(required=False, allow_blank=True)
+    status = serializers.ChoiceField(choices=Product.STATUS_CHOICES, required=False)
+    characteristics = serializers.JSONField(required=False)
+    image_urls = serializers.JSONField(required=False)
+
+
+class ProductBulkSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=serializers.JSONField(), allow_empty=False, max_length=PRODUCT_BULK_MAX_ITEMS,
+    )
+
+
 class _MappingFieldSerializer(serializers.Serializer):
     column = serializers.CharField(required=False, allow_blank=True)
     const = serializers.JSONField(required=False)
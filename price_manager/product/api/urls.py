@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     BrandViewSet,
+    CatalogStatsView,
     CategoryViewSet,
     CharacteristicTypeViewSet,
     CharMutationJobView,
@@ -21,6 +22,7 @@ router.register(r'characteristic-types', CharacteristicTypeViewSet, basename='ch
 router.register(r'products', ProductViewSet, basename='product')
 
 urlpatterns = [
+    path('catalog/stats/', CatalogStatsView.as_view(), name='catalog-stats'),
     path('import/preview/', ImportPreviewView.as_view(), name='import-preview'),
     path('import/commit/', ImportCommitView.as_view(), name='import-commit'),
     path('import/jobs/<uuid:job_id>/', ImportJobView.as_view(), name='import-job'),
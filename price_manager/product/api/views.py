@@ -1,7 +1,6 @@
 from __future__ import annotations
 
-from collections import Counter
-
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -12,7 +11,12 @@ from rest_framework.views import APIView
 from dataframe import sessions as session_store
 
 from ..filters import ProductFilter
+from ..services.bulk import bulk_upsert_products
+from ..services.catalog_cache import FACETS_CACHE_TTL, cached_response
+from ..services.catalog_stats import get_catalog_stats, refresh_catalog_stats
 from ..services.embeddings import EmbeddingServiceError
+from ..services.export import EXPORT_FORMATS, stream_export
+from ..services.facets import facet_counts
 from ..models import (
     Brand,
     Category,
@@ -45,6 +49,8 @@ from .serializers import (
     CharMutationJobSerializer,
     ImportJobSerializer,
     ImportRequestSerializer,
+    ProductBulkItemSerializer,
+    ProductBulkSerializer,
     ProductSerializer,
 )
 
@@ -296,41 +302,82 @@ class ProductViewSet(viewsets.ModelViewSet):
         except (TypeError, ValueError):
             max_buckets = 30
 
-        qs = self.filter_queryset(self.get_queryset())
-        counts: dict[str, Counter] = {}
-        for chars in qs.values_list('characteristics', flat=True):
-            if not isinstance(chars, dict):
-                continue
-            for key, value in chars.items():
-                if isinstance(value, (list, dict)):
-                    continue
-                counts.setdefault(key, Counter())[value] += 1
+        # Identical filter states are frequent (category pages), so the payload
+        # is cached until the next catalog write bumps the generation.
+        return Response(cached_response(
+            'product:facets',
+            request.query_params,
+            lambda: self._facets_payload(max_keys, max_buckets),
+            timeout=FACETS_CACHE_TTL,
+        ))
 
+    def _facets_payload(self, max_keys: int, max_buckets: int) -> dict:
+        qs = self.filter_queryset(self.get_queryset())
+        counts = facet_counts(qs, max_keys=max_keys, max_buckets=max_buckets)
         if not counts:
-            return Response({})
-
-        # Keep only the most popular keys (by total occurrences across products).
-        top_keys = sorted(counts.items(), key=lambda kv: -sum(kv[1].values()))[:max_keys]
-        top_dict = dict(top_keys)
+            return {}
 
         types_by_name = {
             ct.name: ct
-            for ct in CharacteristicType.objects.filter(name__in=list(top_dict.keys()))
+            for ct in CharacteristicType.objects.filter(name__in=list(counts.keys()))
             .only('name', 'label', 'unit', 'value_type')
         }
         payload = {}
-        for key, counter in top_dict.items():
+        for key, buckets in counts.items():
             ct = types_by_name.get(key)
             payload[key] = {
                 'label': ct.label if ct else key,
                 'unit': ct.unit if ct else '',
                 'value_type': ct.value_type if ct else 'string',
-                'buckets': [
-                    {'value': v, 'count': c}
-                    for v, c in counter.most_common(max_buckets)
-                ],
+                'buckets': [{'value': v, 'count': c} for v, c in buckets],
             }
-        return Response(payload)
+        return payload
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create or update up to ``PRODUCT_BULK_MAX_ITEMS`` products by SKU.
+
+        Body: ``{"items": [{"sku": ..., <product fields>}, ...]}``. Existing
+        SKUs are updated with the fields given; new ones need ``name``.
+        Invalid items are reported in ``errors`` by their ``index`` and do not
+        block the rest.
+        """
+        envelope = ProductBulkSerializer(data=request.data)
+        envelope.is_valid(raise_exception=True)
+        valid: list[tuple[int, dict]] = []
+        errors: list[dict] = []
+        for index, raw in enumerate(envelope.validated_data['items']):
+            item = ProductBulkItemSerializer(data=raw)
+            if item.is_valid():
+                valid.append((index, dict(item.validated_data)))
+            else:
+                # Non-object items fail here too, with the serializer's own message.
+                sku = raw.get('sku') if isinstance(raw, dict) else None
+                errors.append({'index': index, 'sku': sku, 'errors': item.errors})
+        summary = bulk_upsert_products(valid)
+        summary['errors'] = sorted(errors + summary['errors'], key=lambda e: e['index'])
+        summary['failed'] = len(summary['errors'])
+        return Response(summary)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered catalog with prices and stock.
+
+        ``?export_format=ndjson`` (default) or ``arrow``; accepts the same
+        filter params as the list. Not paginated — the body is produced chunk
+        by chunk from a server-side cursor.
+        """
+        fmt = request.query_params.get('export_format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return Response(
+                {'detail': f'export_format должен быть одним из: {", ".join(EXPORT_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        content_type, extension = EXPORT_FORMATS[fmt]
+        qs = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(stream_export(qs, fmt), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="products.{extension}"'
+        return response
 
 
 def _session_exists(session_id: str) -> bool:
@@ -376,6 +423,19 @@ class ImportCommitView(APIView):
         return _create_import_job(request, ImportJob.KIND_COMMIT)
 
 
+class CatalogStatsView(APIView):
+    """Catalog-level facts (size, embedding coverage and model) for status pages.
+
+    Served from the cached record the embedding and import tasks refresh;
+    ``?refresh=1`` recomputes it first.
+    """
+
+    def get(self, request):
+        if request.query_params.get('refresh') in ('1', 'true'):
+            return Response(refresh_catalog_stats())
+        return Response(get_catalog_stats())
+
+
 class ImportJobView(APIView):
     def get(self, request, job_id):
         qs = ImportJob.objects.all()
@@ -7,4 +7,4 @@ class ProductConfig(AppConfig):
     verbose_name = 'Товары'
 
     def ready(self):
-        from . import signals  # noqa: F401
+        from . import lookups, signals  # noqa: F401
@@ -1,10 +1,23 @@
 from __future__ import annotations
 
 import django_filters
-from django.db.models import Case, Q, When
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import (
+    BooleanField,
+    Case,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Q,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import Greatest, RowNumber
 from pgvector.django import CosineDistance
 
-from .models import Brand, Category, Product
+from .models import Brand, Category, Product, ProductFacet
+from .services.catalog_stats import catalog_has_embeddings
 from .services.embeddings import embed_query
 
 HYBRID_LEXICAL_LIMIT = 100
@@ -13,7 +26,10 @@ RRF_K = 60
 
 
 def _rrf_merge(lexical_ids: list[int], vector_ids: list[int]) -> list[int]:
-    """Reciprocal Rank Fusion. Higher = better. Returns ids ordered by fused score."""
+    """Reciprocal Rank Fusion. Higher = better. Returns ids ordered by fused score.
+
+    Reference implementation of the fusion ``ProductFilter`` runs in SQL.
+    """
     scores: dict[int, float] = {}
     for rank, pk in enumerate(lexical_ids):
         scores[pk] = scores.get(pk, 0.0) + 1.0 / (RRF_K + rank + 1)
@@ -26,8 +42,9 @@ class ProductFilter(django_filters.FilterSet):
     """Filter Products by category (incl. MPTT descendants), brand, status, free-text q,
     and arbitrary characteristics via ?char__<type_name>=<value>.
 
-    Free-text ``q`` is hybrid: lexical icontains over name/sku merged with
-    cosine-similarity over the ``embedding`` column via Reciprocal Rank Fusion.
+    Free-text ``q`` is hybrid: lexical ILIKE over name/sku (ranked by
+    pg_trgm similarity) merged with cosine-similarity over the ``embedding``
+    column via Reciprocal Rank Fusion.
     Override via ``?search_mode=lexical|vector|hybrid`` (default: hybrid).
     """
 
@@ -49,18 +66,67 @@ class ProductFilter(django_filters.FilterSet):
         raw = (self.request.GET.get('search_mode') or 'hybrid').lower()
         return raw if raw in {'lexical', 'vector', 'hybrid'} else 'hybrid'
 
+    def _lexical_q(self, value) -> Q:
+        return Q(name__trgm_icontains=value) | Q(sku__trgm_icontains=value)
+
+    def _lexical_score(self, value):
+        return Greatest(TrigramSimilarity('name', value), TrigramSimilarity('sku', value))
+
     def _lexical_qs(self, qs, value):
-        return qs.filter(Q(name__icontains=value) | Q(sku__icontains=value))
+        """Substring matches on name / sku (served by the trigram GIN indexes),
+        most similar first."""
+        return (
+            qs.filter(self._lexical_q(value))
+            .annotate(_lexical_score=self._lexical_score(value))
+            .order_by('-_lexical_score', 'pk')
+        )
 
-    def _vector_ids(self, qs, value):
+    def _query_distance(self, value):
         # `embed_query` raises EmbeddingServiceError on embedder failure; let it
-        # bubble up — DRF will translate to a 500 with a useful message.
-        vector = embed_query(value)
-        return list(
-            qs.filter(embedding__isnull=False)
-            .annotate(_dist=CosineDistance('embedding', vector))
-            .order_by('_dist')
-            .values_list('pk', flat=True)[:HYBRID_VECTOR_LIMIT]
+        # bubble up — the viewset translates it to a 503.
+        return CosineDistance('embedding', embed_query(value))
+
+    def _vector_qs(self, qs, distance):
+        return qs.filter(embedding__isnull=False).order_by(distance, 'pk')
+
+    def _hybrid_qs(self, qs, value, distance):
+        """Lexical + vector candidates fused by RRF in one statement.
+
+        Candidates are the ``HYBRID_LEXICAL_LIMIT`` lexical matches with the
+        highest trigram similarity and the ``HYBRID_VECTOR_LIMIT`` nearest
+        vectors.
+        Each leg's rank is recomputed over the candidate set with
+        ``row_number()`` — a leg's own candidates are exactly its first N rows
+        there — and the fused score orders the page. Same result as
+        :func:`_rrf_merge` over the two id lists.
+        """
+        lexical_ids = self._lexical_qs(qs, value).values('pk')[:HYBRID_LEXICAL_LIMIT]
+        vector_ids = self._vector_qs(qs, distance).values('pk')[:HYBRID_VECTOR_LIMIT]
+
+        is_lexical = ExpressionWrapper(self._lexical_q(value), output_field=BooleanField())
+        has_vector = ExpressionWrapper(Q(embedding__isnull=False), output_field=BooleanField())
+        lexical_rank = Window(
+            RowNumber(),
+            partition_by=[is_lexical],
+            order_by=[self._lexical_score(value).desc(), F('pk').asc()],
+        )
+        vector_rank = Window(RowNumber(), partition_by=[has_vector], order_by=[distance.asc(), F('pk').asc()])
+
+        def leg_score(in_leg, rank, limit):
+            return Case(
+                When(in_leg & Q(**{f'{rank}__lte': limit}), then=1.0 / (RRF_K + F(rank))),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+
+        return (
+            qs.filter(Q(pk__in=lexical_ids) | Q(pk__in=vector_ids))
+            .annotate(_lexical_rank=lexical_rank, _vector_rank=vector_rank)
+            .annotate(_rrf=(
+                leg_score(self._lexical_q(value), '_lexical_rank', HYBRID_LEXICAL_LIMIT)
+                + leg_score(Q(embedding__isnull=False), '_vector_rank', HYBRID_VECTOR_LIMIT)
+            ))
+            .order_by('-_rrf', 'pk')
         )
 
     def filter_q(self, qs, name, value):
@@ -76,36 +142,21 @@ class ProductFilter(django_filters.FilterSet):
         # always return 503 just because there's nothing to match against.
         # `vector` mode bypasses the precheck so an explicit caller still sees
         # the error rather than silently degrading.
-        if mode == 'hybrid' and not Product.objects.filter(embedding__isnull=False).exists():
+        # The probe reads the cached catalog stats, not the table.
+        if mode == 'hybrid' and not catalog_has_embeddings():
             return self._lexical_qs(qs, value)
 
+        distance = self._query_distance(value)
         if mode == 'vector':
-            vector_ids = self._vector_ids(qs, value)
-            if not vector_ids:
+            vector_qs = self._vector_qs(qs, distance)
+            if not vector_qs.exists():
                 # No vectors indexed yet → fall through to lexical to avoid
                 # returning an empty page on a freshly migrated catalog.
                 return self._lexical_qs(qs, value)
-            return qs.filter(pk__in=vector_ids).order_by(
-                Case(*[When(pk=pk, then=idx) for idx, pk in enumerate(vector_ids)])
-            )
+            return qs.filter(pk__in=vector_qs.values('pk')[:HYBRID_VECTOR_LIMIT]).order_by(distance, 'pk')
 
         # hybrid (default)
-        lexical_ids = list(
-            self._lexical_qs(qs, value).values_list('pk', flat=True)[:HYBRID_LEXICAL_LIMIT]
-        )
-        vector_ids = self._vector_ids(qs, value)
-        if not lexical_ids and not vector_ids:
-            return qs.none()
-        if not vector_ids:
-            # Embedder is up but nothing has been indexed yet — pure lexical.
-            ranked = lexical_ids
-        elif not lexical_ids:
-            ranked = vector_ids
-        else:
-            ranked = _rrf_merge(lexical_ids, vector_ids)
-        return qs.filter(pk__in=ranked).order_by(
-            Case(*[When(pk=pk, then=idx) for idx, pk in enumerate(ranked)])
-        )
+        return self._hybrid_qs(qs, value, distance)
 
     def filter_category(self, qs, name, value):
         if value is None:
@@ -123,23 +174,23 @@ class ProductFilter(django_filters.FilterSet):
             char_name = key[len('char__'):]
             if not char_name:
                 continue
-            if len(val) == 1:
-                parent_qs = parent_qs.filter(
-                    characteristics__contains={char_name: _coerce_filter_value(val[0])}
-                )
-            else:
-                # Multi-value: union via OR over JSONB contains.
-                or_q = Q()
-                for v in val:
-                    or_q |= Q(characteristics__contains={char_name: _coerce_filter_value(v)})
-                parent_qs = parent_qs.filter(or_q)
+            # Scalar JSONB equality on the (key, value) facet index — same
+            # matches as ``characteristics @> {name: value}`` for scalars.
+            # Multi-value: union via OR.
+            value_q = Q()
+            for v in val:
+                value_q |= Q(value=_coerce_filter_value(v))
+            parent_qs = parent_qs.filter(
+                pk__in=ProductFacet.objects.filter(value_q, key=char_name).values('product_id')
+            )
         return parent_qs
 
 
 def _coerce_filter_value(value: str):
-    """Best-effort coercion of a query-string value so JSONB __contains matches numeric/bool values.
+    """Best-effort coercion of a query-string value for the ``ProductFacet.value`` lookup.
 
-    JSONB equality is type-sensitive: 5 != "5". We try int → float → bool → string.
+    Facet values are JSONB scalars and their equality is type-sensitive: 5 != "5".
+    We try int → float → bool → string.
     """
     if value is None:
         return None
@@ -15,7 +15,11 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils.text import slugify
 
+from core.category_paths import CategoryPathResolver, split_path
+
 from .models import Brand, Category, CharacteristicType, Product
+from .services.char_registry import get_char_type_registry, invalidate_char_type_registry
+from .services.facets import sync_product_facets
 from .signals import suppress_embedding_signal
 
 # Batch size for chunked commit. Each batch is its own transaction so a
@@ -23,6 +27,10 @@ from .signals import suppress_embedding_signal
 # RowResult list in worker memory at once. Override via env for tuning.
 IMPORT_COMMIT_BATCH_SIZE = int(os.environ.get('IMPORT_COMMIT_BATCH_SIZE', '500'))
 
+# Set-based commit (one upsert statement per batch) vs. the legacy
+# update_or_create-per-row path. Set IMPORT_COMMIT_BULK=0 to fall back.
+IMPORT_COMMIT_BULK = os.environ.get('IMPORT_COMMIT_BULK', '1').lower() in ('1', 'true', 'yes', 'on')
+
 SCALAR_FIELDS = ('sku', 'name', 'description', 'status')
 FK_FIELDS = ('category', 'brand')
 
@@ -41,112 +49,258 @@ class RowResult:
         return {'index': self.index, 'payload': self.payload, 'errors': self.errors}
 
 
-def _cell(row: pd.Series, column: str) -> Any:
-    if column not in row:
-        return None
-    value = row[column]
-    if value is None:
+def _column_values(df: pd.DataFrame, column: str) -> pd.Series | None:
+    """Column-wise cell normalisation: NA → None, strings stripped, '' → None.
+
+    Returns an object-dtype Series aligned with ``df`` (or None when the column
+    is absent). Pure-string columns — the common case, readers use
+    ``dtype=str`` — go through the vectorised ``.str`` accessor; mixed columns
+    strip only their string cells.
+    """
+    if column not in df.columns:
         return None
-    try:
-        if pd.isna(value):
-            return None
-    except (TypeError, ValueError):
-        pass
-    if isinstance(value, str):
-        value = value.strip()
-        if value == '':
-            return None
-    return value
+    series = df[column]
+    values = series.astype(object).where(series.notna(), None)
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == 'string':
+        values = values.str.strip()
+    elif kind in ('mixed', 'mixed-integer'):
+        values = values.map(lambda v: v.strip() if isinstance(v, str) else v)
+    else:
+        return values
+    return values.where(values.notna() & (values != ''), None)
 
 
-def _resolve_source(row: pd.Series, spec: dict) -> Any:
+def _source_values(df: pd.DataFrame, spec: dict) -> pd.Series | None:
+    """Resolve a mapping spec (``{'const': ...}`` or ``{'column': ...}``) for
+    every row at once. None means "no value in any row".
+    """
     if not isinstance(spec, dict):
         return None
     if 'const' in spec:
-        return spec['const']
+        if spec['const'] is None:
+            return None
+        return pd.Series([spec['const']] * len(df), index=df.index, dtype=object)
     column = spec.get('column')
     if column:
-        return _cell(row, column)
+        return _column_values(df, column)
     return None
 
 
+_INT_RE = r'[+-]?[0-9]{1,18}'
+_FLOAT_RE = r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?'
+_BOOL_TRUE = ('1', 'true', 'да', 'yes', 'y')
+_BOOL_FALSE = ('0', 'false', 'нет', 'no', 'n')
+
+
+def _fast_coerce(ct: CharacteristicType, values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Vectorised happy path of ``CharacteristicType.validate_value``.
+
+    Returns ``(mask, coerced)``: ``mask`` flags the cells that were coerced
+    here, ``coerced`` holds their values. Cells outside the mask (odd types,
+    invalid input, edge-case literals) fall back to ``validate_value`` so the
+    result and error text stay identical to the per-cell path.
+    """
+    vt = ct.value_type
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    is_str = kind == 'string'
+    none = pd.Series(False, index=values.index)
+
+    if vt == CharacteristicType.VALUE_STRING:
+        return ~none, values if is_str else values.map(str)
+
+    if vt == CharacteristicType.VALUE_CHOICE:
+        if not is_str:
+            return none, values
+        if not ct.options:
+            return ~none, values
+        return values.isin(ct.options), values
+
+    # Numeric columns (e.g. after a to_numeric transform) need no parsing.
+    if vt == CharacteristicType.VALUE_INTEGER and kind == 'integer':
+        return ~none, values
+    if vt == CharacteristicType.VALUE_FLOAT and kind in ('integer', 'floating'):
+        return ~none, values.astype('float64').astype(object)
+
+    if not is_str:
+        return none, values
+
+    if vt == CharacteristicType.VALUE_INTEGER:
+        mask = values.str.fullmatch(_INT_RE).astype(bool)
+        coerced = pd.Series(None, index=values.index, dtype=object)
+        if mask.any():
+            coerced[mask] = values[mask].astype('int64').astype(object)
+        return mask, coerced
+
+    if vt == CharacteristicType.VALUE_FLOAT:
+        mask = values.str.fullmatch(_FLOAT_RE).astype(bool)
+        coerced = pd.Series(None, index=values.index, dtype=object)
+        if mask.any():
+            coerced[mask] = values[mask].astype('float64').astype(object)
+        return mask, coerced
+
+    if vt == CharacteristicType.VALUE_BOOLEAN:
+        lowered = values.str.lower()
+        truthy = lowered.isin(_BOOL_TRUE)
+        falsy = lowered.isin(_BOOL_FALSE)
+        coerced = pd.Series(None, index=values.index, dtype=object)
+        coerced[truthy] = True
+        coerced[falsy] = False
+        return truthy | falsy, coerced
+
+    return none, values
+
+
+def _coerce_column(ct: CharacteristicType, raw: pd.Series) -> tuple[list, list]:
+    """Coerce one characteristic column. Returns ``(values, errors)`` lists
+    aligned with ``raw``; a cell has either a value, an error or neither.
+    """
+    values: list = [None] * len(raw)
+    errors: list = [None] * len(raw)
+    present = raw.notna().to_numpy()
+    if not present.any():
+        return values, errors
+
+    # Positional index so masks/assignments below never trip over a
+    # non-unique DataFrame index.
+    subset = raw[present].reset_index(drop=True)
+    positions = present.nonzero()[0]
+    mask, coerced = _fast_coerce(ct, subset)
+    # A '' can only come from a const spec; validate_value owns its meaning.
+    mask = mask.to_numpy() & (subset != '').to_numpy()
+
+    for pos, value in zip(positions[mask], coerced[mask].tolist()):
+        values[pos] = value
+
+    slow_positions = positions[~mask]
+    if len(slow_positions):
+        # Whatever the fast path declined is validated once per distinct raw
+        # value — supplier files repeat the same junk in thousands of rows.
+        outcomes: dict = {}
+        for pos, cell in zip(slow_positions, subset[~mask].tolist()):
+            try:
+                key = (type(cell), cell)
+                outcome = outcomes.get(key)
+            except TypeError:  # unhashable cell, e.g. a list from JSON input
+                key, outcome = None, None
+            if outcome is None:
+                try:
+                    outcome = (ct.validate_value(cell), None)
+                except ValidationError as exc:
+                    outcome = (None, exc.messages[0] if exc.messages else str(exc))
+                if key is not None:
+                    outcomes[key] = outcome
+            values[pos], errors[pos] = outcome
+    return values, errors
+
+
 def apply_mapping(df: pd.DataFrame, mapping: dict) -> list[RowResult]:
     """Translate each DataFrame row into a Product payload + per-row validation errors.
 
-    The result is purely in-memory; commit_rows() persists valid rows.
+    Every spec is resolved once per column (strip / NA-normalisation / type
+    coercion as pandas ops) and the per-row ``RowResult`` objects are only
+    assembled at the end. The result is purely in-memory; commit_rows()
+    persists valid rows.
     """
-    char_types_by_name = {
-        ct.name: ct
-        for ct in CharacteristicType.objects.filter(
-            name__in=list((mapping.get('characteristics') or {}).keys())
-        )
-    }
+    mapping = mapping or {}
+    chars_mapping = mapping.get('characteristics') or {}
+    char_types_by_name = get_char_type_registry().types_for(chars_mapping)
+    n = len(df)
+
+    scalar_columns: list[tuple[str, list]] = []
+    for field_name in SCALAR_FIELDS:
+        spec = mapping.get(field_name)
+        if not spec:
+            continue
+        values = _source_values(df, spec)
+        if values is None:
+            continue
+        scalar_columns.append((field_name, values.map(str, na_action='ignore').tolist()))
+
+    fk_columns: list[tuple[str, list, str | None]] = []
+    for field_name in FK_FIELDS:
+        spec = mapping.get(field_name)
+        if not spec:
+            continue
+        values = _source_values(df, spec)
+        if values is None:
+            continue
+        values = values.where(values != '', None).map(lambda v: str(v).strip(), na_action='ignore')
+        sep = spec.get('path_separator') if field_name == 'category' and isinstance(spec, dict) else None
+        fk_columns.append((field_name, values.tolist(), sep or None))
+
+    char_columns: list[tuple[str, list, list]] = []
+    for char_name, spec in chars_mapping.items():
+        raw = _source_values(df, spec)
+        if raw is None:
+            continue
+        ct = char_types_by_name.get(char_name)
+        if ct is None:
+            message = f"Тип характеристики '{char_name}' не найден."
+            char_columns.append((
+                char_name,
+                [None] * n,
+                [None if v is None else message for v in raw.tolist()],
+            ))
+            continue
+        values, errs = _coerce_column(ct, raw)
+        char_columns.append((char_name, values, errs))
+
+    # Dynamic (EAV) characteristics: name/value/[unit] sourced from columns,
+    # one entry per dynamic spec. Validated lazily in commit_rows because
+    # the target CharacteristicType may not exist yet (auto-created there).
+    dynamic_columns: list[tuple[list, list, list | None]] = []
+    for spec in mapping.get('dynamic_characteristics') or []:
+        if not isinstance(spec, dict):
+            continue
+        name_col = spec.get('name_column')
+        value_col = spec.get('value_column')
+        unit_col = spec.get('unit_column')
+        if not name_col or not value_col:
+            continue
+        names = _column_values(df, name_col)
+        raw_values = _column_values(df, value_col)
+        if names is None or raw_values is None:
+            continue
+        units = _column_values(df, unit_col) if unit_col else None
+        dynamic_columns.append((
+            names.map(lambda v: str(v).strip(), na_action='ignore').tolist(),
+            raw_values.tolist(),
+            units.map(lambda v: str(v).strip(), na_action='ignore').tolist() if units is not None else None,
+        ))
 
     results: list[RowResult] = []
-    for idx, row in df.iterrows():
+    for pos, idx in enumerate(df.index):
         payload: dict[str, Any] = {'characteristics': {}}
         errors: dict[str, str] = {}
 
-        for field_name in SCALAR_FIELDS:
-            spec = (mapping or {}).get(field_name)
-            if not spec:
-                continue
-            value = _resolve_source(row, spec)
+        for field_name, values in scalar_columns:
+            value = values[pos]
             if value is not None:
-                payload[field_name] = str(value) if field_name != 'description' else str(value)
+                payload[field_name] = value
 
-        for field_name in FK_FIELDS:
-            spec = (mapping or {}).get(field_name)
-            if not spec:
-                continue
-            value = _resolve_source(row, spec)
-            if value in (None, ''):
-                continue
-            payload[field_name] = str(value).strip()
-            if field_name == 'category' and isinstance(spec, dict):
-                sep = spec.get('path_separator')
-                if sep:
-                    payload['_category_separator'] = sep
-
-        chars_mapping = (mapping or {}).get('characteristics') or {}
-        for char_name, spec in chars_mapping.items():
-            raw = _resolve_source(row, spec)
-            if raw is None:
-                continue
-            ct = char_types_by_name.get(char_name)
-            if ct is None:
-                errors[f'characteristics.{char_name}'] = f"Тип характеристики '{char_name}' не найден."
-                continue
-            try:
-                coerced = ct.validate_value(raw)
-            except ValidationError as exc:
-                errors[f'characteristics.{char_name}'] = exc.messages[0] if exc.messages else str(exc)
+        for field_name, values, sep in fk_columns:
+            value = values[pos]
+            if value is None:
                 continue
-            if coerced is not None:
-                payload['characteristics'][char_name] = coerced
+            payload[field_name] = value
+            if sep:
+                payload['_category_separator'] = sep
+
+        for char_name, values, errs in char_columns:
+            if errs[pos] is not None:
+                errors[f'characteristics.{char_name}'] = errs[pos]
+            elif values[pos] is not None:
+                payload['characteristics'][char_name] = values[pos]
 
-        # Dynamic (EAV) characteristics: name/value/[unit] sourced from columns,
-        # one entry per dynamic spec. Validated lazily in commit_rows because
-        # the target CharacteristicType may not exist yet (auto-created there).
-        dynamic_specs = (mapping or {}).get('dynamic_characteristics') or []
         dynamic_entries: list[dict] = []
-        for spec in dynamic_specs:
-            if not isinstance(spec, dict):
-                continue
-            name_col = spec.get('name_column')
-            value_col = spec.get('value_column')
-            unit_col = spec.get('unit_column')
-            if not name_col or not value_col:
+        for names, raw_values, units in dynamic_columns:
+            name, value = names[pos], raw_values[pos]
+            if name is None or value is None:
                 continue
-            raw_name = _cell(row, name_col)
-            raw_value = _cell(row, value_col)
-            if raw_name in (None, '') or raw_value in (None, ''):
-                continue
-            entry: dict[str, Any] = {'name': str(raw_name).strip(), 'value': raw_value}
-            if unit_col:
-                u = _cell(row, unit_col)
-                if u not in (None, ''):
-                    entry['unit'] = str(u).strip()
+            entry: dict[str, Any] = {'name': name, 'value': value}
+            if units is not None and units[pos] is not None:
+                entry['unit'] = units[pos]
             dynamic_entries.append(entry)
         if dynamic_entries:
             payload['_dynamic_characteristics'] = dynamic_entries
@@ -209,87 +363,125 @@ def _resolve_dynamic_types(
             existing[slug] = ct
         elif first_unit and not ct.unit:
             CharacteristicType.objects.filter(pk=ct.pk).update(unit=unit_value)
+            invalidate_char_type_registry()
             ct.unit = unit_value
 
     return existing
 
 
-def _resolve_category_path(path: str, separator: str | None) -> Category | None:
-    """Walk (or create) the Category tree for a path string.
+def _plan_categories(
+    prepared: list[tuple[str, dict, str | None, str | None, str | None]],
+    categories: CategoryPathResolver,
+) -> dict[tuple[str, str | None], Category | None]:
+    """Resolve (or plan) the Category leaf of every distinct path in a batch,
+    then insert the missing nodes with a single :meth:`flush`.
 
-    With a separator: splits on it, strips each segment, drops empty ones,
-    then get_or_create from root down — returns the leaf node.
-    Without a separator: single get_or_create at root level (legacy behaviour).
-    Returns None when the effective segment list is empty.
+    With a separator a path is split on it, segments stripped and empty ones
+    dropped; without one it is a single root-level node (legacy behaviour).
+    Paths with no effective segments map to None.
     """
-    if separator:
-        segments = [s.strip() for s in path.split(separator) if s.strip()]
-    else:
-        segment = path.strip()
-        segments = [segment] if segment else []
-    if not segments:
-        return None
-    parent = None
-    cat = None
-    for segment in segments:
-        cat, _ = Category.objects.get_or_create(parent=parent, name=segment)
-        parent = cat
-    return cat
+    cats_by_path: dict[tuple[str, str | None], Category | None] = {}
+    for _, _, cat_name, cat_separator, _ in prepared:
+        key = (cat_name, cat_separator)
+        if cat_name and key not in cats_by_path:
+            segments = split_path(cat_name, cat_separator)
+            cats_by_path[key] = categories.plan(segments) if segments else None
+    categories.flush()
+    return cats_by_path
+
+
+def _prepare_row(
+    r: RowResult,
+    char_types_by_name: dict[str, CharacteristicType],
+) -> tuple[str, dict, str | None, str | None, str | None]:
+    """Split a valid row's payload into ``(sku, defaults, category path,
+    category separator, brand name)``. ``defaults`` holds the plain Product
+    fields; FKs are resolved by the caller.
+    """
+    payload = dict(r.payload)
+    cat_name = payload.pop('category', None)
+    cat_separator = payload.pop('_category_separator', None)
+    brand_name = payload.pop('brand', None)
+    sku = payload.pop('sku')
+    dynamic_entries = payload.pop('_dynamic_characteristics', []) or []
+
+    # Merge dynamic chars into the standard `characteristics` dict.
+    # Static mapping wins on slug collision (left there by apply_mapping).
+    if dynamic_entries:
+        chars = dict(payload.get('characteristics') or {})
+        for entry in dynamic_entries:
+            raw_name = entry.get('name') or ''
+            slug = slugify(raw_name, allow_unicode=True)[:64]
+            if not slug or slug in chars:
+                continue
+            if slug not in char_types_by_name:
+                # Skip — type creation happens in _resolve_dynamic_types
+                # before commit_rows; missing here means slug was empty.
+                continue
+            chars[slug] = str(entry.get('value'))
+        payload['characteristics'] = chars
+
+    defaults = {
+        k: v for k, v in payload.items()
+        if k in ('name', 'description', 'status', 'characteristics')
+    }
+    defaults.setdefault('status', Product.STATUS_DRAFT)
+    return sku, defaults, cat_name, cat_separator, brand_name
+
+
+def _category_links(
+    cat: Category,
+    chars: dict,
+    char_types_by_name: dict[str, CharacteristicType],
+    linked_pairs: set[tuple[int, int]],
+) -> list[tuple[CharacteristicType, Category]]:
+    """CharacteristicType <-> Category pairs a row introduces; marks them seen."""
+    links = []
+    for key, value in chars.items():
+        if value in (None, ''):
+            continue
+        ct = char_types_by_name.get(key)
+        if ct is None:
+            continue
+        pair = (ct.id, cat.id)
+        if pair in linked_pairs:
+            continue
+        links.append((ct, cat))
+        linked_pairs.add(pair)
+    return links
 
 
 def _commit_batch(
     batch: list[RowResult],
     char_types_by_name: dict[str, CharacteristicType],
     linked_pairs: set[tuple[int, int]],
+    categories: CategoryPathResolver,
 ) -> tuple[int, int, int, list[dict], list[int]]:
-    """Persist a single batch inside one transaction. Returns per-batch counters."""
+    """Persist a single batch inside one transaction, one upsert per row.
+    Returns per-batch counters.
+    """
     created = 0
     updated = 0
     skipped = 0
     errors: list[dict] = []
     affected_ids: list[int] = []
 
-    with transaction.atomic():
-        for r in batch:
-            if not r.is_valid:
-                skipped += 1
-                errors.append({'index': r.index, 'errors': r.errors})
-                continue
+    prepared = []
+    for r in batch:
+        if not r.is_valid:
+            skipped += 1
+            errors.append({'index': r.index, 'errors': r.errors})
+            continue
+        prepared.append(_prepare_row(r, char_types_by_name))
+    if not prepared:
+        return created, updated, skipped, errors, affected_ids
 
-            payload = dict(r.payload)
-            cat_name = payload.pop('category', None)
-            cat_separator = payload.pop('_category_separator', None)
-            brand_name = payload.pop('brand', None)
-            sku = payload.pop('sku')
-            dynamic_entries = payload.pop('_dynamic_characteristics', []) or []
-
-            # Merge dynamic chars into the standard `characteristics` dict.
-            # Static mapping wins on slug collision (left there by apply_mapping).
-            if dynamic_entries:
-                chars = dict(payload.get('characteristics') or {})
-                for entry in dynamic_entries:
-                    raw_name = entry.get('name') or ''
-                    slug = slugify(raw_name, allow_unicode=True)[:64]
-                    if not slug or slug in chars:
-                        continue
-                    if slug not in char_types_by_name:
-                        # Skip — type creation happens in _resolve_dynamic_types
-                        # before commit_rows; missing here means slug was empty.
-                        continue
-                    chars[slug] = str(entry.get('value'))
-                payload['characteristics'] = chars
-
-            defaults = {
-                k: v for k, v in payload.items()
-                if k in ('name', 'description', 'status', 'characteristics')
-            }
-            defaults.setdefault('status', Product.STATUS_DRAFT)
-
-            cat = None
-            if cat_name:
-                cat = _resolve_category_path(cat_name, cat_separator)
-                if cat is not None:
-                    defaults['category'] = cat
+    with transaction.atomic():
+        cats_by_path = _plan_categories(prepared, categories)
+        for sku, defaults, cat_name, cat_separator, brand_name in prepared:
+            cat = cats_by_path.get((cat_name, cat_separator)) if cat_name else None
+            if cat is not None:
+                defaults['category'] = cat
             if brand_name:
                 brand, _ = Brand.objects.get_or_create(name=brand_name)
                 defaults['brand'] = brand
@@ -302,18 +494,117 @@ def _commit_batch(
                 updated += 1
 
             if cat is not None:
-                chars = defaults.get('characteristics') or {}
-                for key, value in chars.items():
-                    if value in (None, ''):
-                        continue
-                    ct = char_types_by_name.get(key)
-                    if ct is None:
-                        continue
-                    pair = (ct.id, cat.id)
-                    if pair in linked_pairs:
-                        continue
-                    ct.categories.add(cat)
-                    linked_pairs.add(pair)
+                links = _category_links(
+                    cat, defaults.get('characteristics') or {}, char_types_by_name, linked_pairs,
+                )
+                for ct, link_cat in links:
+                    ct.categories.add(link_cat)
+        sync_product_facets(affected_ids)
+
+    return created, updated, skipped, errors, affected_ids
+
+
+def _resolve_brands(names: set[str]) -> dict[str, Brand]:
+    """name -> Brand for every name; one SELECT, get_or_create only for new ones."""
+    if not names:
+        return {}
+    brands = {b.name: b for b in Brand.objects.filter(name__in=names)}
+    for name in names - brands.keys():
+        brands[name], _ = Brand.objects.get_or_create(name=name)
+    return brands
+
+
+def _commit_batch_bulk(
+    batch: list[RowResult],
+    char_types_by_name: dict[str, CharacteristicType],
+    linked_pairs: set[tuple[int, int]],
+    categories: CategoryPathResolver,
+) -> tuple[int, int, int, list[dict], list[int]]:
+    """Set-based variant of :func:`_commit_batch`.
+
+    Distinct brands and category paths are resolved once for the whole batch
+    (missing categories are inserted together),
+    products are written with ``INSERT ... ON CONFLICT (sku) DO UPDATE`` and
+    the M2M auto-links with a single ``bulk_create``. Final state, counters
+    and ``affected_ids`` match the per-row path: a SKU repeated within the
+    batch is merged in file order (later rows win), its first occurrence
+    counts as created/updated and the repeats as updated.
+    """
+    created = 0
+    updated = 0
+    skipped = 0
+    errors: list[dict] = []
+    affected_ids: list[int] = []
+
+    prepared = []
+    for r in batch:
+        if not r.is_valid:
+            skipped += 1
+            errors.append({'index': r.index, 'errors': r.errors})
+            continue
+        prepared.append(_prepare_row(r, char_types_by_name))
+    if not prepared:
+        return created, updated, skipped, errors, affected_ids
+
+    with transaction.atomic():
+        cats_by_path = _plan_categories(prepared, categories)
+        brands = _resolve_brands({p[4] for p in prepared if p[4]})
+
+        merged: dict[str, dict] = {}
+        row_skus: list[str] = []
+        links: list[tuple[CharacteristicType, Category]] = []
+        for sku, defaults, cat_name, cat_separator, brand_name in prepared:
+            cat = cats_by_path.get((cat_name, cat_separator)) if cat_name else None
+            if cat is not None:
+                defaults['category'] = cat
+            if brand_name:
+                defaults['brand'] = brands[brand_name]
+            if sku in merged:
+                merged[sku].update(defaults)
+            else:
+                merged[sku] = defaults
+            row_skus.append(sku)
+            if cat is not None:
+                links.extend(_category_links(
+                    cat, defaults.get('characteristics') or {}, char_types_by_name, linked_pairs,
+                ))
+
+        existing = set(
+            Product.objects.filter(sku__in=list(merged)).values_list('sku', flat=True)
+        )
+
+        # Rows only overwrite the fields they carry, so the upsert is grouped
+        # by field set — typically one group per batch.
+        groups: dict[tuple[str, ...], list[Product]] = {}
+        for sku, defaults in merged.items():
+            groups.setdefault(tuple(sorted(defaults)), []).append(Product(sku=sku, **defaults))
+        pk_by_sku: dict[str, int] = {}
+        for fields, objs in groups.items():
+            Product.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=[*fields, 'updated_at'],
+            )
+            pk_by_sku.update((obj.sku, obj.pk) for obj in objs)
+
+        seen: set[str] = set()
+        for sku in row_skus:
+            affected_ids.append(pk_by_sku[sku])
+            if sku in existing or sku in seen:
+                updated += 1
+            else:
+                created += 1
+            seen.add(sku)
+
+        if links:
+            through = CharacteristicType.categories.through
+            through.objects.bulk_create(
+                [through(characteristictype_id=ct.id, category_id=cat.id) for ct, cat in links],
+                ignore_conflicts=True,
+            )
+            invalidate_char_type_registry()
+        sync_product_facets(affected_ids)
 
     return created, updated, skipped, errors, affected_ids
 
@@ -321,6 +612,7 @@ def _commit_batch(
 def commit_rows(
     results: list[RowResult],
     progress_callback: Callable[[int], None] | None = None,
+    bulk: bool | None = None,
 ) -> dict:
     """Persist valid rows. Category/Brand are get_or_create by name. SKU is upsert key.
 
@@ -329,6 +621,9 @@ def commit_rows(
     on large imports and lets the GC reclaim already-written ``RowResult``
     objects between batches.
 
+    ``bulk`` picks the set-based batch writer (:func:`_commit_batch_bulk`)
+    over the per-row one; ``None`` defers to ``IMPORT_COMMIT_BULK``.
+
     When a row has both a category and non-empty characteristic values, the
     CharacteristicType <-> Category M2M is auto-extended so the type appears
     under that category afterwards.
@@ -342,10 +637,7 @@ def commit_rows(
     for r in results:
         if r.is_valid:
             char_keys.update((r.payload.get('characteristics') or {}).keys())
-    char_types_by_name = {
-        ct.name: ct
-        for ct in CharacteristicType.objects.filter(name__in=char_keys)
-    } if char_keys else {}
+    char_types_by_name = get_char_type_registry().types_for(char_keys)
 
     # Auto-create CharacteristicType for every unique dynamic-char slug, then
     # merge those types into the lookup so the M2M auto-link path also sees them.
@@ -354,6 +646,11 @@ def commit_rows(
 
     linked_pairs: set[tuple[int, int]] = set()
     batch_size = max(1, IMPORT_COMMIT_BATCH_SIZE)
+    if bulk is None:
+        bulk = IMPORT_COMMIT_BULK
+    commit_batch = _commit_batch_bulk if bulk else _commit_batch
+    # One category trie for the whole job; nodes are created in bulk.
+    categories = CategoryPathResolver(Category)
     affected_ids: list[int] = []
 
     # Suppress per-row embedding signal: a chunked embed task is enqueued for
@@ -362,7 +659,7 @@ def commit_rows(
         processed = 0
         for start in range(0, len(results), batch_size):
             batch = results[start:start + batch_size]
-            c, u, s, errs, ids = _commit_batch(batch, char_types_by_name, linked_pairs)
+            c, u, s, errs, ids = commit_batch(batch, char_types_by_name, linked_pairs, categories)
             created += c
             updated += u
             skipped += s
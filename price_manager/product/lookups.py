@@ -0,0 +1,19 @@
+"""Custom field lookups used by the product filters."""
+from django.db import models
+from django.db.models.lookups import PatternLookup
+
+
+@models.CharField.register_lookup
+class TrigramIContains(PatternLookup):
+    """Case-insensitive substring match as ``<column> ILIKE '%value%'``.
+
+    Same matches as ``icontains``, but the left-hand side stays the bare
+    column: ``icontains`` compiles to ``UPPER(col::text) LIKE UPPER(...)``,
+    which a ``gin_trgm_ops`` index on the column cannot serve.
+    """
+
+    lookup_name = 'trgm_icontains'
+    param_pattern = '%%%s%%'
+
+    def get_rhs_op(self, connection, rhs):
+        return f'ILIKE {rhs}'
@@ -20,6 +20,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
 from product.models import Product
+from product.services.catalog_stats import refresh_catalog_stats
 from product.services.embeddings import EmbeddingServiceError
 from product.tasks import _embed_and_save
 
@@ -92,6 +93,8 @@ class Command(BaseCommand):
                 f'  [{processed}/{total}] обновлено: {updated}, {rate:.1f} prod/s'
             )
 
+        if updated:
+            refresh_catalog_stats()
         self.stdout.write(self.style.SUCCESS(
             f'Готово: обработано {processed}, обновлено {updated}.'
         ))
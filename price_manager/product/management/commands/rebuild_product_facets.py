@@ -0,0 +1,22 @@
+"""Rebuild the ``ProductFacet`` index from ``Product.characteristics``.
+
+The index is maintained incrementally on product writes; this is the
+recovery path after raw SQL edits or a restore.
+
+Example::
+
+    python manage.py rebuild_product_facets
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from product.services.facets import rebuild_product_facets
+
+
+class Command(BaseCommand):
+    help = 'Пересобрать индекс фасетов товаров из характеристик.'
+
+    def handle(self, *args, **opts):
+        written = rebuild_product_facets()
+        self.stdout.write(self.style.SUCCESS(f'Готово: записано фасетов {written}.'))
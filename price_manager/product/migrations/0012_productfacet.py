@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Backfill from the existing catalog; same row set as sync_product_facets().
+BACKFILL_SQL = """
+INSERT INTO product_productfacet (product_id, key, value)
+SELECT p.id, e.key, e.value
+FROM product_product p
+CROSS JOIN LATERAL jsonb_each(
+    CASE WHEN jsonb_typeof(p.characteristics) = 'object' THEN p.characteristics ELSE '{}'::jsonb END
+) e
+WHERE jsonb_typeof(e.value) NOT IN ('array', 'object')
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0011_nullable_supplierlink_product_and_feedmapping_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.TextField(verbose_name='Ключ')),
+                ('value', models.JSONField(verbose_name='Значение')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='product.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Фасет товара',
+                'verbose_name_plural': 'Фасеты товаров',
+                'indexes': [models.Index(fields=['key', 'value', 'product'], name='product_facet_kv_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'key'), name='product_facet_product_key_uniq')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:23
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0014_product_updated_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.functions.text.Upper(models.Func(models.F('sku'), models.Value('[^[:alnum:]]+'), models.Value(''), models.Value('g'), function='regexp_replace')), name='product_sku_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.functions.text.Lower(models.Func(models.Func(models.F('name'), function='btrim'), models.Value('\\s+'), models.Value(' '), models.Value('g'), function='regexp_replace')), name='product_name_key_idx'),
+        ),
+    ]
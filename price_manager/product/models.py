@@ -6,6 +6,8 @@ from django.conf import settings
 from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F, Func, Value
+from django.db.models.functions import Lower, Upper
 from django.utils.text import slugify
 from mptt.models import MPTTModel, TreeForeignKey
 from pgvector.django import HnswIndex, VectorField
@@ -203,6 +205,22 @@ class Product(models.Model):
         ordering = ['-updated_at']
         indexes = [
             GinIndex(fields=['characteristics'], name='product_chars_gin_idx'),
+            # Keyset walk of ``?cursor=`` (ProductPagination.cursor_ordering).
+            models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+            # pg_trgm: serves name/sku ``trgm_icontains`` (bare-column ILIKE).
+            GinIndex(fields=['name'], name='product_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['sku'], name='product_sku_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Normalized keys joined on by supplier_feed.matcher._unique_lookup;
+            # must stay identical to _SKU_KEY_SQL / _NAME_KEY_SQL there.
+            models.Index(
+                Upper(Func(F('sku'), Value('[^[:alnum:]]+'), Value(''), Value('g'), function='regexp_replace')),
+                name='product_sku_key_idx',
+            ),
+            models.Index(
+                Lower(Func(Func(F('name'), function='btrim'), Value(r'\s+'), Value(' '), Value('g'),
+                           function='regexp_replace')),
+                name='product_name_key_idx',
+            ),
             HnswIndex(
                 name='product_emb_hnsw',
                 fields=['embedding'],
@@ -216,14 +234,31 @@ class Product(models.Model):
         return f'{self.sku} — {self.name}'
 
     def clean(self):
+        self.clean_characteristics()
+
+    def clean_characteristics(
+        self,
+        types_by_name: dict[str, CharacteristicType] | None = None,
+        required_types: list[CharacteristicType] | None = None,
+    ):
+        """Validate and coerce ``characteristics`` in place.
+
+        Types come from the process-local characteristic-type registry unless
+        the caller passes ``types_by_name`` (covering every key used) and the
+        category's ``required_types``.
+        """
         chars = self.characteristics or {}
         if not isinstance(chars, dict):
             raise ValidationError({'characteristics': 'Должен быть JSON-объект.'})
 
-        types_by_name = {
-            ct.name: ct
-            for ct in CharacteristicType.objects.filter(name__in=list(chars.keys()))
-        }
+        if types_by_name is None or (required_types is None and self.category_id is not None):
+            from .services.char_registry import get_char_type_registry
+
+            registry = get_char_type_registry()
+            if types_by_name is None:
+                types_by_name = registry.types_for(chars)
+            if required_types is None:
+                required_types = registry.required_for(self.category_id)
         cleaned = {}
         errors = {}
         for key, raw in chars.items():
@@ -240,10 +275,6 @@ class Product(models.Model):
                 cleaned[key] = value
 
         if self.category_id is not None:
-            required_types = CharacteristicType.objects.filter(
-                required=True,
-                categories=self.category_id,
-            )
             for ct in required_types:
                 if cleaned.get(ct.name) in (None, ''):
                     errors[ct.name] = f"Характеристика '{ct.name}' обязательна для категории."
@@ -256,6 +287,39 @@ class Product(models.Model):
         self.characteristics = cleaned
 
 
+class ProductFacet(models.Model):
+    """One scalar ``(key, value)`` pair of ``Product.characteristics``.
+
+    Derived data, kept in sync by ``product.services.facets.sync_product_facets``
+    (product saves, import commits, retype/rename jobs). Lets facet counts and
+    ``?char__<name>=<value>`` filters use the ``(key, value)`` B-tree instead of
+    scanning the JSONB column. ``value`` stays JSONB so 5 and "5" differ, as
+    they do in ``characteristics``.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='facets',
+        verbose_name='Товар',
+    )
+    key = models.TextField('Ключ')
+    value = models.JSONField('Значение')
+
+    class Meta:
+        verbose_name = 'Фасет товара'
+        verbose_name_plural = 'Фасеты товаров'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'key'], name='product_facet_product_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['key', 'value', 'product'], name='product_facet_kv_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.key}={self.value!r}'
+
+
 JOB_STATUS_PENDING = 'pending'
 JOB_STATUS_RUNNING = 'running'
 JOB_STATUS_SUCCESS = 'success'
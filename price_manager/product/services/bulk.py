@@ -0,0 +1,170 @@
+"""Batch create/update of products by SKU for ``POST /products/bulk/``.
+
+Items arrive already shape-checked by ``ProductBulkItemSerializer``. Everything
+that needs the database is resolved once per call rather than per item:
+existing products by SKU and the referenced categories and brands, while
+characteristic types and required types come from the characteristic-type
+registry. Valid items are then written in batches of ``PRODUCT_BULK_BATCH_SIZE``
+with ``INSERT ... ON CONFLICT (sku) DO UPDATE`` (as the bulk import commit
+does), each batch in its own transaction. Items only overwrite the fields they
+carry.
+
+Failures are reported per item (``{'index', 'sku', 'errors'}``) and never
+abort the other items; a batch rejected by the database fails only its own
+items. Embeddings are rescheduled only for items that carry an embedded field.
+"""
+from __future__ import annotations
+
+import logging
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from ..models import Brand, Category, Product
+from ..signals import _EMBED_TRIGGER_FIELDS
+from .char_registry import get_char_type_registry
+from .facets import sync_product_facets
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_BULK_MAX_ITEMS = int(os.environ.get('PRODUCT_BULK_MAX_ITEMS', '5000'))
+PRODUCT_BULK_BATCH_SIZE = int(os.environ.get('PRODUCT_BULK_BATCH_SIZE', '500'))
+
+# Serializer field -> model attribute.
+_FK_ATTRS = {'category': 'category_id', 'brand': 'brand_id'}
+# Reported for every item of a batch the database rejected; details are logged.
+_BATCH_FAILED = 'Не удалось сохранить пакет товаров.'
+
+
+def _error(index: int, sku, errors: dict) -> dict:
+    return {'index': index, 'sku': sku, 'errors': errors}
+
+
+def _validate(items: list[tuple[int, dict]]) -> tuple[list[tuple[int, dict]], list[dict], set[str]]:
+    """Check references, required fields and characteristics against maps
+    fetched once. Returns ``(valid, errors, existing_skus)``; characteristics
+    of valid items are replaced by their coerced values."""
+    errors: list[dict] = []
+    unique: list[tuple[int, dict]] = []
+    seen: set[str] = set()
+    for index, data in items:
+        if data['sku'] in seen:
+            errors.append(_error(index, data['sku'], {'sku': ['SKU повторяется в запросе.']}))
+            continue
+        seen.add(data['sku'])
+        unique.append((index, data))
+
+    existing = {
+        p.sku: p
+        for p in Product.objects.filter(sku__in=seen).only('pk', 'sku', 'category_id', 'characteristics')
+    }
+
+    registry = get_char_type_registry()
+
+    known = {
+        'category': set(Category.objects.filter(
+            pk__in={d['category'] for _, d in unique if d.get('category') is not None},
+        ).values_list('pk', flat=True)),
+        'brand': set(Brand.objects.filter(
+            pk__in={d['brand'] for _, d in unique if d.get('brand') is not None},
+        ).values_list('pk', flat=True)),
+    }
+
+    valid: list[tuple[int, dict]] = []
+    for index, data in unique:
+        item_errors: dict = {}
+        for field, ids in known.items():
+            if data.get(field) is not None and data[field] not in ids:
+                item_errors[field] = [f'Объект с id={data[field]} не существует.']
+        if data['sku'] not in existing and 'name' not in data:
+            item_errors['name'] = ['Обязательное поле.']
+        if not item_errors and ('characteristics' in data or 'category' in data):
+            current = existing.get(data['sku'])
+            category_id = data['category'] if 'category' in data else getattr(current, 'category_id', None)
+            chars = data['characteristics'] if 'characteristics' in data else getattr(current, 'characteristics', {})
+            probe = Product(sku=data['sku'], category_id=category_id, characteristics=chars)
+            try:
+                probe.clean_characteristics(
+                    registry.types_by_name, registry.required_for(category_id),
+                )
+            except ValidationError as exc:
+                item_errors.update(exc.message_dict)
+            else:
+                if 'characteristics' in data:
+                    data['characteristics'] = probe.characteristics
+        if item_errors:
+            errors.append(_error(index, data['sku'], item_errors))
+        else:
+            valid.append((index, data))
+    return valid, errors, set(existing)
+
+
+def _write_batch(batch: list[tuple[int, dict]]) -> dict[str, int]:
+    """Upsert one batch; returns ``{sku: pk}``."""
+    groups: dict[tuple[str, ...], list[Product]] = {}
+    for _, data in batch:
+        fields = tuple(sorted(k for k in data if k != 'sku'))
+        attrs = {_FK_ATTRS.get(k, k): data[k] for k in fields}
+        groups.setdefault(fields, []).append(Product(sku=data['sku'], **attrs))
+    pk_by_sku: dict[str, int] = {}
+    with transaction.atomic():
+        for fields, objs in groups.items():
+            Product.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=[*fields, 'updated_at'],
+            )
+            pk_by_sku.update((obj.sku, obj.pk) for obj in objs)
+        sync_product_facets(list(pk_by_sku.values()))
+        # Same rule as the post_save handler: only embedded fields re-embed.
+        _schedule_embeddings([
+            pk_by_sku[data['sku']] for _, data in batch if _EMBED_TRIGGER_FIELDS & data.keys()
+        ])
+    return pk_by_sku
+
+
+def _schedule_embeddings(ids: list[int]) -> None:
+    from ..tasks import embed_products_task
+
+    chunk = max(1, settings.EMBED_BACKFILL_BATCH_SIZE)
+    for i in range(0, len(ids), chunk):
+        transaction.on_commit(lambda part=ids[i:i + chunk]: embed_products_task.delay(part))
+
+
+def bulk_upsert_products(
+    items: list[tuple[int, dict]], batch_size: int = PRODUCT_BULK_BATCH_SIZE,
+) -> dict:
+    """Create or update products by SKU.
+
+    ``items`` are ``(index, validated_data)`` pairs; ``index`` is the item's
+    position in the request and is echoed back in ``items`` / ``errors``.
+    """
+    valid, errors, existing = _validate(items)
+    results: list[dict] = []
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        try:
+            pk_by_sku = _write_batch(batch)
+        except DatabaseError:
+            logger.exception('bulk product batch failed')
+            errors.extend(_error(index, data['sku'], {'detail': [_BATCH_FAILED]}) for index, data in batch)
+            continue
+        results.extend(
+            {
+                'index': index,
+                'sku': data['sku'],
+                'id': pk_by_sku[data['sku']],
+                'created': data['sku'] not in existing,
+            }
+            for index, data in batch
+        )
+    return {
+        'created': sum(1 for r in results if r['created']),
+        'updated': sum(1 for r in results if not r['created']),
+        'failed': len(errors),
+        'items': results,
+        'errors': sorted(errors, key=lambda e: e['index']),
+    }
@@ -0,0 +1,103 @@
+"""Response cache for catalog read endpoints, invalidated by a generation counter.
+
+Keys are ``<namespace>:<generation>:<digest of the canonical query string>``.
+The generation is a single integer in the shared cache that every catalog
+write bumps (after commit), so invalidation is one ``INCR`` — stale entries
+are never looked up again and simply expire.
+
+The counter is seeded from ``time.time_ns()``: if Redis evicts it, the new
+value cannot collide with generations already baked into cached keys.
+
+Cache errors are logged and treated as misses — the endpoint just computes
+the response as if caching were off.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CATALOG_GENERATION_KEY = 'product:catalog:generation'
+FACETS_CACHE_TTL = int(os.environ.get('FACETS_CACHE_TTL', '300'))
+
+# Query params that never change the response.
+_IGNORED_PARAMS = {'format'}
+
+
+def read_generation(key: str) -> int | None:
+    """Current value of the generation counter ``key``, seeding it on first
+    read; None when the cache is unavailable."""
+    try:
+        generation = cache.get(key)
+        if generation is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            generation = cache.get(key)
+    except Exception:
+        logger.warning('generation read failed for %s', key, exc_info=True)
+        return None
+    return generation
+
+
+def bump_generation(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key missing (evicted or never read) — seeding is a bump by itself.
+        cache.add(key, time.time_ns(), timeout=None)
+    except Exception:
+        logger.warning('generation bump failed for %s', key, exc_info=True)
+
+
+def catalog_generation() -> int | None:
+    """Current catalog generation, or None when the cache is unavailable."""
+    return read_generation(CATALOG_GENERATION_KEY)
+
+
+def _bump() -> None:
+    bump_generation(CATALOG_GENERATION_KEY)
+
+
+def bump_catalog_generation() -> None:
+    """Invalidate every cached catalog response once the transaction commits."""
+    transaction.on_commit(_bump)
+
+
+def canonical_query(params) -> str:
+    """Stable string for a ``QueryDict``: keys and repeated values sorted,
+    empty values and presentation-only params dropped."""
+    items = sorted(
+        (key, sorted(v for v in values if v != ''))
+        for key, values in params.lists()
+        if key not in _IGNORED_PARAMS
+    )
+    return json.dumps([item for item in items if item[1]], ensure_ascii=False)
+
+
+def cached_response(namespace: str, params, build: Callable[[], Any], timeout: int) -> Any:
+    """Return ``build()`` for ``params``, served from cache when possible."""
+    generation = catalog_generation()
+    if generation is None:
+        return build()
+    digest = hashlib.sha1(canonical_query(params).encode('utf-8')).hexdigest()
+    key = f'{namespace}:{generation}:{digest}'
+    try:
+        hit = cache.get(key)
+    except Exception:
+        logger.warning('catalog cache read failed for %s', namespace, exc_info=True)
+        hit = None
+    if hit is not None:
+        return hit
+    value = build()
+    try:
+        cache.set(key, value, timeout=timeout)
+    except Exception:
+        logger.warning('catalog cache write failed for %s', namespace, exc_info=True)
+    return value
@@ -0,0 +1,101 @@
+"""Small cached record of catalog-level facts for hot paths and status pages.
+
+Hybrid search needs to know whether *any* product has an embedding before it
+calls the embedder; asking Postgres on every ``?q=`` request costs a query.
+The record lives in the shared cache with no expiry and is kept current by
+the tasks that change it: the counts are recomputed (one full-table
+aggregate) after an import commit, by the periodic backfill and the
+``embed_products`` command; per-product embed tasks only flip
+``has_embeddings`` on the cached record, so a burst of edits does not turn
+into a burst of table scans. When the record is missing (cold or evicted
+cache) the search probe falls back to an ``EXISTS`` query and never runs the
+aggregate inline.
+
+Shape::
+
+    {
+      "products": 1200, "embedded": 1180, "coverage": 0.9833,
+      "has_embeddings": true,
+      "embed_model": "nomic-embed-text", "embed_dim": 256,
+      "computed_at": "2026-01-01T00:00:00+00:00"
+    }
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from ..models import PRODUCT_EMBEDDING_DIM, Product
+
+logger = logging.getLogger(__name__)
+
+CATALOG_STATS_KEY = 'product:catalog:stats'
+
+
+def compute_catalog_stats() -> dict:
+    """Aggregate the stats in one query (no caching)."""
+    counts = Product.objects.aggregate(
+        products=Count('pk'),
+        embedded=Count('pk', filter=Q(embedding__isnull=False)),
+    )
+    products, embedded = counts['products'], counts['embedded']
+    return {
+        'products': products,
+        'embedded': embedded,
+        'coverage': round(embedded / products, 4) if products else 0.0,
+        'has_embeddings': embedded > 0,
+        'embed_model': settings.OLLAMA_EMBED_MODEL,
+        'embed_dim': PRODUCT_EMBEDDING_DIM,
+        'computed_at': timezone.now().isoformat(),
+    }
+
+
+def refresh_catalog_stats() -> dict:
+    """Recompute and store the record. Cache errors are logged, not raised."""
+    stats = compute_catalog_stats()
+    try:
+        cache.set(CATALOG_STATS_KEY, stats, timeout=None)
+    except Exception:
+        logger.warning('catalog stats cache write failed', exc_info=True)
+    return stats
+
+
+def _cached_stats() -> dict | None:
+    try:
+        return cache.get(CATALOG_STATS_KEY)
+    except Exception:
+        logger.warning('catalog stats cache read failed', exc_info=True)
+        return None
+
+
+def get_catalog_stats() -> dict:
+    """Cached record; recomputed on a miss or when the cache is unavailable."""
+    stats = _cached_stats()
+    if stats is None:
+        stats = refresh_catalog_stats()
+    return stats
+
+
+def mark_catalog_embedded() -> None:
+    """Record that some product now has an embedding, without recounting.
+
+    A missing record is left alone — the next refresh computes it in full.
+    """
+    try:
+        stats = cache.get(CATALOG_STATS_KEY)
+        if stats is not None and not stats.get('has_embeddings'):
+            cache.set(CATALOG_STATS_KEY, {**stats, 'has_embeddings': True}, timeout=None)
+    except Exception:
+        logger.warning('catalog stats cache update failed', exc_info=True)
+
+
+def catalog_has_embeddings() -> bool:
+    """Hot-path probe: the cached flag, or a single ``EXISTS`` on a miss."""
+    stats = _cached_stats()
+    if stats is None:
+        return Product.objects.filter(embedding__isnull=False).exists()
+    return stats['has_embeddings']
@@ -0,0 +1,132 @@
+"""Process-local registry of characteristic types for validation hot paths.
+
+``Product.clean`` used to query ``CharacteristicType`` for the product's keys
+and again for its category's required types on every write. The registry
+loads the whole table once per process (two queries) into:
+
+* ``types_by_name`` — name → ``CharacteristicType`` (value type, options,
+  required flag);
+* ``required_by_category`` — category id → its required types.
+
+Freshness is one cache read per lookup: the snapshot is tagged with the value
+of the ``CHAR_TYPES_GENERATION_KEY`` counter it was loaded under and is
+reloaded once that moves. Every ``CharacteristicType`` write (and category
+link change) calls :func:`invalidate_char_type_registry`, which drops this
+process's snapshot immediately and bumps the counter after commit for every
+other process. Writes that bypass model signals (``QuerySet.update``,
+``bulk_create`` on the M2M table) must call it explicitly.
+
+Inside a transaction that invalidated, the writing thread validates against a
+transaction-local snapshot that includes its own uncommitted changes; it is
+never published process-wide, so a rollback leaves no phantom types behind.
+The local snapshot is discarded once the transaction ends.
+``CHAR_TYPE_REGISTRY_TTL`` bounds how long a snapshot can outlive a missed
+invalidation.
+
+Without a cache the snapshot lives until ``CHAR_TYPE_REGISTRY_TTL`` expires or
+this process invalidates it; other processes' writes show up on expiry.
+
+Registry instances are shared across callers: treat them as read-only.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django.db import transaction
+
+from ..models import CharacteristicType
+from .catalog_cache import bump_generation, read_generation
+
+CHAR_TYPES_GENERATION_KEY = 'product:char_types:generation'
+CHAR_TYPE_REGISTRY_TTL = int(os.environ.get('CHAR_TYPE_REGISTRY_TTL', '300'))
+
+
+@dataclass(frozen=True)
+class CharTypeRegistry:
+    generation: int | None
+    epoch: int
+    loaded_at: float
+    types_by_name: dict[str, CharacteristicType] = field(default_factory=dict)
+    required_by_category: dict[int, tuple[CharacteristicType, ...]] = field(default_factory=dict)
+
+    def types_for(self, names: Iterable[str]) -> dict[str, CharacteristicType]:
+        """Known types among ``names``; unknown names are simply absent."""
+        return {name: self.types_by_name[name] for name in names if name in self.types_by_name}
+
+    def required_for(self, category_id: int | None) -> list[CharacteristicType]:
+        if category_id is None:
+            return []
+        return list(self.required_by_category.get(category_id, ()))
+
+
+_registry: CharTypeRegistry | None = None
+_epoch = 0
+# Per thread: snapshot seen by a transaction that invalidated the registry.
+_local = threading.local()
+
+
+def load_char_type_registry(generation: int | None = None, epoch: int = 0) -> CharTypeRegistry:
+    """Build a registry from the database (no caching)."""
+    types = {ct.pk: ct for ct in CharacteristicType.objects.all()}
+    required: dict[int, list[CharacteristicType]] = {}
+    links = CharacteristicType.categories.through.objects.filter(
+        characteristictype__required=True,
+    ).values_list('category_id', 'characteristictype_id')
+    for category_id, type_id in links:
+        required.setdefault(category_id, []).append(types[type_id])
+    return CharTypeRegistry(
+        generation=generation,
+        epoch=epoch,
+        loaded_at=time.monotonic(),
+        types_by_name={ct.name: ct for ct in types.values()},
+        required_by_category={k: tuple(v) for k, v in required.items()},
+    )
+
+
+def get_char_type_registry() -> CharTypeRegistry:
+    """This process's snapshot, reloaded when stale."""
+    global _registry
+    # Read the generation before loading: a bump racing the load then only
+    # costs one extra reload instead of tagging old rows with the new value.
+    generation = read_generation(CHAR_TYPES_GENERATION_KEY)
+    epoch = _epoch
+    if getattr(_local, 'pending', False):
+        if transaction.get_connection().in_atomic_block:
+            current = getattr(_local, 'registry', None)
+            if current is None or current.generation != generation or current.epoch != epoch:
+                current = _local.registry = load_char_type_registry(generation, epoch)
+            return current
+        # The invalidating transaction ended without committing.
+        _clear_local()
+    current = _registry
+    if (
+        current is None
+        or current.generation != generation
+        or current.epoch != epoch
+        or time.monotonic() - current.loaded_at > CHAR_TYPE_REGISTRY_TTL
+    ):
+        current = _registry = load_char_type_registry(generation, epoch)
+    return current
+
+
+def _clear_local() -> None:
+    _local.pending = False
+    _local.registry = None
+
+
+def _bump() -> None:
+    _clear_local()
+    bump_generation(CHAR_TYPES_GENERATION_KEY)
+
+
+def invalidate_char_type_registry() -> None:
+    """Drop this process's snapshot now and every other one after commit."""
+    global _epoch
+    _epoch += 1
+    if transaction.get_connection().in_atomic_block:
+        _local.pending = True
+    transaction.on_commit(_bump)
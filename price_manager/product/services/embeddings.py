@@ -12,15 +12,31 @@ via Matryoshka). Two semantic call sites:
 The HTTP layer raises :class:`EmbeddingServiceError` on any non-2xx / network
 failure; callers decide whether that translates to a 5xx (search) or a retry
 (background tasks).
+
+Requests go through one keep-alive ``httpx.Client`` per process, so batch
+callers (feed matching, backfill) reuse TCP connections instead of paying a
+handshake per call. ``httpx.Client`` is thread-safe; callers may post batches
+from a thread pool.
+
+Query-side vectors are cached: a per-process LRU in front of the Django cache
+(Redis in prod), keyed by model + prefix + :func:`text_hash`, with vectors
+stored as float32 bytes. Re-uploaded feeds and repeated ``?q=`` searches then
+skip the embedder. Document-side vectors are not cached — products already
+track their own ``embedding_text_hash``.
 """
 from __future__ import annotations
 
 import hashlib
 import logging
+import os
+import threading
+from array import array
+from collections import Counter, OrderedDict
 from typing import Iterable
 
 import httpx
 from django.conf import settings
+from django.core.cache import cache
 
 from ..models import PRODUCT_EMBEDDING_DIM, CharacteristicType, Product
 
@@ -92,6 +108,32 @@ def _truncate(vector: list[float]) -> list[float]:
     return vector[:PRODUCT_EMBEDDING_DIM]
 
 
+# Upper bound on pooled connections to the embedder (per worker process).
+EMBED_HTTP_MAX_CONNECTIONS = int(os.environ.get('EMBED_HTTP_MAX_CONNECTIONS', '8'))
+
+_client: httpx.Client | None = None
+_client_pid: int | None = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> httpx.Client:
+    """Process-wide pooled client, recreated after a fork (Celery prefork)."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = httpx.Client(
+                    timeout=settings.OLLAMA_EMBED_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=EMBED_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=EMBED_HTTP_MAX_CONNECTIONS,
+                    ),
+                )
+                _client_pid = pid
+    return _client
+
+
 def _post_embed(inputs: list[str]) -> list[list[float]]:
     payload = {
         'model': settings.OLLAMA_EMBED_MODEL,
@@ -99,10 +141,9 @@ def _post_embed(inputs: list[str]) -> list[list[float]]:
     }
     url = f"{settings.OLLAMA_EMBED_URL.rstrip('/')}/api/embed"
     try:
-        with httpx.Client(timeout=settings.OLLAMA_EMBED_TIMEOUT) as client:
-            response = client.post(url, json=payload)
-            response.raise_for_status()
-            data = response.json()
+        response = _get_client().post(url, json=payload)
+        response.raise_for_status()
+        data = response.json()
     except (httpx.HTTPError, ValueError) as exc:
         raise EmbeddingServiceError(f'embedder request failed: {exc}') from exc
 
@@ -122,7 +163,142 @@ def embed_texts(texts: Iterable[str]) -> list[list[float]]:
     return _post_embed(inputs)
 
 
+# ── Query embedding cache ─────────────────────────────────────────────────────
+
+EMBED_CACHE_TTL = int(os.environ.get('EMBED_CACHE_TTL', str(30 * 24 * 3600)))
+EMBED_CACHE_LOCAL_SIZE = int(os.environ.get('EMBED_CACHE_LOCAL_SIZE', '4096'))
+
+
+class _LocalLRU:
+    """Small thread-safe LRU of ``key -> vector`` in front of the shared cache."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> list[float] | None:
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is not None:
+                self._data.move_to_end(key)
+            return vec
+
+    def put(self, key: str, vec: list[float]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_local_cache = _LocalLRU(EMBED_CACHE_LOCAL_SIZE)
+_cache_stats: Counter[str] = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(**deltas: int) -> None:
+    with _stats_lock:
+        _cache_stats.update(deltas)
+
+
+def embedding_cache_stats() -> dict[str, int]:
+    """Process-local counters: ``local_hits``, ``shared_hits``, ``misses``."""
+    with _stats_lock:
+        return {
+            'local_hits': _cache_stats['local_hits'],
+            'shared_hits': _cache_stats['shared_hits'],
+            'misses': _cache_stats['misses'],
+        }
+
+
+def clear_embedding_cache() -> None:
+    """Drop the process-local LRU and counters (the shared cache is left as is)."""
+    _local_cache.clear()
+    with _stats_lock:
+        _cache_stats.clear()
+
+
+def _cache_key(prefix: str, text: str) -> str:
+    return (
+        f'embed:{settings.OLLAMA_EMBED_MODEL}:{PRODUCT_EMBEDDING_DIM}:'
+        f'{prefix.strip()}:{text_hash(text)}'
+    )
+
+
+def _pack(vector: list[float]) -> bytes:
+    return array('f', vector).tobytes()
+
+
+def _unpack(blob: bytes) -> list[float]:
+    vec = array('f')
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+def _embed_cached(prefix: str, texts: list[str]) -> list[list[float]]:
+    """Embed ``prefix + text`` for each text, going to the embedder only for
+    texts missing from both cache tiers. Duplicates are embedded once.
+
+    Shared cache errors are logged and treated as misses, so a Redis outage
+    degrades to plain embedder calls instead of failing the request.
+    """
+    texts = [t or ' ' for t in texts]
+    keys = [_cache_key(prefix, t) for t in texts]
+    found: dict[str, list[float]] = {}
+
+    for key in keys:
+        vec = _local_cache.get(key)
+        if vec is not None:
+            found[key] = vec
+    local_hits = len(found)
+
+    remote_keys = list(dict.fromkeys(k for k in keys if k not in found))
+    if remote_keys:
+        try:
+            blobs = cache.get_many(remote_keys)
+        except Exception:
+            logger.warning('embedding cache read failed', exc_info=True)
+            blobs = {}
+        for key, blob in blobs.items():
+            vec = _unpack(blob)
+            found[key] = vec
+            _local_cache.put(key, vec)
+    shared_hits = len(found) - local_hits
+
+    missing = {key: text for key, text in zip(keys, texts) if key not in found}
+    if missing:
+        vectors = _post_embed([f'{prefix}{text}' for text in missing.values()])
+        # Round-trip through float32 so a vector is identical whichever tier
+        # serves it next time.
+        packed = {key: _pack(vec) for key, vec in zip(missing, vectors)}
+        for key, blob in packed.items():
+            vec = _unpack(blob)
+            found[key] = vec
+            _local_cache.put(key, vec)
+        try:
+            cache.set_many(packed, timeout=EMBED_CACHE_TTL)
+        except Exception:
+            logger.warning('embedding cache write failed', exc_info=True)
+
+    _count(local_hits=local_hits, shared_hits=shared_hits, misses=len(missing))
+    return [found[key] for key in keys]
+
+
 def embed_query(text: str) -> list[float]:
     """Generate a query-side embedding (asymmetric to document side)."""
-    vectors = _post_embed([f'{QUERY_PREFIX}{text or " "}'])
-    return vectors[0]
+    return _embed_cached(QUERY_PREFIX, [text])[0]
+
+
+def embed_queries(texts: Iterable[str]) -> list[list[float]]:
+    """Generate query-side embeddings for a batch of texts in one request."""
+    texts = list(texts)
+    if not texts:
+        return []
+    return _embed_cached(QUERY_PREFIX, texts)
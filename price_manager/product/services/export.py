@@ -0,0 +1,143 @@
+"""Streaming catalog export: products with their prices and stock.
+
+Products are read through a server-side cursor (``QuerySet.iterator``) in
+chunks of ``EXPORT_CHUNK_SIZE``; each chunk prefetches its ``ProductPrice`` and
+``Stock`` rows in two queries, is encoded and handed to the response before
+the next one is fetched, so memory per request stays bounded by one chunk.
+
+Formats:
+
+* ``ndjson`` — one JSON object per product per line; decimals as strings.
+* ``arrow`` — an Arrow IPC stream with one record batch per chunk;
+  ``characteristics`` is a JSON string column (its keys vary per product).
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+from typing import Iterator
+
+import pyarrow as pa
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, QuerySet
+
+from pricing.models import ProductPrice, Stock
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+}
+
+
+def export_queryset(qs: QuerySet) -> QuerySet:
+    """Restrict ``qs`` to exported columns and attach per-chunk prefetches."""
+    if not qs.query.order_by:
+        qs = qs.order_by('pk')
+    return qs.defer('embedding', 'embedding_text_hash').prefetch_related(
+        Prefetch(
+            'prices',
+            queryset=ProductPrice.objects.select_related('price_type')
+            .only('product', 'supplier', 'price_type__name', 'value')
+            .order_by('supplier_id', 'price_type__name'),
+        ),
+        Prefetch(
+            'stocks',
+            queryset=Stock.objects.only('product', 'supplier', 'quantity').order_by('supplier_id'),
+        ),
+    )
+
+
+def _row(product) -> dict:
+    return {
+        'id': product.pk,
+        'sku': product.sku,
+        'name': product.name,
+        'status': product.status,
+        'category_id': product.category_id,
+        'brand_id': product.brand_id,
+        'description': product.description,
+        'characteristics': product.characteristics,
+        'image_urls': product.image_urls,
+        'updated_at': product.updated_at,
+        'prices': [
+            {'supplier_id': p.supplier_id, 'price_type': p.price_type.name, 'value': p.value}
+            for p in product.prices.all()
+        ],
+        'stocks': [
+            {'supplier_id': s.supplier_id, 'quantity': s.quantity}
+            for s in product.stocks.all()
+        ],
+    }
+
+
+def iter_chunks(qs: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[list[dict]]:
+    """Yield export rows of ``qs`` in lists of at most ``chunk_size``."""
+    chunk: list[dict] = []
+    for product in export_queryset(qs).iterator(chunk_size=chunk_size):
+        chunk.append(_row(product))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_ndjson(qs: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    for chunk in iter_chunks(qs, chunk_size):
+        yield ''.join(
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in chunk
+        ).encode('utf-8')
+
+
+def _arrow_schema() -> pa.Schema:
+    return pa.schema([
+        ('id', pa.int64()),
+        ('sku', pa.string()),
+        ('name', pa.string()),
+        ('status', pa.string()),
+        ('category_id', pa.int64()),
+        ('brand_id', pa.int64()),
+        ('description', pa.string()),
+        ('characteristics', pa.string()),
+        ('image_urls', pa.list_(pa.string())),
+        ('updated_at', pa.timestamp('us', tz='UTC')),
+        ('prices', pa.list_(pa.struct([
+            ('supplier_id', pa.int64()),
+            ('price_type', pa.string()),
+            ('value', pa.decimal128(14, 4)),
+        ]))),
+        ('stocks', pa.list_(pa.struct([
+            ('supplier_id', pa.int64()),
+            ('quantity', pa.int64()),
+        ]))),
+    ])
+
+
+def stream_arrow(qs: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    schema = _arrow_schema()
+    sink = io.BytesIO()
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield drain()
+        for chunk in iter_chunks(qs, chunk_size):
+            for row in chunk:
+                row['characteristics'] = json.dumps(row['characteristics'], ensure_ascii=False)
+                row['image_urls'] = [str(url) for url in row['image_urls'] or []]
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+            yield drain()
+    yield drain()
+
+
+def stream_export(qs: QuerySet, fmt: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    if fmt == 'arrow':
+        return stream_arrow(qs, chunk_size)
+    return stream_ndjson(qs, chunk_size)
@@ -0,0 +1,103 @@
+"""Characteristic facets: the ``ProductFacet`` index and counts over it.
+
+``ProductFacet`` holds one row per scalar ``(key, value)`` pair of
+``Product.characteristics``. :func:`sync_product_facets` rebuilds the rows of
+given products from their JSONB in two statements and is called wherever
+``characteristics`` is written (the ``post_save`` signal, import commit
+batches, retype/rename job batches); :func:`rebuild_product_facets` redoes the
+whole table.
+
+:func:`facet_counts` groups the index rows of the filtered products by
+``(key, value)``; window functions keep the ``max_keys`` most frequent keys
+and the ``max_buckets`` most frequent values of each, so only the response
+rows leave the database. Keys are ordered by total occurrences, values by
+count (ties broken by key / value so responses are stable).
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from ..models import Product, ProductFacet
+from .catalog_cache import bump_catalog_generation
+
+
+# Scalar (key, value) pairs of the products matched by {where}. Nested values
+# (lists / dicts) are not facetable; non-object ``characteristics`` yield none.
+_FACET_ROWS_SQL = (
+    'SELECT p.id, e.key, e.value FROM {products} p'
+    ' CROSS JOIN LATERAL jsonb_each('
+    "  CASE WHEN jsonb_typeof(p.characteristics) = 'object'"
+    "  THEN p.characteristics ELSE '{{}}'::jsonb END) e"
+    " WHERE {where} AND jsonb_typeof(e.value) NOT IN ('array', 'object')"
+)
+
+
+def _tables() -> tuple[str, str]:
+    qn = connection.ops.quote_name
+    return qn(Product._meta.db_table), qn(ProductFacet._meta.db_table)
+
+
+def sync_product_facets(product_ids: Iterable[int]) -> int:
+    """Replace the facet rows of ``product_ids`` with their current values.
+
+    Runs in the caller's transaction and bumps the catalog generation on
+    commit. Returns the number of rows written.
+    """
+    ids = sorted(set(product_ids))
+    if not ids:
+        return 0
+    products, facets = _tables()
+    rows_sql = _FACET_ROWS_SQL.format(products=products, where='p.id = ANY(%s)')
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {facets} WHERE product_id = ANY(%s)', [ids])
+        cursor.execute(f'INSERT INTO {facets} (product_id, key, value) {rows_sql}', [ids])
+        written = cursor.rowcount
+    bump_catalog_generation()
+    return written
+
+
+def rebuild_product_facets() -> int:
+    """Rebuild the whole facet table from ``Product.characteristics``."""
+    products, facets = _tables()
+    rows_sql = _FACET_ROWS_SQL.format(products=products, where='TRUE')
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {facets}')
+        cursor.execute(f'INSERT INTO {facets} (product_id, key, value) {rows_sql}')
+        written = cursor.rowcount
+        bump_catalog_generation()
+    return written
+
+
+def facet_counts(
+    qs: QuerySet, max_keys: int, max_buckets: int,
+) -> dict[str, list[tuple[Any, int]]]:
+    """Return ``{char_key: [(value, count), ...]}`` for products in ``qs``."""
+    products_sql, params = qs.order_by().values('pk').query.sql_with_params()
+    _products, facets = _tables()
+    sql = (
+        'WITH buckets AS ('
+        ' SELECT f.key, f.value, count(*) AS n'
+        f' FROM {facets} f WHERE f.product_id IN ({products_sql})'
+        ' GROUP BY f.key, f.value'
+        '), ranked AS ('
+        ' SELECT key, value, n,'
+        '  sum(n) OVER (PARTITION BY key) AS key_total,'
+        '  row_number() OVER (PARTITION BY key ORDER BY n DESC, value) AS bucket_rank'
+        ' FROM buckets'
+        '), keyed AS ('
+        ' SELECT *, dense_rank() OVER (ORDER BY key_total DESC, key) AS key_rank'
+        ' FROM ranked WHERE bucket_rank <= %s'
+        ')'
+        ' SELECT key, value::text, n FROM keyed WHERE key_rank <= %s'
+        ' ORDER BY key_rank, bucket_rank'
+    )
+    result: dict[str, list[tuple[Any, int]]] = {}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, max_buckets, max_keys])
+        for key, raw_value, count in cursor.fetchall():
+            result.setdefault(key, []).append((json.loads(raw_value), count))
+    return result
@@ -9,6 +9,18 @@ During bulk imports we don't want N single-pk tasks to flood the queue —
 ``run_import_commit`` already enqueues chunked embed tasks for the whole
 ``affected_ids`` set. ``suppress_embedding_signal()`` is the opt-out hook
 the importer wraps around its commit loop.
+
+The same ``post_save`` also refreshes the product's ``ProductFacet`` rows —
+synchronously, inside the saving transaction, so facet filters never see a
+committed product with stale facets. The importer syncs facets per batch
+instead, under the same suppression.
+
+Catalog writes (products, categories, characteristic types) also bump the
+cached-response generation (``services.catalog_cache``); under suppression
+the importer's facet sync bumps it once per batch.
+
+Characteristic-type writes additionally invalidate the validation registry
+(``services.char_registry``), regardless of suppression.
 """
 from __future__ import annotations
 
@@ -16,10 +28,12 @@ import threading
 from contextlib import contextmanager
 
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Product
+from .models import Category, CharacteristicType, Product
+from .services.catalog_cache import bump_catalog_generation
+from .services.char_registry import invalidate_char_type_registry
 
 # Fields whose change should retrigger embedding. ``image_urls``, ``status``,
 # ``created_at`` / ``updated_at`` are deliberately excluded.
@@ -45,11 +59,12 @@ _import_state = threading.local()
 
 @contextmanager
 def suppress_embedding_signal():
-    """While active, ``post_save`` on Product does not enqueue an embed task.
+    """While active, ``post_save`` on Product does not enqueue an embed task
+    nor sync facets.
 
     Use during bulk imports — the importer enqueues one chunked embed task per
-    batch of affected ids after commit, which is strictly cheaper than the
-    per-row signal path.
+    batch of affected ids after commit and syncs facets per batch, which is
+    strictly cheaper than the per-row signal path.
     """
     prev = getattr(_import_state, 'suppressed', False)
     _import_state.suppressed = True
@@ -74,3 +89,36 @@ def _enqueue_product_embedding(sender, instance, created, update_fields=None, **
 
     pk = instance.pk
     transaction.on_commit(lambda: embed_products_task.delay([pk]))
+
+
+@receiver(post_save, sender=Product)
+def _sync_facets(sender, instance, created, update_fields=None, **kwargs):
+    if getattr(_import_state, 'suppressed', False):
+        return
+    if update_fields is not None and 'characteristics' not in update_fields:
+        return
+
+    from .services.facets import sync_product_facets
+
+    sync_product_facets([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=CharacteristicType)
+@receiver(post_delete, sender=CharacteristicType)
+@receiver(m2m_changed, sender=CharacteristicType.categories.through)
+def _invalidate_catalog_cache(sender, **kwargs):
+    if getattr(_import_state, 'suppressed', False):
+        return
+    bump_catalog_generation()
+
+
+@receiver(post_save, sender=CharacteristicType)
+@receiver(post_delete, sender=CharacteristicType)
+@receiver(m2m_changed, sender=CharacteristicType.categories.through)
+def _invalidate_char_type_registry(sender, **kwargs):
+    # Not subject to import suppression: validation must see new types.
+    invalidate_char_type_registry()
@@ -13,6 +13,7 @@ import logging
 
 from celery import shared_task
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
 from dataframe import sessions as session_store
@@ -34,6 +35,8 @@ from .services.char_mutation import (
     _make_probe,
     coerce_with_strategy,
 )
+from .services.catalog_stats import mark_catalog_embedded, refresh_catalog_stats
+from .services.facets import sync_product_facets
 
 logger = logging.getLogger(__name__)
 
@@ -148,6 +151,7 @@ def run_import_commit(job_id: str) -> None:
             ImportJob.objects.filter(pk=job.pk).update(rows_done=rows_done)
 
         summary = commit_rows(results, progress_callback=_on_progress)
+        refresh_catalog_stats()
         # Free the cached DataFrame and the upload file — both are large and
         # no longer needed once the commit lands. Failure here is non-fatal.
         try:
@@ -189,7 +193,9 @@ def _iter_products_with_key(name: str):
 def _flush_batch(batch: list[Product]) -> None:
     if not batch:
         return
-    Product.objects.bulk_update(batch, ['characteristics'])
+    with transaction.atomic():
+        Product.objects.bulk_update(batch, ['characteristics'])
+        sync_product_facets(p.pk for p in batch)
     batch.clear()
 
 
@@ -410,6 +416,8 @@ def embed_products_task(product_ids: list[int]) -> dict:
         Product.objects.filter(pk__in=product_ids).select_related('brand', 'category')
     )
     updated = _embed_and_save(products)
+    if updated:
+        mark_catalog_embedded()
     return {'updated': updated, 'requested': len(product_ids)}
 
 
@@ -440,4 +448,6 @@ def embed_missing_products_task() -> dict:
             logger.warning('embed_missing_products: embedder down (%s), will retry next tick', exc)
             break
         total_updated += result.get('updated', 0)
+    if total_updated:
+        refresh_catalog_stats()
     return {'seen': total_seen, 'updated': total_updated}
@@ -0,0 +1,116 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from product.models import Brand, Category, CharacteristicType, Product, ProductFacet
+
+BULK_URL = 'product_api:product-bulk'
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+@patch('product.tasks.embed_products_task.delay')
+class ProductBulkApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(username='u', password='p')
+        cls.category = Category.objects.create(name='Drills')
+        cls.brand = Brand.objects.create(name='Bosch')
+        cls.weight = CharacteristicType.objects.create(
+            name='weight', label='Weight', value_type=CharacteristicType.VALUE_FLOAT,
+        )
+        cls.power = CharacteristicType.objects.create(
+            name='power', label='Power', value_type=CharacteristicType.VALUE_INTEGER, required=True,
+        )
+        cls.power.categories.add(cls.category)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _post(self, items):
+        return self.client.post(reverse(BULK_URL), {'items': items}, content_type='application/json')
+
+    def test_creates_and_updates_by_sku(self, _delay):
+        Product.objects.create(sku='B-1', name='Old', status='draft')
+        resp = self._post([
+            {'sku': 'B-1', 'status': 'active'},
+            {'sku': 'B-2', 'name': 'New', 'brand': self.brand.pk, 'characteristics': {'weight': '1.5'}},
+        ])
+        self.assertEqual(resp.status_code, 200, resp.content[:300])
+        body = resp.json()
+        self.assertEqual((body['created'], body['updated'], body['failed']), (1, 1, 0))
+        updated = Product.objects.get(sku='B-1')
+        self.assertEqual((updated.name, updated.status), ('Old', 'active'))
+        created = Product.objects.get(sku='B-2')
+        self.assertEqual(created.characteristics, {'weight': 1.5})
+        self.assertEqual(created.brand_id, self.brand.pk)
+        self.assertTrue(ProductFacet.objects.filter(product=created, key='weight').exists())
+        self.assertEqual(
+            [(i['index'], i['id'], i['created']) for i in body['items']],
+            [(0, updated.pk, False), (1, created.pk, True)],
+        )
+
+    def test_reports_errors_per_item(self, _delay):
+        resp = self._post([
+            {'sku': 'E-1', 'name': 'Ok'},
+            {'sku': 'E-2'},
+            {'sku': 'E-3', 'name': 'Bad', 'characteristics': {'nope': 1}},
+            {'sku': 'E-4', 'name': 'Cat', 'category': self.category.pk, 'characteristics': {}},
+            {'sku': 'E-5', 'name': 'Brand', 'brand': 999999},
+            {'sku': 'E-1', 'name': 'Dup'},
+            {'name': 'No sku'},
+        ])
+        body = resp.json()
+        self.assertEqual(body['created'], 1)
+        self.assertEqual([e['index'] for e in body['errors']], [1, 2, 3, 4, 5, 6])
+        errors = {e['index']: e['errors'] for e in body['errors']}
+        self.assertIn('name', errors[1])
+        self.assertIn('characteristics', errors[2])
+        self.assertIn('power', errors[3]['characteristics'][0])
+        self.assertIn('brand', errors[4])
+        self.assertIn('sku', errors[5])
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['E-1'])
+
+    def test_query_count_does_not_grow_with_items(self, _delay):
+        items = [
+            {'sku': f'Q-{i}', 'name': f'Item {i}', 'category': self.category.pk,
+             'characteristics': {'power': i, 'weight': 2}}
+            for i in range(50)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._post(items)
+        self.assertEqual(resp.json()['created'], 50)
+        self.assertLess(len(ctx.captured_queries), 20)
+
+    def test_rejects_empty_payload(self, _delay):
+        resp = self._post([])
+        self.assertEqual(resp.status_code, 400)
+
+    def test_embeds_only_items_with_embedded_fields(self, delay):
+        Product.objects.create(sku='M-1', name='Kept')
+        with self.captureOnCommitCallbacks(execute=True):
+            self._post([
+                {'sku': 'M-1', 'status': 'active'},
+                {'sku': 'M-2', 'name': 'New'},
+            ])
+        scheduled = [pk for call in delay.call_args_list for pk in call.args[0]]
+        self.assertEqual(scheduled, [Product.objects.get(sku='M-2').pk])
+
+    def test_non_object_items_fail_by_index(self, _delay):
+        resp = self._post([{'sku': 'N-1', 'name': 'Ok'}, 'N-2', [1]])
+        self.assertEqual(resp.status_code, 200, resp.content[:300])
+        body = resp.json()
+        self.assertEqual(body['created'], 1)
+        self.assertEqual([(e['index'], e['sku']) for e in body['errors']], [(1, None), (2, None)])
+
+    def test_database_error_is_not_leaked(self, _delay):
+        with patch('product.services.bulk.Product.objects.bulk_create',
+                   side_effect=DatabaseError('relation "secret" does not exist')), \
+                self.assertLogs('product.services.bulk', 'ERROR'):
+            body = self._post([{'sku': 'D-1', 'name': 'Db'}]).json()
+        self.assertEqual(body['failed'], 1)
+        self.assertNotIn('secret', str(body['errors']))
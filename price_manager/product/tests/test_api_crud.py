@@ -1,5 +1,9 @@
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from product.models import Brand, Category, CharacteristicType, Product
@@ -108,3 +112,65 @@ class ProductCrudTests(ProductApiTestBase):
             content_type='application/json',
         )
         self.assertEqual(resp.status_code, 400)
+
+
+class ProductCursorPaginationTests(ProductApiTestBase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(5):
+            Product.objects.create(sku=f'CUR-{i}', name=f'Cursor {i}')
+
+    def _walk(self, url):
+        seen = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200, resp.content[:300])
+            body = resp.json()
+            self.assertNotIn('count', body)
+            seen.extend(row['sku'] for row in body['results'])
+            url = body['next']
+        return seen
+
+    def test_cursor_walk_sees_every_row_once(self):
+        url = reverse('product_api:product-list') + '?cursor=&page_size=2'
+        seen = self._walk(url)
+        self.assertEqual(sorted(seen), [f'CUR-{i}' for i in range(5)])
+
+    def test_cursor_mode_issues_no_count_query(self):
+        url = reverse('product_api:product-list') + '?cursor=&page_size=2'
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in ctx.captured_queries))
+
+    def test_cursor_filter_is_a_row_comparison(self):
+        first = self.client.get(reverse('product_api:product-list') + '?cursor=&page_size=2').json()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first['next'])
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertIn('ROW("product_product"."updated_at", "product_product"."id") >', sql)
+
+    def test_page_number_mode_unchanged(self):
+        resp = self.client.get(reverse('product_api:product-list') + '?page_size=2')
+        self.assertEqual(resp.json()['count'], 5)
+
+    def test_invalid_cursor_returns_404(self):
+        resp = self.client.get(reverse('product_api:product-list') + '?cursor=bogus')
+        self.assertEqual(resp.status_code, 404)
+
+
+class ProductEstimatedCountTests(ProductApiTestBase):
+    def test_small_list_reports_exact_count(self):
+        Product.objects.create(sku='EC-1', name='Exact')
+        body = self.client.get(reverse('product_api:product-list')).json()
+        self.assertEqual(body['count'], 1)
+        self.assertFalse(body['count_estimated'])
+
+    def test_exact_count_opt_in(self):
+        Product.objects.create(sku='EC-1', name='Exact')
+        with patch('core.pagination.estimate_count', return_value=10 ** 6):
+            estimated = self.client.get(reverse('product_api:product-list')).json()
+            exact = self.client.get(reverse('product_api:product-list') + '?exact_count=1').json()
+        self.assertEqual((estimated['count'], estimated['count_estimated']), (10 ** 6, True))
+        self.assertIsNone(estimated['next'])
+        self.assertEqual((exact['count'], exact['count_estimated']), (1, False))
@@ -1,4 +1,7 @@
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
 
@@ -86,6 +89,9 @@ class ProductFacetsTests(TestCase):
         Product.objects.create(sku='C', name='c', characteristics={'color': 'blue'})
 
     def setUp(self):
+        # Responses are cached per catalog generation, which only moves on
+        # commit — never inside a TestCase — so start every test cold.
+        cache.clear()
         self.client.force_login(self.user)
 
     def test_facets_shape(self):
@@ -98,3 +104,33 @@ class ProductFacetsTests(TestCase):
         self.assertIn('buckets', body['color'])
         counts = {item['value']: item['count'] for item in body['color']['buckets']}
         self.assertEqual(counts, {'red': 2, 'blue': 1})
+
+    def test_facets_bounds_and_typed_values(self):
+        Product.objects.create(sku='D', name='d', characteristics={'color': 'red', 'size': 42, 'tags': ['x']})
+        Product.objects.create(sku='E', name='e', characteristics={'size': 42, 'wet': True})
+
+        resp = self.client.get(reverse('product_api:product-facets') + '?facets_max_keys=2&facets_max_buckets=1')
+        body = resp.json()
+
+        self.assertEqual(list(body), ['color', 'size'])
+        self.assertEqual(body['color']['buckets'], [{'value': 'red', 'count': 3}])
+        self.assertEqual(body['size']['buckets'], [{'value': 42, 'count': 2}])
+        self.assertEqual(body['size']['value_type'], 'string')
+
+    def test_facets_respect_filters(self):
+        resp = self.client.get(reverse('product_api:product-facets') + '?char__color=blue')
+        self.assertEqual(resp.json()['color']['buckets'], [{'value': 'blue', 'count': 1}])
+
+    def test_facets_cached_until_catalog_write(self):
+        url = reverse('product_api:product-facets')
+        self.client.get(url + '?char__color=red&status=')
+        with self.assertNumQueries(2):  # session + user only
+            cached = self.client.get(url + '?status=&char__color=red').json()
+        self.assertEqual(cached['color']['buckets'], [{'value': 'red', 'count': 2}])
+
+        with patch('product.tasks.embed_products_task.delay'), \
+                self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(sku='D', name='d', characteristics={'color': 'red'})
+
+        fresh = self.client.get(url + '?char__color=red').json()
+        self.assertEqual(fresh['color']['buckets'], [{'value': 'red', 'count': 3}])
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from product.models import Category, CharacteristicType, Product
+from product.services.catalog_cache import read_generation
+from product.services.char_registry import (
+    CHAR_TYPES_GENERATION_KEY,
+    get_char_type_registry,
+)
+
+
+class CharTypeRegistryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Drills')
+        cls.power = CharacteristicType.objects.create(
+            name='power', label='Power', value_type=CharacteristicType.VALUE_INTEGER, required=True,
+        )
+        cls.power.categories.add(cls.category)
+        CharacteristicType.objects.create(name='color', label='Color')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_clean_makes_no_type_queries_once_loaded(self):
+        get_char_type_registry()
+        product = Product(sku='R-1', name='R', category=self.category,
+                          characteristics={'power': '500', 'color': 'red'})
+        with self.assertNumQueries(0):
+            product.clean()
+        self.assertEqual(product.characteristics, {'power': 500, 'color': 'red'})
+
+    def test_required_types_by_category(self):
+        product = Product(sku='R-2', name='R', category=self.category, characteristics={'color': 'red'})
+        with self.assertRaises(ValidationError) as ctx:
+            product.clean()
+        self.assertIn('power', str(ctx.exception))
+
+    def test_local_write_is_visible_immediately(self):
+        registry = get_char_type_registry()
+        self.assertNotIn('weight', registry.types_by_name)
+        CharacteristicType.objects.create(name='weight', label='Weight')
+        self.assertIn('weight', get_char_type_registry().types_by_name)
+
+    def test_snapshot_is_reused_until_invalidated(self):
+        first = get_char_type_registry()
+        self.assertIs(get_char_type_registry(), first)
+        self.power.categories.remove(self.category)
+        self.assertEqual(get_char_type_registry().required_for(self.category.pk), [])
+
+    def test_commit_bumps_shared_generation(self):
+        before = read_generation(CHAR_TYPES_GENERATION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            CharacteristicType.objects.filter(name='color').get().save()
+        self.assertNotEqual(read_generation(CHAR_TYPES_GENERATION_KEY), before)
+
+
+class CharTypeRegistryOutsideTransactionTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rolled_back_type_is_forgotten(self):
+        get_char_type_registry()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                CharacteristicType.objects.create(name='ghost', label='Ghost')
+                self.assertIn('ghost', get_char_type_registry().types_by_name)
+                raise RuntimeError
+        self.assertNotIn('ghost', get_char_type_registry().types_by_name)
+
+    def test_snapshot_kept_without_cache(self):
+        with patch('product.services.char_registry.read_generation', return_value=None):
+            first = get_char_type_registry()
+            with self.assertNumQueries(0):
+                self.assertIs(get_char_type_registry(), first)
+            with patch('product.services.char_registry.CHAR_TYPE_REGISTRY_TTL', -1):
+                self.assertIsNot(get_char_type_registry(), first)
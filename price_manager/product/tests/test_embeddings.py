@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import TestCase
 
 from product.models import Brand, Category, CharacteristicType, Product
@@ -105,3 +106,46 @@ class EmbedMissingProductsTaskTests(TestCase):
         b.refresh_from_db()
         self.assertIsNotNone(b.embedding)
         self.assertEqual(result['updated'], 1)
+
+
+class QueryEmbeddingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        emb_svc.clear_embedding_cache()
+        self.addCleanup(emb_svc.clear_embedding_cache)
+
+    def _fake_post(self, inputs):
+        return [[float(len(text)), 0.5] + [0.0] * 254 for text in inputs]
+
+    def test_repeated_query_hits_cache(self):
+        with patch.object(emb_svc, '_post_embed', side_effect=self._fake_post) as mock:
+            first = emb_svc.embed_query('дрель')
+            second = emb_svc.embed_query('дрель')
+        mock.assert_called_once_with([emb_svc.QUERY_PREFIX + 'дрель'])
+        self.assertEqual(first, second)
+        self.assertEqual(emb_svc.embedding_cache_stats(), {'local_hits': 1, 'shared_hits': 0, 'misses': 1})
+
+    def test_shared_cache_survives_local_eviction(self):
+        with patch.object(emb_svc, '_post_embed', side_effect=self._fake_post):
+            vec = emb_svc.embed_query('пила')
+        emb_svc._local_cache.clear()
+        with patch.object(emb_svc, '_post_embed') as mock:
+            self.assertEqual(emb_svc.embed_query('пила'), vec)
+        mock.assert_not_called()
+        self.assertEqual(emb_svc.embedding_cache_stats()['shared_hits'], 1)
+
+    def test_batch_embeds_only_misses_once(self):
+        with patch.object(emb_svc, '_post_embed', side_effect=self._fake_post):
+            emb_svc.embed_query('a')
+        with patch.object(emb_svc, '_post_embed', side_effect=self._fake_post) as mock:
+            vectors = emb_svc.embed_queries(['a', 'bb', 'bb'])
+        mock.assert_called_once_with([emb_svc.QUERY_PREFIX + 'bb'])
+        self.assertEqual(len(vectors), 3)
+        self.assertEqual(vectors[1], vectors[2])
+
+    def test_vectors_are_stored_as_float32_bytes(self):
+        with patch.object(emb_svc, '_post_embed', side_effect=self._fake_post):
+            emb_svc.embed_query('x')
+        blob = cache.get(emb_svc._cache_key(emb_svc.QUERY_PREFIX, 'x'))
+        self.assertIsInstance(blob, bytes)
+        self.assertEqual(len(blob), 256 * 4)
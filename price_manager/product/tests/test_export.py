@@ -0,0 +1,84 @@
+import json
+from decimal import Decimal
+
+import pyarrow as pa
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from pricing.models import PriceType, ProductPrice, Stock
+from product.models import Product
+from product.services.export import stream_ndjson
+from supplier.models import Supplier
+
+EXPORT_URL = 'product_api:product-export'
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProductExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(username='u', password='p')
+        cls.supplier = Supplier.objects.create(name='Supplier')
+        cls.retail = PriceType.objects.create(name='retail', label='Retail')
+        cls.products = [
+            Product.objects.create(sku=f'EXP-{i}', name=f'Export {i}', status='active' if i % 2 else 'draft',
+                                   characteristics={'n': i})
+            for i in range(5)
+        ]
+        for product in cls.products:
+            ProductPrice.objects.create(
+                product=product, supplier=cls.supplier, price_type=cls.retail, value=Decimal('10.5'),
+            )
+            Stock.objects.create(product=product, supplier=cls.supplier, quantity=product.pk % 7)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _body(self, resp) -> bytes:
+        self.assertEqual(resp.status_code, 200)
+        return b''.join(resp.streaming_content)
+
+    def test_ndjson_rows_carry_prices_and_stock(self):
+        resp = self.client.get(reverse(EXPORT_URL))
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self._body(resp).decode().splitlines()]
+        self.assertEqual([r['sku'] for r in rows], [p.sku for p in self.products])
+        first = rows[0]
+        self.assertEqual(first['prices'], [
+            {'supplier_id': self.supplier.pk, 'price_type': 'retail', 'value': '10.5000'},
+        ])
+        self.assertEqual(first['stocks'], [
+            {'supplier_id': self.supplier.pk, 'quantity': self.products[0].pk % 7},
+        ])
+        self.assertEqual(first['characteristics'], {'n': 0})
+        self.assertNotIn('embedding', first)
+
+    def test_honours_product_filters(self):
+        resp = self.client.get(reverse(EXPORT_URL) + '?status=active')
+        rows = [json.loads(line) for line in self._body(resp).decode().splitlines()]
+        self.assertEqual([r['sku'] for r in rows], ['EXP-1', 'EXP-3'])
+
+    def test_arrow_stream(self):
+        resp = self.client.get(reverse(EXPORT_URL) + '?export_format=arrow')
+        self.assertEqual(resp['Content-Type'], 'application/vnd.apache.arrow.stream')
+        table = pa.ipc.open_stream(self._body(resp)).read_all()
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.column('sku').to_pylist(), [p.sku for p in self.products])
+        prices = table.column('prices').to_pylist()[0]
+        self.assertEqual(prices[0]['value'], Decimal('10.5000'))
+        self.assertEqual(json.loads(table.column('characteristics')[0].as_py()), {'n': 0})
+
+    def test_unknown_format_is_400(self):
+        resp = self.client.get(reverse(EXPORT_URL) + '?export_format=xlsx')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_prefetches_once_per_chunk(self):
+        with CaptureQueriesContext(connection) as ctx:
+            chunks = list(stream_ndjson(Product.objects.all(), chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        # Per chunk: products fetch + prices + stocks; no per-product queries.
+        self.assertLessEqual(len(ctx.captured_queries), 3 * 3 + 1)
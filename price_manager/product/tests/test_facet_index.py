@@ -0,0 +1,78 @@
+"""``ProductFacet`` maintenance: every write path that changes
+``Product.characteristics`` leaves the facet index equal to a full rebuild."""
+from __future__ import annotations
+
+import pandas as pd
+from django.test import TestCase
+
+from product.importer import apply_mapping, commit_rows
+from product.models import CharacteristicType, Product, ProductFacet
+from product.services.facets import facet_counts, rebuild_product_facets, sync_product_facets
+from product.tasks import _flush_batch
+
+from .fixtures import make_char_type
+
+
+def _facets(product):
+    return dict(ProductFacet.objects.filter(product=product).values_list('key', 'value'))
+
+
+class ProductFacetIndexTests(TestCase):
+    def assertIndexConsistent(self):
+        before = sorted(ProductFacet.objects.values_list('product_id', 'key', 'value'), key=repr)
+        rebuild_product_facets()
+        after = sorted(ProductFacet.objects.values_list('product_id', 'key', 'value'), key=repr)
+        self.assertEqual(before, after)
+
+    def test_save_syncs_scalar_values_only(self):
+        product = Product.objects.create(
+            sku='F1', name='f', characteristics={'color': 'red', 'size': 42, 'tags': ['a'], 'dims': {'w': 1}},
+        )
+        self.assertEqual(_facets(product), {'color': 'red', 'size': 42})
+
+        product.characteristics = {'color': 'blue'}
+        product.save()
+        self.assertEqual(_facets(product), {'color': 'blue'})
+        self.assertIndexConsistent()
+
+    def test_save_without_characteristics_field_skips_sync(self):
+        product = Product.objects.create(sku='F1', name='f', characteristics={'color': 'red'})
+        with self.assertNumQueries(1):
+            product.save(update_fields=['status'])
+
+    def test_import_commit_syncs_facets(self):
+        make_char_type('color', CharacteristicType.VALUE_STRING)
+        df = pd.DataFrame([['S1', 'One', 'red'], ['S2', 'Two', 'blue']], columns=['sku', 'name', 'color'])
+        mapping = {
+            'sku': {'column': 'sku'},
+            'name': {'column': 'name'},
+            'characteristics': {'color': {'column': 'color'}},
+        }
+        for bulk in (False, True):
+            with self.subTest(bulk=bulk):
+                Product.objects.all().delete()
+                commit_rows(apply_mapping(df, mapping), bulk=bulk)
+                self.assertEqual(_facets(Product.objects.get(sku='S2')), {'color': 'blue'})
+                self.assertIndexConsistent()
+
+    def test_mutation_batch_flush_syncs_facets(self):
+        product = Product.objects.create(sku='F1', name='f', characteristics={'weight': '10'})
+        product.characteristics = {'weight': 10}
+        _flush_batch([product])
+        self.assertEqual(_facets(product), {'weight': 10})
+
+    def test_counts_and_filters_read_the_index(self):
+        a = Product.objects.create(sku='A', name='a', characteristics={'color': 'red'})
+        Product.objects.create(sku='B', name='b', characteristics={'color': 'red', 'n': 5})
+        # Written behind the index's back: counts reflect the index, not JSONB.
+        Product.objects.filter(pk=a.pk).update(characteristics={'color': 'green'})
+
+        self.assertEqual(
+            facet_counts(Product.objects.all(), max_keys=10, max_buckets=10),
+            {'color': [('red', 2)], 'n': [(5, 1)]},
+        )
+        sync_product_facets([a.pk])
+        self.assertEqual(
+            facet_counts(Product.objects.all(), max_keys=1, max_buckets=10),
+            {'color': [('green', 1), ('red', 1)]},
+        )
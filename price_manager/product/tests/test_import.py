@@ -9,11 +9,16 @@ Each class drives the four real HTTP endpoints in order:
 from __future__ import annotations
 
 import tempfile
+from unittest.mock import patch
 
+import numpy as np
+import pandas as pd
 from django.contrib.auth import get_user_model
 from django.test import TestCase, override_settings
 from django.urls import reverse
 
+from core.category_paths import CategoryPathResolver
+from product.importer import apply_mapping, commit_rows
 from product.models import Brand, Category, CharacteristicType, Product
 
 from .fixtures import (
@@ -616,3 +621,123 @@ class ErrorCasesTests(BaseImportTests):
         body = resp.json()
         self.assertEqual(body['created'], 0)
         self.assertEqual(body['skipped'], 1)  # sku + name missing
+
+
+# ---------------------------------------------------------------------------
+# 8. Column-wise apply_mapping on raw DataFrames
+# ---------------------------------------------------------------------------
+class ApplyMappingColumnarTests(TestCase):
+    """Drives ``apply_mapping`` directly with DataFrames the readers never emit
+    (numeric dtypes, NaN, non-unique index) to pin per-cell semantics."""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_char_type('weight', CharacteristicType.VALUE_INTEGER)
+        make_char_type('ratio', CharacteristicType.VALUE_FLOAT)
+        make_char_type('flag', CharacteristicType.VALUE_BOOLEAN)
+        make_char_type('size', CharacteristicType.VALUE_CHOICE, options=['S', 'M'])
+
+    def _mapping(self, **chars):
+        return {
+            'sku': {'column': 'sku'},
+            'name': {'column': 'name'},
+            'characteristics': {k: {'column': v} for k, v in chars.items()},
+        }
+
+    def test_strips_strings_and_treats_blank_and_nan_as_missing(self):
+        df = pd.DataFrame({'sku': [' S1 ', 'S2', None], 'name': ['A', '   ', np.nan]})
+        results = apply_mapping(df, self._mapping())
+        self.assertEqual(results[0].payload, {'characteristics': {}, 'sku': 'S1', 'name': 'A'})
+        self.assertEqual(results[1].errors, {'name': 'Название обязательно.'})
+        self.assertEqual(set(results[2].errors), {'sku', 'name'})
+
+    def test_typed_coercion_matches_validate_value(self):
+        df = pd.DataFrame({
+            'sku': ['S1', 'S2', 'S3'],
+            'name': ['A', 'B', 'C'],
+            'weight': ['+42', '1_000', '4.5'],
+            'ratio': ['.5', 'inf', 'x'],
+            'flag': ['Да', 'N', 'maybe'],
+            'size': ['M', 'S', 'XL'],
+        })
+        results = apply_mapping(df, self._mapping(weight='weight', ratio='ratio', flag='flag', size='size'))
+        self.assertEqual(results[0].payload['characteristics'], {'weight': 42, 'ratio': 0.5, 'flag': True, 'size': 'M'})
+        self.assertEqual(results[1].payload['characteristics'], {'weight': 1000, 'ratio': float('inf'), 'flag': False, 'size': 'S'})
+        self.assertEqual(results[2].payload['characteristics'], {})
+        self.assertEqual(
+            results[2].errors,
+            {
+                'characteristics.weight': "'weight': невалидное значение '4.5' для типа integer.",
+                'characteristics.ratio': "'ratio': невалидное значение 'x' для типа float.",
+                'characteristics.flag': "'flag': невалидное значение 'maybe' для типа boolean.",
+                'characteristics.size': "'size': значение 'XL' не входит в допустимые (S, M).",
+            },
+        )
+
+    def test_numeric_columns_and_duplicate_index(self):
+        df = pd.DataFrame(
+            {'sku': ['S1', 'S2'], 'name': ['A', 'B'], 'weight': [3, 4], 'ratio': [1.5, np.nan]},
+            index=[7, 7],
+        )
+        results = apply_mapping(df, self._mapping(weight='weight', ratio='ratio'))
+        self.assertEqual([r.index for r in results], [7, 7])
+        self.assertEqual(results[0].payload['characteristics'], {'weight': 3, 'ratio': 1.5})
+        self.assertEqual(results[1].payload['characteristics'], {'weight': 4})
+
+
+# ---------------------------------------------------------------------------
+# 9. Set-based commit parity with the per-row path
+# ---------------------------------------------------------------------------
+class BulkCommitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_char_type('color', CharacteristicType.VALUE_STRING)
+
+    def _commit(self, rows, *, bulk):
+        df = pd.DataFrame(rows, columns=['sku', 'name', 'category', 'brand', 'color', 'description'])
+        mapping = {
+            'sku': {'column': 'sku'},
+            'name': {'column': 'name'},
+            'description': {'column': 'description'},
+            'category': {'column': 'category', 'path_separator': '/'},
+            'brand': {'column': 'brand'},
+            'characteristics': {'color': {'column': 'color'}},
+        }
+        return commit_rows(apply_mapping(df, mapping), bulk=bulk)
+
+    def test_bulk_and_row_modes_agree(self):
+        for bulk in (False, True):
+            with self.subTest(bulk=bulk):
+                Product.objects.all().delete()
+                self._commit([['S1', 'Old', 'A/B', 'Acme', 'red', 'kept']], bulk=bulk)
+                summary = self._commit([
+                    ['S1', 'New', 'A/B', 'Acme', 'blue', None],
+                    ['S2', 'Two', 'A/C', 'Brandy', None, 'd2'],
+                    ['S2', 'Two v2', 'A/C', 'Brandy', 'green', None],
+                    ['', 'No sku', None, None, None, None],
+                ], bulk=bulk)
+
+                self.assertEqual(
+                    (summary['created'], summary['updated'], summary['skipped']), (1, 2, 1),
+                )
+                s1 = Product.objects.get(sku='S1')
+                s2 = Product.objects.get(sku='S2')
+                self.assertEqual(summary['affected_ids'], [s1.pk, s2.pk, s2.pk])
+                self.assertEqual((s1.name, s1.description, s1.characteristics), ('New', 'kept', {'color': 'blue'}))
+                self.assertEqual((s2.name, s2.description, s2.characteristics), ('Two v2', 'd2', {'color': 'green'}))
+                self.assertEqual(s2.brand.name, 'Brandy')
+                self.assertEqual(s2.category.parent.name, 'A')
+                self.assertEqual(Category.objects.filter(name='A').count(), 1)
+                self.assertEqual(
+                    set(CharacteristicType.objects.get(name='color').categories.values_list('name', flat=True)),
+                    {'B', 'C'},
+                )
+
+    def test_row_mode_flushes_categories_once_per_batch(self):
+        rows = [[f'R{i}', f'Row {i}', f'Root{i}/Leaf', None, None, None] for i in range(5)]
+        with patch.object(CategoryPathResolver, 'flush', autospec=True,
+                          side_effect=CategoryPathResolver.flush) as flush:
+            summary = self._commit(rows, bulk=False)
+        self.assertEqual(summary['created'], 5)
+        self.assertEqual(flush.call_count, 1)
+        self.assertEqual(Category.objects.filter(parent__isnull=True, name__startswith='Root').count(), 5)
@@ -4,10 +4,15 @@ from __future__ import annotations
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 
-from product.filters import _rrf_merge
+from product.filters import ProductFilter, _rrf_merge
 from product.models import Product
+from product.services.catalog_stats import catalog_has_embeddings, refresh_catalog_stats
 from product.services.embeddings import EmbeddingServiceError
 
 
@@ -41,10 +46,12 @@ class HybridSearchAPITests(TestCase):
         self.vec.embedding_text_hash = 'h'
         self.vec.save(update_fields=['embedding', 'embedding_text_hash'])
         Product.objects.create(sku='OTH', name='Розетка')
+        refresh_catalog_stats()
 
     def test_lexical_only_when_no_vectors_in_db(self):
         # Wipe vectors → hybrid path must skip the embedder altogether.
         Product.objects.update(embedding=None, embedding_text_hash='')
+        refresh_catalog_stats()
         with patch('product.filters.embed_query') as mock_embed:
             resp = self.client.get('/api/products/products/?q=кабель')
         mock_embed.assert_not_called()
@@ -66,3 +73,119 @@ class HybridSearchAPITests(TestCase):
             resp = self.client.get('/api/products/products/?q=кабель&search_mode=lexical')
         mock_embed.assert_not_called()
         self.assertEqual(resp.status_code, 200)
+
+
+class SqlFusionTests(TestCase):
+    """Hybrid ranking runs in SQL and agrees with the ``_rrf_merge`` reference."""
+
+    def setUp(self):
+        self.query_vec = [1.0] + [0.0] * 255
+        names = ['кабель A', 'кабель B', 'шнур C', 'кабель D', 'адаптер E', 'шнур F']
+        self.products = []
+        for i, name in enumerate(names):
+            product = Product.objects.create(sku=f'S{i}', name=name)
+            if i % 3 != 0:
+                # Decreasing similarity to the query vector with i.
+                product.embedding = [1.0, float(i)] + [0.0] * 254
+                product.save(update_fields=['embedding'])
+            self.products.append(product)
+
+    def _search(self, **params):
+        refresh_catalog_stats()
+        params.setdefault('q', 'кабель')
+        request = RequestFactory().get('/', params)
+        return ProductFilter(request.GET, queryset=Product.objects.all(), request=request).qs
+
+    def test_matches_python_reference(self):
+        with patch('product.filters.embed_query', return_value=self.query_vec), \
+                patch('product.filters.HYBRID_LEXICAL_LIMIT', 2), \
+                patch('product.filters.HYBRID_VECTOR_LIMIT', 3):
+            qs = self._search()
+            with self.assertNumQueries(1):
+                ranked = [p.pk for p in qs]
+
+        lexical = list(
+            Product.objects.filter(name__icontains='кабель')
+            .annotate(sim=TrigramSimilarity('name', 'кабель'))
+            .order_by('-sim', 'pk')
+            .values_list('pk', flat=True)[:2]
+        )
+        by_distance = sorted(
+            (p for p in self.products if p.embedding is not None),
+            key=lambda p: (p.embedding[1], p.pk),
+        )
+        vector = [p.pk for p in by_distance[:3]]
+        self.assertEqual(ranked, _rrf_merge(lexical, vector))
+
+    def test_vector_mode_orders_by_distance(self):
+        with patch('product.filters.embed_query', return_value=self.query_vec):
+            ranked = [p.sku for p in self._search(search_mode='vector')]
+        self.assertEqual(ranked, ['S1', 'S2', 'S4', 'S5'])
+
+    def test_lexical_mode_ranks_by_similarity(self):
+        # Latin text: the test DB's C ctype gives pg_trgm no Cyrillic word chars.
+        long_name = Product.objects.create(sku='L1', name='extension lead with cable and cable tray')
+        exact = Product.objects.create(sku='L2', name='cable')
+        Product.objects.create(sku='L3', name='cable 2m')
+
+        ranked = [p.pk for p in self._search(q='cable', search_mode='lexical')]
+
+        self.assertEqual(ranked[0], exact.pk)
+        self.assertEqual(ranked[-1], long_name.pk)
+
+    def test_lexical_filter_is_bare_column_ilike(self):
+        # The trigram GIN indexes are on the bare columns; UPPER(col) would miss them.
+        sql = str(self._search(q='cable', search_mode='lexical').query)
+        self.assertIn('"product_product"."name" ILIKE', sql)
+        self.assertIn('"product_product"."sku" ILIKE', sql)
+        self.assertNotIn('UPPER(', sql)
+
+    def test_lexical_filter_escapes_wildcards(self):
+        sale = Product.objects.create(sku='W1', name='Drill 50% off')
+        Product.objects.create(sku='W2', name='Drill 500')
+
+        self.assertEqual([p.pk for p in self._search(q='50%', search_mode='lexical')], [sale.pk])
+
+
+class CatalogStatsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.client.force_login(User.objects.create_user('u', password='p'))
+        Product.objects.create(sku='A', name='a', embedding=[0.1] * 256)
+        Product.objects.create(sku='B', name='b')
+        refresh_catalog_stats()
+
+    def test_hybrid_probe_reads_cached_stats(self):
+        request = RequestFactory().get('/', {'q': 'zzz'})
+        with patch('product.filters.embed_query', return_value=[0.1] * 256), \
+                self.assertNumQueries(0):
+            ProductFilter(request.GET, queryset=Product.objects.all(), request=request).qs
+
+    def test_hybrid_probe_on_cache_miss_does_not_aggregate(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(catalog_has_embeddings())
+        self.assertEqual(len(ctx), 1)
+        self.assertNotIn('COUNT(', ctx.captured_queries[0]['sql'])
+
+    def test_embed_task_marks_stats_without_recounting(self):
+        from product.tasks import embed_products_task
+
+        Product.objects.update(embedding=None)
+        refresh_catalog_stats()
+        self.assertFalse(catalog_has_embeddings())
+
+        b = Product.objects.get(sku='B')
+        with patch('product.tasks.embed_texts', return_value=[[0.2] * 256]), \
+                CaptureQueriesContext(connection) as ctx:
+            embed_products_task([b.pk])
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+        self.assertTrue(catalog_has_embeddings())
+
+    def test_refresh_recounts(self):
+        Product.objects.filter(sku='B').update(embedding=[0.2] * 256)
+        resp = self.client.get('/api/products/catalog/stats/?refresh=1')
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual((body['products'], body['embedded'], body['coverage']), (2, 2, 1.0))
+        self.assertEqual(body['embed_dim'], 256)
@@ -58,7 +58,7 @@ class SupplierFeedEntrySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SupplierFeedEntry
-        fields = ['id', 'supplier_sku', 'data', 'match_candidates', 'best_score']
+        fields = ['id', 'supplier_sku', 'data', 'match_candidates', 'best_score', 'match_stage']
 
 
 # ── FeedMapping / SupplierFeed serializers ────────────────────────────────────
@@ -105,8 +105,19 @@ class SupplierFeedSerializer(serializers.ModelSerializer):
         read_only_fields = ['status', 'session_ids', 'error', 'created_at']
 
 
+PROGRESS_FIELDS = [
+    'stage',
+    'rows_read',
+    'rows_prelinked',
+    'rows_embedded',
+    'rows_matched',
+    'rows_queued',
+    'stage_timings',
+]
+
+
 class SupplierFeedDetailSerializer(SupplierFeedSerializer):
-    """Detail serializer — adds computed entry statistics."""
+    """Detail serializer — adds computed entry statistics and matching progress."""
 
     total = serializers.SerializerMethodField()
     matched = serializers.SerializerMethodField()
@@ -114,7 +125,8 @@ class SupplierFeedDetailSerializer(SupplierFeedSerializer):
     skipped = serializers.SerializerMethodField()
 
     class Meta(SupplierFeedSerializer.Meta):
-        fields = SupplierFeedSerializer.Meta.fields + ['total', 'matched', 'queued', 'skipped']
+        fields = SupplierFeedSerializer.Meta.fields + ['total', 'matched', 'queued', 'skipped'] + PROGRESS_FIELDS
+        read_only_fields = SupplierFeedSerializer.Meta.read_only_fields + PROGRESS_FIELDS
 
     def get_total(self, obj) -> int:
         return obj.entries.count()
@@ -6,6 +6,7 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from core.pagination import KeysetPagination
 from supplier_feed.models import (
     FeedMapping,
     SupplierFeed,
@@ -51,6 +52,15 @@ class _QueuePagination(PageNumberPagination):
     max_page_size = 200
 
 
+class SupplierLinkPagination(KeysetPagination):
+    """Links stay an unpaginated list unless ``?cursor=`` is passed (empty for
+    the first page), which walks them by ``id`` in keyset pages."""
+
+    cursor_required = True
+    page_size = 500
+    max_page_size = 5000
+
+
 class FeedMappingViewSet(viewsets.ModelViewSet):
     """CRUD для конфигурации выгрузок поставщика."""
 
@@ -453,6 +463,7 @@ class SupplierLinkViewSet(
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'delete', 'patch', 'head', 'options']
+    pagination_class = SupplierLinkPagination
 
     def get_queryset(self):
         qs = SupplierLink.objects.select_related('supplier', 'product').order_by('id')
@@ -1,58 +1,314 @@
 """Supplier feed matching module.
 
 Deep module with a single public function:
-    run_matching(feed, rows) -> {'matched': int, 'queued': int}
+    run_matching(feed, rows) -> {'matched': int, 'queued': int, 'skipped': int,
+                                 'prematched': int, 'embedded': int,
+                                 'embed_per_sec': float}
 
 Algorithm:
   1. Load all SupplierLink records for the supplier into a dict (one DB query).
+     ``rows`` is then consumed in chunks of FEED_MATCH_CHUNK_SIZE; steps 2–6
+     run per chunk, so entries are written incrementally.
   2. For rows with a cached link → create SupplierFeedEntry immediately.
-  3. For the rest → call embed_query() per row (asymmetric query mode).
-  4. For each embedding, find the nearest Product via CosineDistance HNSW index.
+  3. Deterministic pre-match for the rest, as set-based lookups over the
+     whole chunk: exact Product.sku, normalized SKU (punctuation/case
+     stripped), exact normalized name. Hits are matched and linked without
+     touching the embedder.
+  4. For the rest → call embed_queries() in batches of FEED_EMBED_BATCH_SIZE
+     (asymmetric query mode), up to FEED_EMBED_CONCURRENCY batches in flight.
+  5. For each embedding, find the nearest Products via the HNSW index —
+     FEED_KNN_BATCH_SIZE query vectors per round trip (LATERAL join), with
+     candidate metadata loaded once for the union of hit ids.
      - score >= threshold  → auto-match: create SupplierFeedEntry + SupplierLink.
      - score <  threshold  → queue:      create SupplierFeedEntry with
                                           product=None and top-N candidates.
-  5. Bulk-write all entries; bulk-create new links with update_conflicts.
+  6. Bulk-write the chunk's entries; bulk-create new links with update_conflicts.
 
-Mocking point for tests:  patch 'supplier_feed.matcher.embed_query'.
+Mocking point for tests:  patch 'supplier_feed.matcher.embed_queries'.
 """
 from __future__ import annotations
 
 import logging
-from typing import Any
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
 
-from pgvector.django import CosineDistance
+from django.db import connection
 
 from product.models import Product
-from product.services.embeddings import embed_query
-from .models import SupplierFeedEntry, SupplierLink
+from product.services.embeddings import embed_queries
+from .models import (
+    SupplierFeedEntry,
+    SupplierLink,
+    MATCH_STAGE_LINK,
+    MATCH_STAGE_SKU,
+    MATCH_STAGE_SKU_NORMALIZED,
+    MATCH_STAGE_NAME,
+    MATCH_STAGE_VECTOR,
+)
 
 logger = logging.getLogger(__name__)
 
 TOP_N_CANDIDATES = 5
 
+# Stages reported to ``progress_callback`` and used as keys of its timings.
+STAGE_READING = 'reading'
+STAGE_LINKING = 'linking'
+STAGE_EMBEDDING = 'embedding'
+STAGE_SEARCHING = 'searching'
+STAGE_WRITING = 'writing'
+STAGES = (STAGE_READING, STAGE_LINKING, STAGE_EMBEDDING, STAGE_SEARCHING, STAGE_WRITING)
 
-def run_matching(feed, rows: list[dict[str, Any]]) -> dict[str, int]:
+ProgressCallback = Callable[[str | None, dict[str, int], dict[str, float]], None]
+
+# Texts per /api/embed request and how many requests may be in flight at once.
+FEED_EMBED_BATCH_SIZE = int(os.environ.get('FEED_EMBED_BATCH_SIZE', '64'))
+FEED_EMBED_CONCURRENCY = int(os.environ.get('FEED_EMBED_CONCURRENCY', '2'))
+# Rows matched and written per chunk; bounds memory for streamed feeds.
+FEED_MATCH_CHUNK_SIZE = int(os.environ.get('FEED_MATCH_CHUNK_SIZE', '2000'))
+# Query vectors resolved per KNN round trip.
+FEED_KNN_BATCH_SIZE = int(os.environ.get('FEED_KNN_BATCH_SIZE', '200'))
+
+
+def _embed_all(texts: list[str]) -> list[list[float]]:
+    """Embed ``texts`` in batches, keeping input order.
+
+    With ``FEED_EMBED_CONCURRENCY > 1`` batches are posted from a small thread
+    pool; the embedder call is pure I/O so threads are enough.
+    """
+    size = max(1, FEED_EMBED_BATCH_SIZE)
+    batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+    workers = min(max(1, FEED_EMBED_CONCURRENCY), len(batches))
+    if workers <= 1:
+        results = [embed_queries(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(embed_queries, batches))
+    return [vec for batch in results for vec in batch]
+
+
+# Normalization is done in SQL on both sides of the comparison, so feed
+# values and catalogue values are folded by the same (collation-aware) rules.
+_SKU_KEY_SQL = "upper(regexp_replace({}, '[^[:alnum:]]+', '', 'g'))"
+_NAME_KEY_SQL = r"lower(regexp_replace(btrim({}), '\s+', ' ', 'g'))"
+
+
+def _unique_lookup(column: str, key_sql: str, values: set[str]) -> dict[str, int]:
+    """``{feed value: product id}`` for values whose normalized key (``key_sql``
+    applied to both the value and ``Product.<column>``) hits exactly one product.
+    """
+    if not values:
+        return {}
+    table = connection.ops.quote_name(Product._meta.db_table)
+    sql = (
+        f'SELECT q.value, p.id FROM unnest(%s::text[]) AS q(value) '
+        f'JOIN {table} p ON {key_sql.format("p." + column)} = {key_sql.format("q.value")}'
+    )
+    found: dict[str, int | None] = {}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [sorted(values)])
+        for value, pk in cursor.fetchall():
+            found[value] = None if value in found else pk
+    return {value: pk for value, pk in found.items() if pk is not None}
+
+
+def _prematch(rows: list[dict], sku_col: str, name_col: str) -> list[tuple[int, str] | None]:
+    """Deterministic matches for ``rows``: ``(product_id, stage)`` or None.
+
+    One query per stage for the whole feed. Normalized lookups only accept
+    keys that resolve to a single product, so ambiguous rows fall through to
+    the vector search.
+    """
+    result: list[tuple[int, str] | None] = [None] * len(rows)
+    if not rows or not (sku_col or name_col):
+        return result
+
+    skus = [str(row.get(sku_col) or '').strip() if sku_col else '' for row in rows]
+    names = [str(row.get(name_col) or '').strip() if name_col else '' for row in rows]
+
+    exact = dict(
+        Product.objects.filter(sku__in={s for s in skus if s}).values_list('sku', 'pk')
+    ) if any(skus) else {}
+    pending = []
+    for i, sku in enumerate(skus):
+        if sku in exact:
+            result[i] = (exact[sku], MATCH_STAGE_SKU)
+        else:
+            pending.append(i)
+
+    by_sku = _unique_lookup('sku', _SKU_KEY_SQL, {skus[i] for i in pending if skus[i]})
+    still_pending = []
+    for i in pending:
+        pk = by_sku.get(skus[i])
+        if pk is not None:
+            result[i] = (pk, MATCH_STAGE_SKU_NORMALIZED)
+        else:
+            still_pending.append(i)
+
+    by_name = _unique_lookup('name', _NAME_KEY_SQL, {names[i] for i in still_pending if names[i]})
+    for i in still_pending:
+        pk = by_name.get(names[i])
+        if pk is not None:
+            result[i] = (pk, MATCH_STAGE_NAME)
+    return result
+
+
+def _vector_literal(vec: list[float]) -> str:
+    return '[' + ','.join(repr(float(x)) for x in vec) + ']'
+
+
+def _nearest_products(vectors: list[list[float]], limit: int) -> list[list[tuple[Product, float]]]:
+    """Top-``limit`` products by cosine distance for every query vector.
+
+    Each chunk of vectors is one statement: ``unnest`` the vectors with their
+    position and ``LATERAL`` join an ``ORDER BY embedding <=> vec LIMIT n``
+    subquery, which the planner serves from the ``product_emb_hnsw`` index per
+    vector. Product rows (with category/brand) are then loaded once for the
+    union of hit ids. Returns ``(product, distance)`` lists in input order.
+    """
+    table = connection.ops.quote_name(Product._meta.db_table)
+    sql = f'''
+        SELECT q.ord, hit.id, hit.distance
+        FROM unnest(%s::vector[]) WITH ORDINALITY AS q(vec, ord)
+        CROSS JOIN LATERAL (
+            SELECT p.id, p.embedding <=> q.vec AS distance
+            FROM {table} p
+            WHERE p.embedding IS NOT NULL
+            ORDER BY p.embedding <=> q.vec
+            LIMIT %s
+        ) hit
+        ORDER BY q.ord, hit.distance
+    '''
+    hits: list[list[tuple[int, float]]] = [[] for _ in vectors]
+    size = max(1, FEED_KNN_BATCH_SIZE)
+    with connection.cursor() as cursor:
+        for start in range(0, len(vectors), size):
+            chunk = vectors[start:start + size]
+            cursor.execute(sql, [[_vector_literal(v) for v in chunk], limit])
+            for ord_, product_id, distance in cursor.fetchall():
+                hits[start + ord_ - 1].append((product_id, float(distance)))
+
+    ids = {product_id for row_hits in hits for product_id, _ in row_hits}
+    products = Product.objects.select_related('category', 'brand').in_bulk(ids) if ids else {}
+    return [
+        [(products[product_id], distance) for product_id, distance in row_hits if product_id in products]
+        for row_hits in hits
+    ]
+
+
+def _chunks(rows: Iterable[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    it = iter(rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+class _StageClock:
+    """Accumulates wall time per stage and reports every stage switch."""
+
+    def __init__(self, counters: dict[str, int], callback: ProgressCallback | None):
+        self.counters = counters
+        self.timings: dict[str, float] = {}
+        self._callback = callback
+        self._current: str | None = None
+        self._started = 0.0
+
+    def enter(self, stage: str | None) -> None:
+        now = time.monotonic()
+        if self._current is not None:
+            self.timings[self._current] = self.timings.get(self._current, 0.0) + now - self._started
+        self._current, self._started = stage, now
+        if self._callback is not None:
+            self._callback(stage, dict(self.counters), {k: round(v, 3) for k, v in self.timings.items()})
+
+    def stop(self) -> None:
+        self.enter(None)
+
+
+def run_matching(
+    feed,
+    rows: Iterable[dict[str, Any]],
+    progress_callback: ProgressCallback | None = None,
+) -> dict[str, int]:
     """Match feed rows against the Product catalogue.
 
     Creates ``SupplierFeedEntry`` records for every row and ``SupplierLink``
     records for every automatic match (either via cached link or high-score
     vector similarity).
 
-    Returns ``{'matched': int, 'queued': int, 'skipped': int}``.
+    ``rows`` may be any iterable (e.g. a generator streaming a file); it is
+    consumed in chunks of ``FEED_MATCH_CHUNK_SIZE`` and each chunk's entries
+    are written before the next one is read.
+
+    ``progress_callback(stage, counters, timings)`` is called on every stage
+    switch (``stage`` is one of ``STAGES``, or None once done) with running
+    ``counters`` (``read``, ``prelinked``, ``embedded``, ``matched``,
+    ``queued``, ``skipped``) and seconds spent per stage so far.
+
+    Returns ``{'matched': int, 'queued': int, 'skipped': int, 'prematched': int,
+    'embedded': int, 'embed_per_sec': float}``. ``prematched`` is the part of
+    ``matched`` resolved by the SKU/name stage.
     """
-    mapping = feed.feed_mapping
-    sku_col: str = mapping.supplier_sku_column
-    id_cols: list[str] = list(mapping.identity_columns or [])
-    var_cols: list[str] = list(mapping.variable_columns or [])
-    threshold: float = float(mapping.auto_match_threshold)
+    counters = dict.fromkeys(('read', 'prelinked', 'embedded', 'matched', 'queued', 'skipped'), 0)
+    clock = _StageClock(counters, progress_callback)
 
     # ── Step 1: load all SupplierLink records for this supplier (one query) ──
     # product_id=None means ignore-link (permanent skip marker).
+    clock.enter(STAGE_LINKING)
     cached_links: dict[str, int | None] = {
         sl.supplier_sku: sl.product_id
         for sl in SupplierLink.objects.filter(supplier=feed.supplier)
     }
 
+    prematched = 0
+    chunks = _chunks(rows, max(1, FEED_MATCH_CHUNK_SIZE))
+    while True:
+        clock.enter(STAGE_READING)
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        counters['read'] += len(chunk)
+        chunk_stats = _match_chunk(feed, chunk, cached_links, clock)
+        prematched += chunk_stats['prematched']
+        counters['prelinked'] += chunk_stats['linked'] + chunk_stats['prematched']
+        for key in ('embedded', 'matched', 'queued', 'skipped'):
+            counters[key] += chunk_stats[key]
+    clock.stop()
+
+    embedded = counters['embedded']
+    embed_seconds = clock.timings.get(STAGE_EMBEDDING, 0.0)
+    embed_per_sec = round(embedded / embed_seconds, 1) if embedded and embed_seconds > 0 else 0.0
+    logger.info(
+        'run_matching feed=%s matched=%d (prematched=%d) queued=%d skipped=%d embedded=%d (%.1f/s) timings=%s',
+        feed.pk, counters['matched'], prematched, counters['queued'], counters['skipped'],
+        embedded, embed_per_sec, {k: round(v, 2) for k, v in clock.timings.items()},
+    )
+    return {
+        'matched': counters['matched'],
+        'queued': counters['queued'],
+        'skipped': counters['skipped'],
+        'prematched': prematched,
+        'embedded': embedded,
+        'embed_per_sec': embed_per_sec,
+    }
+
+
+def _match_chunk(
+    feed,
+    rows: list[dict[str, Any]],
+    cached_links: dict[str, int | None],
+    clock: _StageClock,
+) -> dict[str, int]:
+    """Steps 2–6 for one chunk of rows. New links are added to ``cached_links``
+    so later chunks resolve repeated SKUs without another search.
+    """
+    mapping = feed.feed_mapping
+    sku_col: str = mapping.supplier_sku_column
+    id_cols: list[str] = list(mapping.identity_columns or [])
+    var_cols: list[str] = list(mapping.variable_columns or [])
+    threshold: float = float(mapping.auto_match_threshold)
+
     entries_to_create: list[SupplierFeedEntry] = []
     links_to_create: list[SupplierLink] = []
     need_embed: list[tuple[dict, str, dict]] = []
@@ -62,6 +318,7 @@ def run_matching(feed, rows: list[dict[str, Any]]) -> dict[str, int]:
     skipped = 0
 
     # ── Step 2: partition rows into linked / ignore-linked / unlinked ─────────
+    clock.enter(STAGE_LINKING)
     for row in rows:
         supplier_sku = str(row.get(sku_col) or '').strip()
         if not supplier_sku:
@@ -87,30 +344,56 @@ def run_matching(feed, rows: list[dict[str, Any]]) -> dict[str, int]:
                     supplier_sku=supplier_sku,
                     product_id=product_id,
                     data=data,
+                    match_stage=MATCH_STAGE_LINK,
                 ))
                 matched += 1
         else:
             need_embed.append((row, supplier_sku, data))
+    linked = matched
 
-    # ── Steps 3–4: embed unlinked rows and find nearest product ───────────────
-    for row, supplier_sku, data in need_embed:
-        identity_text = ' '.join(
-            str(row.get(col, '')) for col in id_cols if col in row
-        ).strip() or supplier_sku
-
-        vec = embed_query(identity_text)
+    # ── Step 3: deterministic SKU / name pre-match ─────────────────────────────
+    prematches = _prematch(
+        [row for row, _sku, _data in need_embed],
+        mapping.product_sku_column,
+        mapping.product_name_column,
+    )
+    prematched = 0
+    unresolved: list[tuple[dict, str, dict]] = []
+    for (row, supplier_sku, data), hit in zip(need_embed, prematches):
+        if hit is None:
+            unresolved.append((row, supplier_sku, data))
+            continue
+        product_id, stage = hit
+        entries_to_create.append(SupplierFeedEntry(
+            feed=feed,
+            supplier_sku=supplier_sku,
+            product_id=product_id,
+            data=data,
+            match_stage=stage,
+        ))
+        links_to_create.append(SupplierLink(
+            supplier=feed.supplier,
+            supplier_sku=supplier_sku,
+            product_id=product_id,
+        ))
+        prematched += 1
+    matched += prematched
+    need_embed = unresolved
 
-        candidates = list(
-            Product.objects
-            .filter(embedding__isnull=False)
-            .select_related('category', 'brand')
-            .annotate(distance=CosineDistance('embedding', vec))
-            .order_by('distance')[:TOP_N_CANDIDATES]
-        )
+    # ── Step 4: embed remaining rows in batches ────────────────────────────────
+    clock.enter(STAGE_EMBEDDING)
+    identity_texts = [
+        ' '.join(str(row.get(col, '')) for col in id_cols if col in row).strip() or supplier_sku
+        for row, supplier_sku, _data in need_embed
+    ]
+    vectors = _embed_all(identity_texts)
 
+    # ── Step 5: find nearest products for all embeddings in bulk ──────────────
+    clock.enter(STAGE_SEARCHING)
+    neighbours = _nearest_products(vectors, TOP_N_CANDIDATES) if vectors else []
+    for (row, supplier_sku, data), candidates in zip(need_embed, neighbours):
         if candidates:
-            best = candidates[0]
-            best_dist = float(best.distance) if best.distance is not None else 2.0
+            best, best_dist = candidates[0]
             similarity = 1.0 - best_dist
         else:
             best = None
@@ -124,6 +407,7 @@ def run_matching(feed, rows: list[dict[str, Any]]) -> dict[str, int]:
                 product_id=best.pk,
                 data=data,
                 best_score=round(similarity, 4),
+                match_stage=MATCH_STAGE_VECTOR,
             ))
             links_to_create.append(SupplierLink(
                 supplier=feed.supplier,
@@ -136,13 +420,13 @@ def run_matching(feed, rows: list[dict[str, Any]]) -> dict[str, int]:
             candidate_list = [
                 {
                     'product_id': p.pk,
-                    'score': round(1.0 - float(p.distance), 4),
+                    'score': round(1.0 - distance, 4),
                     'name': p.name,
                     'sku': p.sku,
                     'category': p.category.name if p.category_id else None,
                     'brand': p.brand.name if p.brand_id else None,
                 }
-                for p in candidates
+                for p, distance in candidates
             ]
             queued_score = round(similarity, 4) if best is not None else None
             entries_to_create.append(SupplierFeedEntry(
@@ -155,7 +439,8 @@ def run_matching(feed, rows: list[dict[str, Any]]) -> dict[str, int]:
             ))
             queued += 1
 
-    # ── Step 5: bulk-write entries and new links ───────────────────────────────
+    # ── Step 6: bulk-write entries and new links ───────────────────────────────
+    clock.enter(STAGE_WRITING)
     if entries_to_create:
         SupplierFeedEntry.objects.bulk_create(entries_to_create, batch_size=500)
 
@@ -167,7 +452,13 @@ def run_matching(feed, rows: list[dict[str, Any]]) -> dict[str, int]:
             unique_fields=['supplier', 'supplier_sku'],
         )
 
-    logger.info(
-        'run_matching feed=%s matched=%d queued=%d skipped=%d', feed.pk, matched, queued, skipped
-    )
-    return {'matched': matched, 'queued': queued, 'skipped': skipped}
+    cached_links.update((link.supplier_sku, link.product_id) for link in links_to_create)
+
+    return {
+        'matched': matched,
+        'queued': queued,
+        'skipped': skipped,
+        'linked': linked,
+        'prematched': prematched,
+        'embedded': len(vectors),
+    }
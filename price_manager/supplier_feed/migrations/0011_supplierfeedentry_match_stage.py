@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplier_feed', '0010_remove_feedmarkuprule_markup_set_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplierfeedentry',
+            name='match_stage',
+            field=models.CharField(blank=True, choices=[('link', 'Сохранённая связь'), ('sku', 'Артикул'), ('sku_normalized', 'Нормализованный артикул'), ('name', 'Название'), ('vector', 'Векторный поиск')], max_length=16, verbose_name='Этап матчинга'),
+        ),
+    ]
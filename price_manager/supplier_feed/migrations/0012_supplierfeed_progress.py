@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplier_feed', '0011_supplierfeedentry_match_stage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplierfeed',
+            name='rows_embedded',
+            field=models.PositiveIntegerField(default=0, verbose_name='Посчитано эмбеддингов'),
+        ),
+        migrations.AddField(
+            model_name='supplierfeed',
+            name='rows_matched',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сматчено строк'),
+        ),
+        migrations.AddField(
+            model_name='supplierfeed',
+            name='rows_prelinked',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сопоставлено без поиска'),
+        ),
+        migrations.AddField(
+            model_name='supplierfeed',
+            name='rows_queued',
+            field=models.PositiveIntegerField(default=0, verbose_name='Строк в очереди'),
+        ),
+        migrations.AddField(
+            model_name='supplierfeed',
+            name='rows_read',
+            field=models.PositiveIntegerField(default=0, verbose_name='Прочитано строк'),
+        ),
+        migrations.AddField(
+            model_name='supplierfeed',
+            name='stage',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Этап'),
+        ),
+        migrations.AddField(
+            model_name='supplierfeed',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Время по этапам, с'),
+        ),
+    ]
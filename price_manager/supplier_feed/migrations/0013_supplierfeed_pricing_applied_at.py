@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplier_feed', '0012_supplierfeed_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplierfeed',
+            name='pricing_applied_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Цены применены'),
+        ),
+    ]
@@ -20,6 +20,23 @@ STATUS_CHOICES = [
 ]
 
 
+# ── SupplierFeedEntry match stages ──────────────────────────────────────────
+
+MATCH_STAGE_LINK = 'link'
+MATCH_STAGE_SKU = 'sku'
+MATCH_STAGE_SKU_NORMALIZED = 'sku_normalized'
+MATCH_STAGE_NAME = 'name'
+MATCH_STAGE_VECTOR = 'vector'
+
+MATCH_STAGE_CHOICES = [
+    (MATCH_STAGE_LINK, 'Сохранённая связь'),
+    (MATCH_STAGE_SKU, 'Артикул'),
+    (MATCH_STAGE_SKU_NORMALIZED, 'Нормализованный артикул'),
+    (MATCH_STAGE_NAME, 'Название'),
+    (MATCH_STAGE_VECTOR, 'Векторный поиск'),
+]
+
+
 class FeedMapping(models.Model):
     supplier = models.ForeignKey(
         'supplier.Supplier',
@@ -74,6 +91,18 @@ class SupplierFeed(models.Model):
     )
     session_ids = models.JSONField('ID сессий файлов', default=list)
     error = models.TextField('Ошибка', blank=True)
+    # Progress of run_feed_matching_task, written per chunk with narrow
+    # QuerySet.update() calls (same envelope as product.ImportJob).
+    stage = models.CharField('Этап', max_length=64, blank=True, default='')
+    rows_read = models.PositiveIntegerField('Прочитано строк', default=0)
+    rows_prelinked = models.PositiveIntegerField('Сопоставлено без поиска', default=0)
+    rows_embedded = models.PositiveIntegerField('Посчитано эмбеддингов', default=0)
+    rows_matched = models.PositiveIntegerField('Сматчено строк', default=0)
+    rows_queued = models.PositiveIntegerField('Строк в очереди', default=0)
+    stage_timings = models.JSONField('Время по этапам, с', default=dict, blank=True)
+    # Set by pricing.tasks.apply_feed_pricing; the latest value per supplier is
+    # the point rule date windows are compared against on the next run.
+    pricing_applied_at = models.DateTimeField('Цены применены', null=True, blank=True)
     created_at = models.DateTimeField('Создано', auto_now_add=True)
 
     class Meta:
@@ -106,6 +135,12 @@ class SupplierFeedEntry(models.Model):
     match_candidates = models.JSONField('Кандидаты на матчинг', default=list)
     best_score = models.FloatField('Лучший скор матчинга', null=True, blank=True)
     skipped = models.BooleanField('Пропущено', default=False)
+    match_stage = models.CharField(
+        'Этап матчинга',
+        max_length=16,
+        choices=MATCH_STAGE_CHOICES,
+        blank=True,
+    )
     created_at = models.DateTimeField('Создано', auto_now_add=True)
 
     class Meta:
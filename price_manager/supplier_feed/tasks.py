@@ -9,10 +9,16 @@ Status lifecycle driven by this task:
     processing  ──exception         ──►  error
 
 Concurrency: a per-feed Redis lock prevents parallel runs for the same feed.
+
+Progress (``stage``, ``rows_*`` counters, ``stage_timings``) is written to the
+feed on every matcher stage switch with a narrow ``QuerySet.update()``, so
+clients can poll the feed detail endpoint while the task runs.
 """
 from __future__ import annotations
 
 import logging
+import os
+from typing import Iterator
 
 from celery import shared_task
 from django.core.cache import cache
@@ -32,29 +38,74 @@ logger = logging.getLogger(__name__)
 
 _LOCK_TTL = 3600  # seconds
 
+STAGE_LABELS = {
+    matcher.STAGE_READING: 'Читаем строки',
+    matcher.STAGE_LINKING: 'Ищем связи и артикулы',
+    matcher.STAGE_EMBEDDING: 'Считаем эмбеддинги',
+    matcher.STAGE_SEARCHING: 'Ищем кандидатов',
+    matcher.STAGE_WRITING: 'Записываем в БД',
+}
+
+# Rows converted from the pipeline DataFrame to dicts at a time.
+FEED_INGEST_CHUNK_SIZE = int(os.environ.get('FEED_INGEST_CHUNK_SIZE', '2000'))
+
 
 def _build_lock_key(feed_id: int) -> str:
     return f'supplier-feed-matching:{feed_id}'
 
 
-def _read_rows_from_sessions(feed: SupplierFeed) -> list[dict]:
-    """Apply the FeedMapping pipeline to each session file and return combined rows."""
+def _read_rows_from_sessions(feed: SupplierFeed) -> Iterator[dict]:
+    """Apply the FeedMapping pipeline to each session file and yield its rows.
+
+    Only one session's DataFrame is alive at a time, and rows are converted to
+    dicts ``FEED_INGEST_CHUNK_SIZE`` at a time, so the matcher (which writes
+    entries per chunk) never sees the whole feed as a list.
+    """
     pipeline = feed.feed_mapping.dataframe
-    all_rows: list[dict] = []
+    chunk_size = max(1, FEED_INGEST_CHUNK_SIZE)
     for session_id in feed.session_ids:
         fobj = session_store.open_session_file(session_id)
         try:
             df = dataframe_services.apply(pipeline, fobj, session_id=session_id)
-            # Replace NaN/NaT/NA with None so JSONB serialization never sees
-            # the bare "NaN" token, which PostgreSQL rejects as invalid JSON.
-            clean = df.where(df.notna(), other=None)
-            all_rows.extend(clean.to_dict(orient='records'))
         finally:
             try:
                 fobj.close()
             except Exception:
                 pass
-    return all_rows
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            # Replace NaN/NaT/NA with None so JSONB serialization never sees
+            # the bare "NaN" token, which PostgreSQL rejects as invalid JSON.
+            clean = chunk.where(chunk.notna(), other=None)
+            yield from clean.to_dict(orient='records')
+        del df
+
+
+def _reset_progress(feed: SupplierFeed) -> None:
+    SupplierFeed.objects.filter(pk=feed.pk).update(
+        stage='',
+        rows_read=0,
+        rows_prelinked=0,
+        rows_embedded=0,
+        rows_matched=0,
+        rows_queued=0,
+        stage_timings={},
+    )
+
+
+def _progress_writer(feed: SupplierFeed):
+    def _on_progress(stage, counters, timings) -> None:
+        # Narrow update — status/error stay owned by the task body.
+        SupplierFeed.objects.filter(pk=feed.pk).update(
+            stage=STAGE_LABELS.get(stage, ''),
+            rows_read=counters['read'],
+            rows_prelinked=counters['prelinked'],
+            rows_embedded=counters['embedded'],
+            rows_matched=counters['matched'],
+            rows_queued=counters['queued'],
+            stage_timings=timings,
+        )
+    return _on_progress
 
 
 def _cleanup_sessions(feed: SupplierFeed) -> None:
@@ -69,16 +120,17 @@ def _cleanup_sessions(feed: SupplierFeed) -> None:
 
 
 @shared_task
-def run_feed_matching_task(feed_id: int) -> None:
+def run_feed_matching_task(feed_id: int) -> dict | None:
     """Match all rows in a SupplierFeed session against the Product catalogue.
 
     Sets ``feed.status`` to 'matched', 'partial', or 'error' when done.
     Uses a Redis lock to prevent concurrent execution for the same feed.
+    Returns the matcher stats (incl. ``embed_per_sec``) as the task result.
     """
     lock_key = _build_lock_key(feed_id)
     if not cache.add(lock_key, '1', timeout=_LOCK_TTL):
         logger.info('run_feed_matching_task: lock exists for feed %s, skipping', feed_id)
-        return
+        return None
 
     try:
         try:
@@ -87,17 +139,19 @@ def run_feed_matching_task(feed_id: int) -> None:
             )
         except SupplierFeed.DoesNotExist:
             logger.warning('run_feed_matching_task: feed %s not found', feed_id)
-            return
+            return None
 
         try:
+            _reset_progress(feed)
             rows = _read_rows_from_sessions(feed)
-            stats = matcher.run_matching(feed, rows)
+            stats = matcher.run_matching(feed, rows, progress_callback=_progress_writer(feed))
 
             _cleanup_sessions(feed)
 
             feed.status = STATUS_MATCHED if stats['queued'] == 0 else STATUS_PARTIAL
             feed.error = ''
             feed.save(update_fields=['status', 'error'])
+            return stats
 
         except Exception as exc:
             logger.exception(
@@ -106,6 +160,7 @@ def run_feed_matching_task(feed_id: int) -> None:
             feed.status = STATUS_ERROR
             feed.error = f'{type(exc).__name__}: {exc}'
             feed.save(update_fields=['status', 'error'])
+            return None
 
     finally:
         cache.delete(lock_key)
@@ -141,6 +141,17 @@ class FeedDetailStatsTests(SupplierFeedApiBase):
         self.assertEqual(data['queued'], 1)
         self.assertEqual(data['skipped'], 1)
 
+    def test_detail_exposes_matching_progress(self):
+        SupplierFeed.objects.filter(pk=self.feed_id).update(
+            stage='Считаем эмбеддинги', rows_read=10, rows_embedded=4, stage_timings={'embedding': 1.5},
+        )
+        data = self.client.get(reverse(FEED_DETAIL_URL, args=[self.feed_id])).json()
+        self.assertEqual(data['stage'], 'Считаем эмбеддинги')
+        self.assertEqual(data['rows_read'], 10)
+        self.assertEqual(data['rows_embedded'], 4)
+        self.assertEqual(data['rows_prelinked'], 0)
+        self.assertEqual(data['stage_timings'], {'embedding': 1.5})
+
 
 # ── Cycle 6 ───────────────────────────────────────────────────────────────────
 
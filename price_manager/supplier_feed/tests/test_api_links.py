@@ -211,6 +211,25 @@ class PatchLinkTests(SupplierLinkApiBase):
         self.assertEqual(resp.status_code, 400)
 
 
+# ── Cursor pagination ────────────────────────────────────────────────────────
+
+class LinkCursorPaginationTests(SupplierLinkApiBase):
+    def test_cursor_pages_by_id(self):
+        links = [self._make_link(sku=f'ART-{i}') for i in range(3)]
+
+        first = self.client.get(reverse(LINK_LIST_URL) + '?cursor=&page_size=2').json()
+        self.assertEqual([row['id'] for row in first['results']], [l.pk for l in links[:2]])
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual([row['id'] for row in second['results']], [links[2].pk])
+        self.assertIsNone(second['next'])
+
+    def test_without_cursor_list_stays_unpaginated(self):
+        self._make_link()
+        resp = self.client.get(reverse(LINK_LIST_URL) + '?page_size=1')
+        self.assertIsInstance(resp.json(), list)
+
+
 # ── Cycle 10: authentication ──────────────────────────────────────────────────
 
 class AuthTests(SupplierLinkApiBase):
@@ -1,6 +1,6 @@
 """Tests for supplier_feed.matcher.run_matching — behavior via public interface.
 
-Each class covers one algorithmic branch.  The embedder (embed_query) is always
+Each class covers one algorithmic branch.  The embedder (embed_queries) is always
 mocked so no live Ollama instance is required.  pgvector CosineDistance is
 exercised through real Product rows in the test database.
 """
@@ -8,18 +8,25 @@ from __future__ import annotations
 
 from unittest.mock import patch, call
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from product.models import Brand, Category, Product
-from supplier_feed.matcher import run_matching
+from supplier_feed.matcher import _NAME_KEY_SQL, _SKU_KEY_SQL, _unique_lookup, run_matching
 from supplier_feed.models import (
     SupplierFeed,
     SupplierFeedEntry,
     SupplierLink,
+    MATCH_STAGE_LINK,
+    MATCH_STAGE_NAME,
+    MATCH_STAGE_SKU,
+    MATCH_STAGE_SKU_NORMALIZED,
+    MATCH_STAGE_VECTOR,
 )
 from .fixtures import make_feed_mapping, make_supplier
 
-EMBED_PATH = 'supplier_feed.matcher.embed_query'
+EMBED_PATH = 'supplier_feed.matcher.embed_queries'
 
 DIM = 256  # must match PRODUCT_EMBEDDING_DIM
 
@@ -31,6 +38,11 @@ def _unit_vec(idx: int = 0) -> list[float]:
     return v
 
 
+def _per_text(fn):
+    """Adapt a per-text fake embedder to the batched ``embed_queries`` signature."""
+    return lambda texts: [fn(text) for text in texts]
+
+
 def _make_product(name: str, sku: str, embedding: list[float] | None = None) -> Product:
     brand, _ = Brand.objects.get_or_create(name='TestBrand', defaults={'slug': 'testbrand'})
     cat, _ = Category.objects.get_or_create(name='TestCat', defaults={'slug': 'testcat'})
@@ -168,7 +180,7 @@ class VectorAutoMatchTests(TestCase):
         rows = [{'article': 'NEW-SKU', 'name': 'Шуруповерт'}]
 
         # Query embedding is identical to product embedding → cosine distance = 0
-        with patch(EMBED_PATH, return_value=_unit_vec(0)):
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))):
             stats = run_matching(self.feed, rows)
 
         self.assertEqual(stats['matched'], 1)
@@ -183,13 +195,13 @@ class VectorAutoMatchTests(TestCase):
         self.assertEqual(link.product_id, self.product.pk)
 
     def test_embed_query_called_with_identity_text(self):
-        """Identity columns are joined and passed to embed_query."""
+        """Identity columns are joined and passed to embed_queries."""
         rows = [{'article': 'NEW-SKU', 'name': 'Шуруповерт'}]
 
-        with patch(EMBED_PATH, return_value=_unit_vec(0)) as mock_embed:
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))) as mock_embed:
             run_matching(self.feed, rows)
 
-        mock_embed.assert_called_once_with('Шуруповерт')
+        mock_embed.assert_called_once_with(['Шуруповерт'])
 
 
 # ── Cycle 3: Queue path ───────────────────────────────────────────────────────
@@ -219,7 +231,7 @@ class VectorQueueTests(TestCase):
         rows = [{'article': 'UNKNOWN-SKU', 'name': 'Утюг'}]
 
         # Query vector perpendicular to product → cosine distance = 1, similarity = 0
-        with patch(EMBED_PATH, return_value=_unit_vec(1)):
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(1))):
             stats = run_matching(self.feed, rows)
 
         self.assertEqual(stats['matched'], 0)
@@ -242,7 +254,7 @@ class VectorQueueTests(TestCase):
         """Low-similarity match must NOT create a SupplierLink."""
         rows = [{'article': 'UNKNOWN-SKU', 'name': 'Утюг'}]
 
-        with patch(EMBED_PATH, return_value=_unit_vec(1)):
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(1))):
             run_matching(self.feed, rows)
 
         self.assertFalse(
@@ -255,7 +267,7 @@ class VectorQueueTests(TestCase):
         """Queued entry with candidates must have best_score populated."""
         rows = [{'article': 'SCORE-SKU', 'name': 'Утюг'}]
 
-        with patch(EMBED_PATH, return_value=_unit_vec(1)):
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(1))):
             run_matching(self.feed, rows)
 
         entry = SupplierFeedEntry.objects.get(feed=self.feed, supplier_sku='SCORE-SKU')
@@ -270,7 +282,7 @@ class VectorQueueTests(TestCase):
 
         rows = [{'article': 'GHOST-SKU', 'name': 'Что-то'}]
 
-        with patch(EMBED_PATH, return_value=_unit_vec(0)):
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))):
             stats = run_matching(self.feed, rows)
 
         self.assertEqual(stats['queued'], 1)
@@ -285,7 +297,7 @@ class VectorQueueTests(TestCase):
 
         rows = [{'article': 'NULL-SCORE-SKU', 'name': 'Что-то'}]
 
-        with patch(EMBED_PATH, return_value=_unit_vec(0)):
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))):
             run_matching(self.feed, rows)
 
         entry = SupplierFeedEntry.objects.get(feed=self.feed, supplier_sku='NULL-SCORE-SKU')
@@ -327,7 +339,7 @@ class MixedBatchTests(TestCase):
     def test_mixed_batch_returns_correct_stats_includes_skipped_key(self):
         """run_matching return dict must include 'skipped' key."""
         rows = []
-        with patch(EMBED_PATH, return_value=_unit_vec(0)):
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))):
             stats = run_matching(self.feed, rows)
         self.assertIn('skipped', stats)
 
@@ -344,7 +356,7 @@ class MixedBatchTests(TestCase):
                 return _unit_vec(2)   # identical to product_b → distance 0 → auto-match
             return _unit_vec(4)       # perpendicular to everything → queued
 
-        with patch(EMBED_PATH, side_effect=fake_embed):
+        with patch(EMBED_PATH, side_effect=_per_text(fake_embed)):
             stats = run_matching(self.feed, rows)
 
         self.assertEqual(stats['matched'], 2)
@@ -425,3 +437,239 @@ class IgnoreLinkTests(TestCase):
         self.assertEqual(stats['matched'], 1)
         entry = SupplierFeedEntry.objects.get(feed=self.feed, supplier_sku='REG-001')
         self.assertEqual(entry.product_id, product.pk)
+
+
+# ── Cycle 6: Batched embedding ───────────────────────────────────────────────
+
+class BatchedEmbeddingTests(TestCase):
+    """Unlinked rows are embedded in FEED_EMBED_BATCH_SIZE chunks, in row order."""
+
+    def setUp(self):
+        self.product = _make_product('Лобзик', 'P-030', embedding=_unit_vec(0))
+        self.feed = _make_feed()
+
+    def _rows(self, n):
+        return [{'article': f'B-{i}', 'name': f'Лобзик {i}'} for i in range(n)]
+
+    def test_rows_are_embedded_in_batches(self):
+        with patch('supplier_feed.matcher.FEED_EMBED_BATCH_SIZE', 2), \
+                patch('supplier_feed.matcher.FEED_EMBED_CONCURRENCY', 1), \
+                patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))) as mock_embed:
+            stats = run_matching(self.feed, self._rows(5))
+
+        self.assertEqual(
+            [c.args[0] for c in mock_embed.call_args_list],
+            [['Лобзик 0', 'Лобзик 1'], ['Лобзик 2', 'Лобзик 3'], ['Лобзик 4']],
+        )
+        self.assertEqual(stats['matched'], 5)
+        self.assertEqual(stats['embedded'], 5)
+        self.assertIn('embed_per_sec', stats)
+
+    def test_concurrent_batches_keep_row_order(self):
+        """Each row gets its own vector even when batches finish out of order."""
+        def fake_embed(text):
+            return _unit_vec(0) if text.endswith(('0', '2', '4')) else _unit_vec(1)
+
+        with patch('supplier_feed.matcher.FEED_EMBED_BATCH_SIZE', 1), \
+                patch('supplier_feed.matcher.FEED_EMBED_CONCURRENCY', 3), \
+                patch(EMBED_PATH, side_effect=_per_text(fake_embed)):
+            stats = run_matching(self.feed, self._rows(5))
+
+        self.assertEqual(stats['matched'], 3)
+        self.assertEqual(stats['queued'], 2)
+        matched = set(
+            SupplierFeedEntry.objects.filter(feed=self.feed, product=self.product)
+            .values_list('supplier_sku', flat=True)
+        )
+        self.assertEqual(matched, {'B-0', 'B-2', 'B-4'})
+
+
+# ── Cycle 7: Bulk nearest-neighbour search ───────────────────────────────────
+
+class BulkKnnTests(TestCase):
+    """Candidates for many rows are resolved per batch, not per row."""
+
+    def setUp(self):
+        self.products = [
+            _make_product(f'Товар {i}', f'KNN-{i}', embedding=_unit_vec(i)) for i in range(4)
+        ]
+        self.feed = _make_feed()
+
+    def _run(self, n):
+        rows = [{'article': f'R-{i}', 'name': f'Товар {i}'} for i in range(n)]
+        fake_embed = _per_text(lambda text: _unit_vec(int(text.rsplit(' ', 1)[1])))
+        with patch(EMBED_PATH, side_effect=fake_embed), CaptureQueriesContext(connection) as ctx:
+            stats = run_matching(self.feed, rows)
+        return stats, len(ctx.captured_queries)
+
+    def test_each_row_gets_its_own_nearest_product_across_chunks(self):
+        with patch('supplier_feed.matcher.FEED_KNN_BATCH_SIZE', 3):
+            stats, _ = self._run(4)
+
+        self.assertEqual(stats['matched'], 4)
+        for i, product in enumerate(self.products):
+            entry = SupplierFeedEntry.objects.get(feed=self.feed, supplier_sku=f'R-{i}')
+            self.assertEqual(entry.product_id, product.pk)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        _, one_row = self._run(1)
+        SupplierFeedEntry.objects.all().delete()
+        SupplierLink.objects.all().delete()
+        _, four_rows = self._run(4)
+        self.assertEqual(one_row, four_rows)
+
+
+# ── Cycle 8: Deterministic pre-match ─────────────────────────────────────────
+
+class PrematchTests(TestCase):
+    """SKU / name pre-match resolves rows before any embedder call."""
+
+    def setUp(self):
+        self.supplier = make_supplier(name='Supplier F')
+        self.mapping = make_feed_mapping(
+            supplier=self.supplier,
+            supplier_sku_column='article',
+            identity_columns=['name'],
+            variable_columns=[],
+            product_sku_column='vendor_code',
+            product_name_column='name',
+        )
+        self.feed = _make_feed(supplier=self.supplier, mapping=self.mapping)
+
+    def _entry(self, supplier_sku):
+        return SupplierFeedEntry.objects.get(feed=self.feed, supplier_sku=supplier_sku)
+
+    def test_exact_sku_match_skips_embedder(self):
+        product = _make_product('Дрель ударная', 'DR-100')
+        rows = [{'article': 'S-1', 'vendor_code': 'DR-100', 'name': 'Другое название'}]
+
+        with patch(EMBED_PATH) as mock_embed:
+            stats = run_matching(self.feed, rows)
+
+        mock_embed.assert_not_called()
+        self.assertEqual(stats['matched'], 1)
+        self.assertEqual(stats['prematched'], 1)
+        entry = self._entry('S-1')
+        self.assertEqual(entry.product_id, product.pk)
+        self.assertEqual(entry.match_stage, MATCH_STAGE_SKU)
+        self.assertTrue(
+            SupplierLink.objects.filter(supplier=self.supplier, supplier_sku='S-1', product=product).exists()
+        )
+
+    def test_normalized_sku_match(self):
+        product = _make_product('Пила', 'PL-200.5')
+        rows = [{'article': 'S-2', 'vendor_code': 'pl 2005', 'name': 'x'}]
+
+        with patch(EMBED_PATH) as mock_embed:
+            run_matching(self.feed, rows)
+
+        mock_embed.assert_not_called()
+        entry = self._entry('S-2')
+        self.assertEqual(entry.product_id, product.pk)
+        self.assertEqual(entry.match_stage, MATCH_STAGE_SKU_NORMALIZED)
+
+    def test_normalized_name_match(self):
+        product = _make_product('Makita  GA5030 125', 'BG-1')
+        rows = [{'article': 'S-3', 'vendor_code': '', 'name': ' makita ga5030   125 '}]
+
+        with patch(EMBED_PATH) as mock_embed:
+            run_matching(self.feed, rows)
+
+        mock_embed.assert_not_called()
+        entry = self._entry('S-3')
+        self.assertEqual(entry.product_id, product.pk)
+        self.assertEqual(entry.match_stage, MATCH_STAGE_NAME)
+
+    def test_ambiguous_name_falls_through_to_vector(self):
+        _make_product('Bosch GSR 12V', 'OT-1', embedding=_unit_vec(0))
+        _make_product('bosch gsr 12v', 'OT-2', embedding=_unit_vec(1))
+        rows = [{'article': 'S-4', 'name': 'BOSCH GSR 12V'}]
+
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))) as mock_embed:
+            stats = run_matching(self.feed, rows)
+
+        mock_embed.assert_called_once_with(['BOSCH GSR 12V'])
+        self.assertEqual(stats['prematched'], 0)
+        self.assertEqual(self._entry('S-4').match_stage, MATCH_STAGE_VECTOR)
+
+    def test_cached_link_stage(self):
+        product = _make_product('Фреза', 'FR-1')
+        SupplierLink.objects.create(supplier=self.supplier, supplier_sku='S-5', product=product)
+
+        with patch(EMBED_PATH):
+            run_matching(self.feed, [{'article': 'S-5', 'name': 'Фреза'}])
+
+        self.assertEqual(self._entry('S-5').match_stage, MATCH_STAGE_LINK)
+
+    def test_normalized_lookups_use_expression_indexes(self):
+        _make_product('Makita GA5030', 'GA-5030')
+        for column, key_sql, value, index in (
+            ('sku', _SKU_KEY_SQL, 'ga 5030', 'product_sku_key_idx'),
+            ('name', _NAME_KEY_SQL, ' makita  ga5030', 'product_name_key_idx'),
+        ):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(len(_unique_lookup(column, key_sql, {value})), 1)
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + ctx.captured_queries[0]['sql'])
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                cursor.execute('RESET enable_seqscan')
+            self.assertIn(index, plan)
+
+
+# ── Cycle 9: Chunked input ───────────────────────────────────────────────────
+
+class ChunkedInputTests(TestCase):
+    """Rows may be a generator; entries are written chunk by chunk."""
+
+    def setUp(self):
+        self.product = _make_product('Рубанок', 'P-040', embedding=_unit_vec(0))
+        self.feed = _make_feed()
+
+    def test_generator_input_is_matched_in_chunks(self):
+        written = []
+
+        def rows():
+            for i in range(5):
+                written.append(SupplierFeedEntry.objects.filter(feed=self.feed).count())
+                yield {'article': f'C-{i % 3}', 'name': 'Рубанок'}
+
+        with patch('supplier_feed.matcher.FEED_MATCH_CHUNK_SIZE', 3), \
+                patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))) as mock_embed:
+            stats = run_matching(self.feed, rows())
+
+        # The first chunk was written before rows 4–5 were read.
+        self.assertEqual(written, [0, 0, 0, 3, 3])
+        self.assertEqual(stats['matched'], 5)
+        # C-0 and C-1 repeat in the second chunk and reuse the links made in the first.
+        self.assertEqual(mock_embed.call_count, 1)
+        self.assertEqual(
+            SupplierFeedEntry.objects.filter(feed=self.feed, match_stage=MATCH_STAGE_LINK).count(), 2
+        )
+
+
+# ── Cycle 10: Progress reporting ─────────────────────────────────────────────
+
+class ProgressCallbackTests(TestCase):
+    def setUp(self):
+        self.supplier = make_supplier(name='Supplier G')
+        self.product = _make_product('Стамеска', 'P-050', embedding=_unit_vec(0))
+        SupplierLink.objects.create(supplier=self.supplier, supplier_sku='L-1', product=self.product)
+        self.feed = _make_feed(supplier=self.supplier)
+
+    def test_stages_and_counters_are_reported(self):
+        calls = []
+        rows = [{'article': 'L-1', 'name': 'x'}, {'article': 'N-1', 'name': 'Стамеска'}]
+
+        with patch(EMBED_PATH, side_effect=_per_text(lambda _: _unit_vec(0))):
+            run_matching(self.feed, rows, progress_callback=lambda *args: calls.append(args))
+
+        stages = [stage for stage, _counters, _timings in calls]
+        self.assertEqual(stages[:6], ['linking', 'reading', 'linking', 'embedding', 'searching', 'writing'])
+        self.assertEqual(stages[-2:], ['reading', None])
+        _stage, counters, timings = calls[-1]
+        self.assertEqual(
+            counters,
+            {'read': 2, 'prelinked': 1, 'embedded': 1, 'matched': 2, 'queued': 0, 'skipped': 0},
+        )
+        self.assertEqual(set(timings), {'reading', 'linking', 'embedding', 'searching', 'writing'})
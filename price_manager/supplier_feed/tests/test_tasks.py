@@ -151,6 +151,27 @@ class FeedMatchingTaskTests(TestCase):
         run_feed_matching_task(999_999_999)  # must not raise
 
 
+    # ── Progress envelope ─────────────────────────────────────────────────────
+
+    def test_progress_counters_are_written_to_feed(self):
+        """Real matcher run → rows_* counters, final stage and timings on the feed."""
+        feed = self._make_feed()
+        rows = [{'article': 'P-1'}, {'article': 'P-2'}]
+
+        with patch(_READ_ROWS_PATH, return_value=rows), \
+                patch('supplier_feed.matcher.embed_queries', side_effect=lambda texts: [[1.0] * 256 for _ in texts]):
+            stats = run_feed_matching_task(feed.pk)
+
+        feed.refresh_from_db()
+        self.assertEqual(stats['queued'], 2)
+        self.assertEqual(feed.rows_read, 2)
+        self.assertEqual(feed.rows_prelinked, 0)
+        self.assertEqual(feed.rows_embedded, 2)
+        self.assertEqual(feed.rows_queued, 2)
+        self.assertEqual(feed.stage, '')
+        self.assertIn('embedding', feed.stage_timings)
+
+
 class ReadRowsNanSanitizationTests(TestCase):
     """_read_rows_from_sessions must replace NaN/NaT with None.
 
@@ -172,7 +193,7 @@ class ReadRowsNanSanitizationTests(TestCase):
 
         with patch('supplier_feed.tasks.session_store.open_session_file', return_value=MagicMock()):
             with patch('supplier_feed.tasks.dataframe_services.apply', return_value=df_with_nan):
-                rows = _read_rows_from_sessions(feed)
+                rows = list(_read_rows_from_sessions(feed))
 
         self.assertEqual(len(rows), 2)
         self.assertIsNone(rows[0]['price'])
@@ -192,6 +213,37 @@ class ReadRowsNanSanitizationTests(TestCase):
 
         with patch('supplier_feed.tasks.session_store.open_session_file', return_value=MagicMock()):
             with patch('supplier_feed.tasks.dataframe_services.apply', return_value=df_clean):
-                rows = _read_rows_from_sessions(feed)
+                rows = list(_read_rows_from_sessions(feed))
 
         self.assertEqual(rows, [{'article': 'A', 'price': 5.5, 'name': 'Widget'}])
+
+
+class ReadRowsStreamingTests(TestCase):
+    """_read_rows_from_sessions yields rows lazily, session by session."""
+
+    def test_rows_from_all_sessions_are_yielded_in_order(self):
+        from supplier_feed.tasks import _read_rows_from_sessions
+
+        frames = {
+            's1': pd.DataFrame([{'article': f'A{i}'} for i in range(5)]),
+            's2': pd.DataFrame([{'article': 'B0'}]),
+        }
+        feed = MagicMock()
+        feed.session_ids = ['s1', 's2']
+
+        def fake_apply(pipeline, fobj, session_id):
+            return frames[session_id]
+
+        with patch('supplier_feed.tasks.FEED_INGEST_CHUNK_SIZE', 2), \
+                patch('supplier_feed.tasks.session_store.open_session_file', return_value=MagicMock()), \
+                patch('supplier_feed.tasks.dataframe_services.apply', side_effect=fake_apply) as mock_apply:
+            rows = _read_rows_from_sessions(feed)
+            first = next(rows)
+            # Only the first session has been read so far.
+            self.assertEqual(mock_apply.call_count, 1)
+            rest = list(rows)
+
+        self.assertEqual(
+            [first['article']] + [r['article'] for r in rest],
+            ['A0', 'A1', 'A2', 'A3', 'A4', 'B0'],
+        )
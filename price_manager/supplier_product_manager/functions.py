@@ -10,6 +10,7 @@ from .models import (SupplierFile, Setting, Link,
 from .tables import SP_AVAILABLE_COLUMN_MAP, SP_DEFAULT_VISIBLE_COLUMNS
 from main_product_manager.models import MainProduct
 from main_product_manager.functions import recalculate_search_vectors
+from core.category_paths import CategoryPathResolver, split_path
 
 from .forms import (DictFormset, LinkFormset,
                     InitialForm,
@@ -441,20 +442,25 @@ def load_setting(pk):
             lambda s: Discount.objects.get_or_create(supplier=setting.supplier, name=s)[0] if s else None
         )
     if 'category' in df.columns:
+        categories = CategoryPathResolver(Category)
+        resolved = {}
+
         def _get_category(value):
             if not value:
                 return None
-            parts = [p.strip() for p in str(value).split(">") if p and str(p).strip()]
-            parent = None
-            node = None
-            if Category.objects.filter(name=parts[-1]).count() == 1:
-                return Category.objects.filter(name=parts[-1]).first()
-            for name in parts[:10]:
-                node, _ = Category.objects.get_or_create(name=name, parent=parent)
-                parent = node
-            return node
-    
-        df['category'] = df['category'].apply(_get_category)
+            parts = split_path(value, '>')
+            if not parts:
+                return None
+            node = categories.unique_by_name(parts[-1])
+            if node is not None:
+                return node
+            return categories.plan(parts[:10])
+
+        # Plan every distinct path in file order, then insert the new nodes at once.
+        for value in df['category'].unique():
+            resolved[value] = _get_category(value)
+        categories.flush()
+        df['category'] = df['category'].map(resolved)
 
     def get_spmodel(row):
         data = {
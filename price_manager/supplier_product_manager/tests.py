@@ -1,3 +1,4 @@
+import tempfile
 from io import BytesIO
 from decimal import Decimal
 
@@ -21,6 +22,7 @@ from supplier_product_manager.functions import (
 from supplier_product_manager.models import Link, Setting, SupplierFile, SupplierProduct
 
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='spm_load_test_'))
 class BasicLoadTests(TestCase):
     def setUp(self):
         self.currency = Currency.objects.get(name="KZT")
@@ -485,6 +487,7 @@ class GetSpsCacheTests(BasicLoadTests):
         self.assertEqual(recached_payload[0]["supplier_price"], 7.0)
 
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='spm_file_test_'))
 class SupplierFileSelectionTests(TestCase):
     def setUp(self):
         self.currency = Currency.objects.get(name="KZT")